@@ -1,12 +1,46 @@
-from django.contrib import admin
+from django.contrib import admin, messages
 from django.contrib.auth.admin import UserAdmin
+from django.core.cache import cache
+from django.db import transaction
+from django.utils import timezone
 
+from newspaper_project.admin import LargeTableAdminMixin, in_batches
+
+from .backends import user_cache_key
+from .birthdays import birthdays_cache_key
 from .forms import CustomUserCreationForm, CustomUserChangeForm
 from .models import CustomUser
 
 
+class AgeListFilter(admin.SimpleListFilter):
+    """Filter on the current_age annotation added by CustomUserAdmin."""
+
+    title = "age"
+    parameter_name = "age"
+    # value, label, lowest and highest age
+    brackets = [
+        ("under-18", "Under 18", None, 17),
+        ("18-29", "18 to 29", 18, 29),
+        ("30-49", "30 to 49", 30, 49),
+        ("50-64", "50 to 64", 50, 64),
+        ("65-plus", "65 and over", 65, None),
+    ]
+
+    def lookups(self, request, model_admin):
+        return [(value, label) for value, label, _, _ in self.brackets]
+
+    def queryset(self, request, queryset):
+        for value, _, low, high in self.brackets:
+            if value == self.value():
+                if low is not None:
+                    queryset = queryset.filter(current_age__gte=low)
+                if high is not None:
+                    queryset = queryset.filter(current_age__lte=high)
+        return queryset
+
+
 # Register your models here.
-class CustomUserAdmin(UserAdmin):
+class CustomUserAdmin(LargeTableAdminMixin, UserAdmin):
     add_form = CustomUserCreationForm
     form = CustomUserChangeForm
     model = CustomUser
@@ -18,9 +52,35 @@ class CustomUserAdmin(UserAdmin):
         "age",
         "is_staff",
     ]
+    list_filter = UserAdmin.list_filter + (AgeListFilter,)
+    # Exact, case-insensitive matches, served by the Upper() indexes.
+    search_fields = ["=username", "=email"]
+    search_help_text = "Exact username or email address."
+    actions = ["deactivate_selected"]
 
     fieldsets = UserAdmin.fieldsets + ((None, {"fields": ("date_of_birth",)}),)
     add_fieldsets = UserAdmin.fieldsets + ((None, {"fields": ("date_of_birth",)}),)
 
+    def get_queryset(self, request):
+        return super().get_queryset(request).with_age()
+
+    @admin.display(description="Age", ordering="current_age")
+    def age(self, obj):
+        return obj.current_age
+
+    @admin.action(description="Deactivate selected users")
+    def deactivate_selected(self, request, queryset):
+        deactivated = 0
+        for pks in in_batches(queryset):
+            with transaction.atomic():
+                users = self.model.objects.filter(pk__in=pks, is_active=True)
+                deactivated += users.update(is_active=False)
+            # update() sends no signals; drop the cached copies ourselves.
+            cache.delete_many([user_cache_key(pk) for pk in pks])
+        cache.delete(birthdays_cache_key(timezone.now().date()))
+        self.message_user(
+            request, f"Deactivated {deactivated} users.", messages.SUCCESS
+        )
+
 
 admin.site.register(CustomUser, CustomUserAdmin)
@@ -0,0 +1,38 @@
+from django.conf import settings
+from django.contrib.auth.backends import ModelBackend
+from django.core.cache import cache
+
+
+def user_cache_key(user_id):
+    return f"auth.user.{user_id}"
+
+
+class CachedModelBackend(ModelBackend):
+    """
+    ModelBackend that serves the logged-in user from the cache, so requests
+    with a cached session need no query to know who is asking.
+
+    Entries are keyed by user id rather than session so that one deletion in
+    accounts.signals covers every session of a user. Updates that skip save(),
+    such as QuerySet.update(), are only seen once USER_CACHE_TIMEOUT expires.
+    Settings only enable it with a cache shared by every server process, so
+    that the deletion reaches them all.
+    """
+
+    def get_user(self, user_id):
+        key = user_cache_key(user_id)
+        user = cache.get(key)
+        if user is None:
+            user = super().get_user(user_id)
+            if user is not None:
+                cache.set(key, user, settings.USER_CACHE_TIMEOUT)
+        return user
+
+    async def aget_user(self, user_id):
+        key = user_cache_key(user_id)
+        user = await cache.aget(key)
+        if user is None:
+            user = await super().aget_user(user_id)
+            if user is not None:
+                await cache.aset(key, user, settings.USER_CACHE_TIMEOUT)
+        return user
@@ -0,0 +1,44 @@
+import datetime
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.utils import timezone
+
+# Names shown on the home page; the rest are left out.
+BIRTHDAYS_LISTED = 50
+
+
+def birthdays_cache_key(date):
+    return f"accounts.birthdays.{date.isoformat()}"
+
+
+def birthdays_today():
+    """
+    Today's birthdays as dicts of username, names and current_age. Built
+    from the birthday index and cached for BIRTHDAYS_CACHE_TIMEOUT, never
+    past midnight; accounts.signals drops the entry when a date of birth
+    changes.
+    """
+    now = timezone.now()
+    today = now.date()
+    tomorrow = datetime.datetime.combine(
+        today + datetime.timedelta(days=1), datetime.time(), tzinfo=now.tzinfo
+    )
+    return cache.get_or_set(
+        birthdays_cache_key(today),
+        lambda: list(
+            get_user_model()
+            .objects.birthdays_on(today)
+            .with_age(today)
+            .filter(is_active=True)
+            .order_by("username")
+            .values("username", "first_name", "last_name", "current_age")[
+                :BIRTHDAYS_LISTED
+            ]
+        ),
+        min(
+            int((tomorrow - now).total_seconds()) + 1,
+            settings.BIRTHDAYS_CACHE_TIMEOUT,
+        ),
+    )
@@ -0,0 +1,53 @@
+# Generated by Django 5.2.7 on 2026-10-18 01:45
+
+import accounts.models
+from django.db import migrations, models
+from django.db.models.functions import ExtractDay, ExtractMonth
+
+
+def fill_birthday_fields(apps, schema_editor):
+    CustomUser = apps.get_model("accounts", "CustomUser")
+    CustomUser.objects.using(schema_editor.connection.alias).exclude(
+        date_of_birth=None
+    ).update(
+        birth_month=ExtractMonth("date_of_birth"),
+        birth_day=ExtractDay("date_of_birth"),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("accounts", "0002_alter_customuser_date_of_birth"),
+        ("auth", "0012_alter_user_first_name_max_length"),
+    ]
+
+    operations = [
+        migrations.AlterModelManagers(
+            name="customuser",
+            managers=[
+                ("objects", accounts.models.CustomUserManager()),
+            ],
+        ),
+        migrations.AddField(
+            model_name="customuser",
+            name="birth_day",
+            field=models.PositiveSmallIntegerField(
+                blank=True, editable=False, null=True
+            ),
+        ),
+        migrations.AddField(
+            model_name="customuser",
+            name="birth_month",
+            field=models.PositiveSmallIntegerField(
+                blank=True, editable=False, null=True
+            ),
+        ),
+        migrations.RunPython(fill_birthday_fields, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name="customuser",
+            index=models.Index(
+                fields=["birth_month", "birth_day"], name="user_birthday_idx"
+            ),
+        ),
+    ]
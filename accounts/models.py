@@ -1,10 +1,43 @@
+import calendar
 import uuid
 from django.db import models
+from django.db.models.functions import ExtractYear, Upper
 from dateutil.relativedelta import relativedelta
-from django.contrib.auth.models import AbstractUser
+from django.contrib.auth.models import AbstractUser, UserManager
 from django.utils import timezone
 
 
+class CustomUserQuerySet(models.QuerySet):
+    def birthdays_on(self, date):
+        """
+        Users whose birthday falls on ``date``. As in ``is_birthday``, those
+        born on Feb 29 celebrate on Feb 28 in common years.
+        """
+        query = models.Q(birth_month=date.month, birth_day=date.day)
+        if (date.month, date.day) == (2, 28) and not calendar.isleap(date.year):
+            query |= models.Q(birth_month=2, birth_day=29)
+        return self.filter(query)
+
+    def birthdays_today(self):
+        return self.birthdays_on(timezone.now().date())
+
+    def with_age(self, today=None):
+        """Annotate ``current_age``, the ``age`` property computed in SQL."""
+        today = today or timezone.now().date()
+        had_birthday = models.Q(birth_month__lt=today.month) | models.Q(
+            birth_month=today.month, birth_day__lte=today.day
+        )
+        return self.annotate(
+            current_age=models.Value(today.year)
+            - ExtractYear("date_of_birth")
+            - models.Case(models.When(had_birthday, then=0), default=1)
+        )
+
+
+class CustomUserManager(UserManager.from_queryset(CustomUserQuerySet)):
+    pass
+
+
 # Create your models here.
 class CustomUser(AbstractUser):
     """Create a Custom User with additional fields."""
@@ -13,6 +46,36 @@ class CustomUser(AbstractUser):
         primary_key=True, unique=True, default=uuid.uuid4, editable=False
     )
     date_of_birth = models.DateField(null=True, blank=True)
+    # Copies of date_of_birth's month and day, so birthdays can be looked up
+    # through an index.
+    birth_month = models.PositiveSmallIntegerField(
+        null=True, blank=True, editable=False
+    )
+    birth_day = models.PositiveSmallIntegerField(null=True, blank=True, editable=False)
+
+    objects = CustomUserManager()
+
+    class Meta(AbstractUser.Meta):
+        indexes = [
+            models.Index(fields=["birth_month", "birth_day"], name="user_birthday_idx"),
+            # Case-insensitive exact lookups, as made by the admin search.
+            models.Index(Upper("username"), name="user_username_upper_idx"),
+            models.Index(Upper("email"), name="user_email_upper_idx"),
+        ]
+
+    def save(self, *args, **kwargs):
+        if "date_of_birth" not in self.get_deferred_fields():
+            self.set_birthday_fields()
+            update_fields = kwargs.get("update_fields")
+            if update_fields is not None and "date_of_birth" in update_fields:
+                kwargs["update_fields"] = {*update_fields, "birth_month", "birth_day"}
+        super().save(*args, **kwargs)
+
+    def set_birthday_fields(self):
+        """Refresh the fields derived from date_of_birth. Called by save()."""
+        dob = self.date_of_birth
+        self.birth_month = dob.month if dob else None
+        self.birth_day = dob.day if dob else None
 
     @property
     def age(self):
@@ -0,0 +1,38 @@
+from django.contrib.auth import get_user_model
+from django.contrib.auth.signals import user_logged_out
+from django.core.cache import cache
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from django.utils import timezone
+
+from .backends import user_cache_key
+from .birthdays import birthdays_cache_key
+
+BIRTHDAY_LISTING_FIELDS = {
+    "username",
+    "first_name",
+    "last_name",
+    "date_of_birth",
+    "is_active",
+}
+
+
+@receiver(post_save, sender=get_user_model())
+@receiver(post_delete, sender=get_user_model())
+def forget_cached_user(sender, instance, **kwargs):
+    # Covers profile edits, password changes and deactivation.
+    cache.delete(user_cache_key(instance.pk))
+
+
+@receiver(user_logged_out)
+def forget_logged_out_user(sender, request, user, **kwargs):
+    if user is not None:
+        cache.delete(user_cache_key(user.pk))
+
+
+@receiver(post_save, sender=get_user_model())
+@receiver(post_delete, sender=get_user_model())
+def forget_todays_birthdays(sender, instance, update_fields=None, **kwargs):
+    # Logins save last_login only; that cannot change the listing.
+    if update_fields is None or BIRTHDAY_LISTING_FIELDS & update_fields:
+        cache.delete(birthdays_cache_key(timezone.now().date()))
@@ -1,13 +1,32 @@
 import uuid
 from datetime import date, datetime
 from unittest.mock import patch
+from dateutil.relativedelta import relativedelta
 from django.utils import timezone
 from django.urls import reverse
-from django.test import TestCase
+from django.test import Client, TestCase, override_settings
 from django.contrib.auth import get_user_model
+from django.core.cache import cache
+
+from .backends import user_cache_key
+from .birthdays import birthdays_today
 
 
 # Create your tests here.
+def cached_auth():
+    """
+    Settings caching the session and user, as with a shared CACHE_BACKEND.
+    The test process is the only one, so its locmem cache will do.
+    """
+    return override_settings(
+        SESSION_ENGINE="django.contrib.sessions.backends.cached_db",
+        AUTHENTICATION_BACKENDS=[
+            "accounts.backends.CachedModelBackend",
+            "django.contrib.auth.backends.ModelBackend",
+        ],
+    )
+
+
 class UserManagersTests(TestCase):
     @classmethod
     def setUpTestData(cls):
@@ -147,3 +166,187 @@ class RegisterUsersTests(TestCase):
 
         self.assertIn("This field is required.", form.errors["username"])
         self.assertIn("This field is required.", form.errors["password2"])
+
+
+@cached_auth()
+class CachedUserTests(TestCase):
+    """Ensure logged-in requests reuse the cached session and user."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = get_user_model().objects.create_user(
+            username="cached", password="cachedpassword1234"
+        )
+
+    def setUp(self):
+        cache.clear()
+        self.client.login(username="cached", password="cachedpassword1234")
+        self.client.get(reverse("home"))
+
+    def test_no_auth_queries_once_cached(self):
+        with self.assertNumQueries(0):
+            response = self.client.get(reverse("home"))
+        self.assertEqual(response.context["user"], self.user)
+
+    def test_saving_the_user_invalidates(self):
+        self.user.first_name = "Renamed"
+        self.user.save()
+        self.assertIsNone(cache.get(user_cache_key(self.user.pk)))
+        response = self.client.get(reverse("home"))
+        self.assertEqual(response.context["user"].first_name, "Renamed")
+
+    def test_password_change_ends_other_sessions(self):
+        self.user.set_password("anotherpassword1234")
+        self.user.save()
+        response = self.client.get(reverse("home"))
+        self.assertFalse(response.context["user"].is_authenticated)
+
+    def test_logout_invalidates(self):
+        self.client.post(reverse("logout"))
+        self.assertIsNone(cache.get(user_cache_key(self.user.pk)))
+
+    def test_sessions_logged_in_without_the_cache_still_work(self):
+        client = Client()
+        client.force_login(
+            self.user, backend="django.contrib.auth.backends.ModelBackend"
+        )
+        response = client.get(reverse("home"))
+        self.assertEqual(response.context["user"], self.user)
+
+
+class BirthdayQueryTests(TestCase):
+    """Ensure birthdays and ages are found in SQL, matching the properties."""
+
+    @classmethod
+    def setUpTestData(cls):
+        User = get_user_model()
+        cls.today = timezone.now().date()
+        cls.celebrating = User.objects.create_user(
+            username="celebrating",
+            date_of_birth=cls.today.replace(year=1992),
+        )
+        cls.leapling = User.objects.create_user(
+            username="leapling", date_of_birth=date(2004, 2, 29)
+        )
+        cls.other = User.objects.create_user(
+            username="other", date_of_birth=date(1980, 3, 1)
+        )
+        cls.unknown = User.objects.create_user(username="unknown")
+
+    def birthdays_on(self, day):
+        users = get_user_model().objects.birthdays_on(day)
+        return set(users.values_list("username", flat=True))
+
+    def test_fields_follow_date_of_birth(self):
+        self.other.date_of_birth = date(1980, 12, 24)
+        self.other.save(update_fields=["date_of_birth"])
+        self.other.refresh_from_db()
+        self.assertEqual((self.other.birth_month, self.other.birth_day), (12, 24))
+
+    def test_birthdays_on(self):
+        self.assertEqual(self.birthdays_on(date(2025, 3, 1)), {"other"})
+        # Feb 29 birthdays are celebrated on Feb 28 in common years only.
+        self.assertEqual(self.birthdays_on(date(2025, 2, 28)), {"leapling"})
+        self.assertEqual(self.birthdays_on(date(2024, 2, 28)), set())
+        self.assertEqual(self.birthdays_on(date(2024, 2, 29)), {"leapling"})
+        self.assertIn(self.celebrating, get_user_model().objects.birthdays_today())
+
+    def test_with_age_matches_property(self):
+        for day in [date(2025, 2, 28), date(2025, 3, 1), date(2026, 12, 31)]:
+            now = timezone.make_aware(datetime.combine(day, datetime.min.time()))
+            with patch("django.utils.timezone.now", return_value=now):
+                users = get_user_model().objects.exclude(date_of_birth=None)
+                for user in users.with_age():
+                    self.assertEqual(user.current_age, user.age, msg=(user, day))
+        unknown = get_user_model().objects.with_age().get(pk=self.unknown.pk)
+        self.assertIsNone(unknown.current_age)
+
+    @cached_auth()
+    def test_home_page_lists_todays_birthdays_from_cache(self):
+        cache.clear()
+        self.client.force_login(self.other)
+        response = self.client.get(reverse("home"))
+        self.assertContains(response, "Birthdays today")
+        self.assertContains(response, "Celebrating")
+        with self.assertNumQueries(0):
+            self.client.get(reverse("home"))
+
+        self.other.date_of_birth = self.today.replace(year=1980)
+        self.other.save()
+        response = self.client.get(reverse("home"))
+        self.assertEqual(
+            [person["username"] for person in response.context["birthdays"]],
+            ["celebrating", "other"],
+        )
+
+    def test_admin_sorts_and_filters_by_age(self):
+        User = get_user_model()
+        User.objects.create_user(
+            username="forty",
+            date_of_birth=self.today - relativedelta(years=40, months=1),
+        )
+        User.objects.create_superuser(username="admin", password="pw")
+        self.client.login(username="admin", password="pw")
+        url = reverse("admin:accounts_customuser_changelist")
+        response = self.client.get(url, {"o": "5"})
+        changelist = response.context["cl"]
+        self.assertEqual(changelist.queryset.query.order_by[0], "current_age")
+        ages = [user.current_age for user in changelist.result_list]
+        self.assertEqual(ages, sorted(ages, key=lambda age: (age is not None, age)))
+
+        response = self.client.get(url, {"age": "30-49"})
+        usernames = [user.username for user in response.context["cl"].result_list]
+        self.assertIn("forty", usernames)
+        self.assertNotIn("leapling", usernames)
+
+    def test_listing_is_cached_until_midnight_at_most(self):
+        now = timezone.make_aware(datetime(2025, 3, 1, 23, 0))
+        with patch("django.utils.timezone.now", return_value=now), patch(
+            "accounts.birthdays.cache"
+        ) as cache_mock:
+            for timeout, expected in [(60, 60), (86400, 3601)]:
+                with self.settings(BIRTHDAYS_CACHE_TIMEOUT=timeout):
+                    birthdays_today()
+                self.assertEqual(cache_mock.get_or_set.call_args.args[2], expected)
+
+
+class UserAdminTests(TestCase):
+    """Ensure the user admin searches exactly and deactivates in batches."""
+
+    @classmethod
+    def setUpTestData(cls):
+        User = get_user_model()
+        cls.admin = User.objects.create_superuser(username="admin", password="pw")
+        cls.alice = User.objects.create_user(
+            username="Alice", email="alice@example.com", password="alicepass1234"
+        )
+        User.objects.create_user(username="alicia", email="alicia@example.com")
+
+    def setUp(self):
+        self.client.force_login(self.admin)
+        self.url = reverse("admin:accounts_customuser_changelist")
+
+    def search(self, term):
+        response = self.client.get(self.url, {"q": term})
+        return [user.username for user in response.context["cl"].result_list]
+
+    def test_search_is_exact_and_case_insensitive(self):
+        self.assertEqual(self.search("alice"), ["Alice"])
+        self.assertEqual(self.search("ALICIA@example.com"), ["alicia"])
+        self.assertEqual(self.search("ali"), [])
+
+    @cached_auth()
+    def test_deactivate_action_drops_cached_users(self):
+        other = Client()
+        other.login(username="Alice", password="alicepass1234")
+        other.get(reverse("home"))
+        self.assertIsNotNone(cache.get(user_cache_key(self.alice.pk)))
+
+        self.client.post(
+            self.url,
+            {"action": "deactivate_selected", "_selected_action": [self.alice.pk]},
+        )
+        self.alice.refresh_from_db()
+        self.assertFalse(self.alice.is_active)
+        response = other.get(reverse("home"))
+        self.assertFalse(response.context["user"].is_authenticated)
@@ -1,17 +1,48 @@
-from django.contrib import admin
-from .models import Article, Comment
+from django.contrib import admin, messages
+from django.forms.models import BaseInlineFormSet
+from django.urls import reverse
+from django.utils.html import format_html
 
+from newspaper_project.admin import LargeTableAdminMixin, in_batches
+
+from .models import Article, Comment, recount_comments
+from .search import search_articles
 
 # Register your models here.
 
 
+class LatestCommentsFormSet(BaseInlineFormSet):
+    def get_queryset(self):
+        # Only the newest comments; the rest are a link away.
+        if not hasattr(self, "_latest"):
+            self._latest = super().get_queryset()[: CommentInline.max_shown]
+        return self._latest
+
+
 class CommentInline(admin.TabularInline):
+    """The latest comments of an article, read only."""
+
     model = Comment
+    formset = LatestCommentsFormSet
+    max_shown = 20
     extra = 0
+    can_delete = False
+    fields = ["author", "comment", "created_at"]
+    readonly_fields = fields
+    ordering = ["-created_at", "-comment_id"]
+
+    def get_queryset(self, request):
+        return super().get_queryset(request).select_related("author")
+
+    def has_add_permission(self, request, obj=None):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
 
 
 @admin.register(Article)
-class ArticleAdmin(admin.ModelAdmin):
+class ArticleAdmin(LargeTableAdminMixin, admin.ModelAdmin):
     inlines = [
         CommentInline,
     ]
@@ -21,6 +52,57 @@ class ArticleAdmin(admin.ModelAdmin):
         "created_at",
         "updated_at",
     ]
+    list_select_related = ["author"]
+    date_hierarchy = "created_at"
+    # Searched through the full-text index; see get_search_results().
+    search_fields = ["title"]
+    search_help_text = "Full-text search of titles and bodies."
+    raw_id_fields = ["author"]
+    readonly_fields = ["all_comments"]
+    actions = ["recount_selected_comments"]
+
+    def get_queryset(self, request):
+        queryset = super().get_queryset(request)
+        if request.resolver_match.url_name == "articles_article_changelist":
+            # Bodies make up most of each row and are not listed.
+            queryset = queryset.defer("body", "body_html")
+        return queryset
+
+    def get_search_results(self, request, queryset, search_term):
+        if not search_term:
+            return queryset, False
+        return search_articles(queryset, search_term), False
+
+    @admin.display(description="Comments")
+    def all_comments(self, obj):
+        url = reverse("admin:articles_comment_changelist")
+        return format_html(
+            '<a href="{}?article__exact={}">All {} comments</a>',
+            url,
+            obj.pk,
+            obj.comment_count,
+        )
+
+    @admin.action(description="Recount comments of selected articles")
+    def recount_selected_comments(self, request, queryset):
+        drifted = 0
+        for pks in in_batches(queryset):
+            drifted += len(recount_comments(pks))
+        self.message_user(
+            request, f"Repaired {drifted} comment counts.", messages.SUCCESS
+        )
+
 
+@admin.register(Comment)
+class CommentAdmin(LargeTableAdminMixin, admin.ModelAdmin):
+    list_display = ["comment", "article", "author", "created_at"]
+    list_select_related = ["article", "author"]
+    raw_id_fields = ["article", "author"]
+    ordering = ["-created_at"]
 
-admin.site.register(Comment)
+    def get_queryset(self, request):
+        queryset = super().get_queryset(request)
+        if request.resolver_match.url_name == "articles_comment_changelist":
+            # Each row only prints its article's title.
+            queryset = queryset.defer("article__body", "article__body_html")
+        return queryset
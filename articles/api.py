@@ -0,0 +1,235 @@
+"""
+Read-only JSON API over articles and their comments, for clients that would
+otherwise scrape the HTML pages.
+
+Rows are fetched with values(), selecting only the columns behind the fields
+the client asked for (``?fields=id,title,author``), and serialized by hand:
+no model instances or generic serializer per row. Lists are cursor paginated
+like the HTML pages. Every response carries an ETag of its body, so clients
+polling for changes get a 304 with no body when nothing changed.
+"""
+
+import hashlib
+import json
+
+from django.http import Http404, HttpResponse, JsonResponse
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import quote_etag, urlencode
+from django.views import View
+
+from .models import BODY_RENDERER_VERSION, Article, Comment, render_body
+from .pagination import CursorPaginator, InvalidCursor
+
+
+def isoformat(value):
+    return value.isoformat() if value is not None else None
+
+
+def author(prefix):
+    """A field serializing the author joined through ``prefix``."""
+    columns = [f"{prefix}username", f"{prefix}first_name", f"{prefix}last_name"]
+
+    def serialize(row):
+        username, first_name, last_name = (row[column] for column in columns)
+        return {
+            "username": username,
+            "name": f"{first_name} {last_name}".strip() or username,
+        }
+
+    return columns, serialize
+
+
+def column(name, convert=None):
+    """A field serializing column ``name``, converted by ``convert``."""
+    if convert is None:
+        return [name], lambda row: row[name]
+    return [name], lambda row: convert(row[name])
+
+
+# Field name -> (columns to select, function building the value from a row).
+ARTICLE_FIELDS = {
+    "id": column("article_id", str),
+    "title": column("title"),
+    "author": author("author__"),
+    "snippet": column("snippet"),
+    "reading_time": column("reading_time"),
+    "comment_count": column("comment_count"),
+    "created_at": column("created_at", isoformat),
+    "updated_at": column("updated_at", isoformat),
+    "body": column("body"),
+    # Rows not re-rendered yet are fixed up by ArticleSerializer.
+    "body_html": (["body_html", "body_html_version"], lambda row: row["body_html"]),
+}
+
+COMMENT_FIELDS = {
+    "id": column("comment_id", str),
+    "comment": column("comment"),
+    "author": author("author__"),
+    "created_at": column("created_at", isoformat),
+}
+
+
+class InvalidFields(ValueError):
+    pass
+
+
+class Serializer:
+    """Turn rows from values() into dicts holding the requested fields."""
+
+    def __init__(self, available, fields):
+        unknown = [name for name in fields if name not in available]
+        if unknown:
+            raise InvalidFields(
+                f"Unknown fields: {', '.join(unknown)}. "
+                f"Available: {', '.join(available)}."
+            )
+        self.fields = [(name, available[name][1]) for name in fields]
+        self.columns = list(
+            dict.fromkeys(c for name in fields for c in available[name][0])
+        )
+
+    def serialize(self, rows):
+        fields = self.fields
+        return [{name: value(row) for name, value in fields} for row in rows]
+
+
+class ArticleSerializer(Serializer):
+    def serialize(self, rows):
+        if "body_html" in self.columns:
+            self.render_stale(rows)
+        return super().serialize(rows)
+
+    def render_stale(self, rows):
+        """Render the bodies whose stored HTML is out of date."""
+        stale = {
+            row["article_id"]: row
+            for row in rows
+            if row["body_html_version"] != BODY_RENDERER_VERSION
+        }
+        if not stale:
+            return
+        bodies = Article.objects.filter(pk__in=stale).values_list("pk", "body")
+        for pk, body in bodies:
+            stale[pk]["body_html"] = render_body(body)
+
+
+class ApiView(View):
+    """
+    Base JSON view: session authentication, ``fields=`` parsing, JSON errors
+    and ETags. Subclasses implement get_data().
+    """
+
+    http_method_names = ["get", "head", "options"]
+    serializer_class = Serializer
+    available_fields = {}
+    default_fields = None  # All available fields.
+
+    def get(self, request, *args, **kwargs):
+        if not request.user.is_authenticated:
+            return self.error("Authentication required.", status=401)
+        try:
+            self.serializer = self.serializer_class(
+                self.available_fields, self.get_fields()
+            )
+            data = self.get_data()
+        except (InvalidFields, InvalidCursor) as e:
+            return self.error(str(e), status=400)
+        except Http404 as e:
+            return self.error(str(e), status=404)
+        content = json.dumps(data, separators=(",", ":")).encode()
+        # Hashing the body keeps the ETag exact whatever fields were chosen
+        # and however the joined author changed.
+        etag = quote_etag(hashlib.sha256(content).hexdigest())
+        response = get_conditional_response(request, etag=etag) or HttpResponse(
+            content, content_type="application/json"
+        )
+        response.headers["ETag"] = etag
+        patch_cache_control(response, private=True, no_cache=True)
+        return response
+
+    def error(self, message, status):
+        return JsonResponse({"error": message}, status=status)
+
+    def get_fields(self):
+        requested = self.request.GET.get("fields")
+        if not requested:
+            return self.default_fields or list(self.available_fields)
+        return list(dict.fromkeys(filter(None, requested.split(","))))
+
+    def get_data(self):
+        raise NotImplementedError
+
+
+class ApiListMixin:
+    """Cursor paginate get_queryset() into results and next/previous links."""
+
+    per_page = 20
+    ordering = ()
+
+    def get_data(self):
+        columns = list(
+            dict.fromkeys([*self.serializer.columns, *self.get_cursor_columns()])
+        )
+        queryset = self.get_queryset().values(*columns)
+        paginator = CursorPaginator(queryset, self.per_page, self.ordering)
+        page = paginator.page(self.request.GET.get("cursor"))
+        return {
+            "results": self.serializer.serialize(page),
+            "next": self.page_url(page.next_cursor),
+            "previous": self.page_url(page.previous_cursor),
+        }
+
+    def get_cursor_columns(self):
+        return [field.lstrip("-") for field in self.ordering]
+
+    def page_url(self, cursor):
+        if cursor is None:
+            return None
+        query = {"cursor": cursor}
+        if "fields" in self.request.GET:
+            query["fields"] = self.request.GET["fields"]
+        return f"{self.request.path}?{urlencode(query)}"
+
+
+class ArticleListApiView(ApiListMixin, ApiView):
+    """Articles, newest first. The bodies are left out unless asked for."""
+
+    serializer_class = ArticleSerializer
+    available_fields = ARTICLE_FIELDS
+    default_fields = [
+        name for name in ARTICLE_FIELDS if name not in ("body", "body_html")
+    ]
+    ordering = ("-created_at", "-article_id")
+
+    def get_queryset(self):
+        return Article.objects.all()
+
+
+class ArticleDetailApiView(ApiView):
+    serializer_class = ArticleSerializer
+    available_fields = ARTICLE_FIELDS
+
+    def get_data(self):
+        columns = dict.fromkeys(["article_id", *self.serializer.columns])
+        row = Article.objects.filter(pk=self.kwargs["pk"]).values(*columns).first()
+        if row is None:
+            raise Http404("No article found matching the query")
+        return self.serializer.serialize([row])[0]
+
+
+class ArticleCommentsApiView(ApiListMixin, ApiView):
+    """An article's comments, oldest first, as on the detail page."""
+
+    available_fields = COMMENT_FIELDS
+    ordering = ("created_at", "comment_id")
+
+    def get_queryset(self):
+        return Comment.objects.filter(article_id=self.kwargs["pk"])
+
+    def get_data(self):
+        data = super().get_data()
+        # An empty first page may mean the article does not exist.
+        if not data["results"] and "cursor" not in self.request.GET:
+            if not Article.objects.filter(pk=self.kwargs["pk"]).exists():
+                raise Http404("No article found matching the query")
+        return data
@@ -1,6 +1,39 @@
 from django import forms
 
-from .models import Comment
+from .models import Article, Comment
+
+
+class ArticleForm(forms.ModelForm):
+    class Meta:
+        model = Article
+        fields = [
+            "title",
+            "body",
+        ]
+
+
+class ArticleEditForm(ArticleForm):
+    """ArticleForm remembering the version of the article it was opened on."""
+
+    version = forms.IntegerField(widget=forms.HiddenInput)
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.fields["version"].initial = self.instance.version
+
+    def reject_stale(self, current_version):
+        """
+        Flag the submission as made on an older version of the article, and
+        accept the next one as made on ``current_version``.
+        """
+        self.add_error(
+            None,
+            "This article was changed after you started editing it. Your "
+            "changes are shown below and were not saved; compare them with "
+            "the current article, then save again to replace it.",
+        )
+        self.data = self.data.copy()
+        self.data[self.add_prefix("version")] = current_version
 
 
 class CommentForm(forms.ModelForm):
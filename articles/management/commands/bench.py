@@ -0,0 +1,317 @@
+import http.cookiejar
+import json
+import random
+import re
+import statistics
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.test import Client, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from articles.models import Article
+from newspaper_project.metrics import PERCENTILES, percentile
+
+FLOWS = ["list", "detail", "api_list", "api_detail", "create", "comment", "login"]
+
+SERVER_TIMING_QUERIES = re.compile(r'db;[^,]*desc="(\d+) queries"')
+
+
+class NoRedirect(urllib.request.HTTPRedirectHandler):
+    def redirect_request(self, *args, **kwargs):
+        return None
+
+
+class RemoteClient:
+    """
+    The few test client methods the flows use, against a running server.
+    Query counts come from the Server-Timing header, so PERFORMANCE_METRICS
+    must be on in the server for them to be reported.
+    """
+
+    def __init__(self, base_url):
+        self.base_url = base_url.rstrip("/")
+        self.cookies = http.cookiejar.CookieJar()
+        self.opener = urllib.request.build_opener(
+            urllib.request.HTTPCookieProcessor(self.cookies), NoRedirect()
+        )
+
+    def csrf_token(self):
+        for cookie in self.cookies:
+            if cookie.name == settings.CSRF_COOKIE_NAME:
+                return cookie.value
+        # Any form page sets the cookie.
+        self.get(reverse("login"))
+        return self.csrf_token()
+
+    def get(self, path):
+        return self.open(urllib.request.Request(self.base_url + path))
+
+    def post(self, path, data):
+        token = self.csrf_token()
+        body = urllib.parse.urlencode({**data, "csrfmiddlewaretoken": token})
+        request = urllib.request.Request(
+            self.base_url + path,
+            data=body.encode(),
+            headers={"Referer": self.base_url + path},
+        )
+        return self.open(request)
+
+    def open(self, request):
+        try:
+            with self.opener.open(request) as response:
+                response.read()
+                return response.status, response.headers
+        except urllib.error.HTTPError as error:
+            error.read()
+            return error.code, error.headers
+
+
+class Command(BaseCommand):
+    help = (
+        "Time the main user flows (article list, article detail, the same "
+        "through the JSON API, creating an article, commenting, logging in) "
+        "and count their queries. Runs in-process through the test client and "
+        "rolls back everything it wrote, or against a running server with "
+        "--base-url. Results can be saved as JSON and compared with an "
+        "earlier run."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--flows",
+            nargs="+",
+            choices=FLOWS,
+            default=FLOWS,
+            help="Flows to run (default: all).",
+        )
+        parser.add_argument(
+            "--requests", type=int, default=100, help="Timed requests per flow."
+        )
+        parser.add_argument(
+            "--warmup", type=int, default=5, help="Untimed requests per flow first."
+        )
+        parser.add_argument("--seed", type=int, default=42)
+        parser.add_argument(
+            "--base-url",
+            help="Benchmark a running server, e.g. http://127.0.0.1:8000, "
+            "instead of the test client. Its writes are not rolled back.",
+        )
+        parser.add_argument(
+            "--keep",
+            action="store_true",
+            help="Commit what the in-process run wrote instead of rolling back.",
+        )
+        parser.add_argument("--output", help="Write the results to this JSON file.")
+        parser.add_argument(
+            "--compare", help="Show the change against an earlier --output file."
+        )
+
+    def handle(self, *args, flows, base_url, **options):
+        self.random = random.Random(options["seed"])
+        self.base_url = base_url
+        baseline = self.load(options["compare"]) if options["compare"] else None
+
+        if base_url:
+            results = self.run(flows, options["requests"], options["warmup"])
+        else:
+            hosts = [*settings.ALLOWED_HOSTS, "testserver"]
+            # The replicas never see the uncommitted bench data.
+            local = override_settings(ALLOWED_HOSTS=hosts, DATABASE_REPLICAS=[])
+            with local, transaction.atomic():
+                results = self.run(flows, options["requests"], options["warmup"])
+                transaction.set_rollback(not options["keep"])
+
+        report = {
+            "started_at": timezone.now().isoformat(),
+            "target": base_url or "test client",
+            "vendor": connection.vendor,
+            "requests": options["requests"],
+            "seed": options["seed"],
+            "flows": results,
+        }
+        self.show(results, baseline)
+        if options["output"]:
+            with open(options["output"], "w") as file:
+                json.dump(report, file, indent=2)
+            self.stdout.write(f"Results written to {options['output']}")
+
+    def load(self, path):
+        try:
+            with open(path) as file:
+                return json.load(file)["flows"]
+        except (OSError, ValueError, KeyError) as error:
+            raise CommandError(f"Cannot read {path}: {error}")
+
+    def run(self, flows, requests, warmup):
+        self.password = "bench-password"
+        self.writer = self.bench_user("bench_writer")
+        self.reader = self.bench_user("bench_reader")
+        self.articles = list(
+            Article.objects.exclude(author=self.reader)
+            .order_by("-created_at")
+            .values_list("pk", flat=True)[: max(requests + warmup, 100)]
+        )
+        if not self.articles and {"detail", "api_detail", "comment"} & set(flows):
+            raise CommandError("No articles to read; run seed_newspaper first.")
+        self.commented = set(
+            self.reader.comment_set.values_list("article_id", flat=True)
+        )
+
+        results = {}
+        for flow in flows:
+            action = getattr(self, f"flow_{flow}")
+            client = self.client(self.reader if flow != "create" else self.writer)
+            for index in range(warmup):
+                action(client, index)
+            samples = []
+            for index in range(requests):
+                sample = action(client, warmup + index)
+                if sample is None:
+                    break
+                samples.append(sample)
+            results[flow] = self.summarize(samples)
+        return results
+
+    def bench_user(self, username):
+        user, _ = get_user_model().objects.get_or_create(username=username)
+        user.set_password(self.password)
+        user.save()
+        return user
+
+    def client(self, user=None):
+        if self.base_url:
+            client = RemoteClient(self.base_url)
+            if user is not None:
+                client.post(
+                    reverse("login"),
+                    {"username": user.username, "password": self.password},
+                )
+            return client
+        client = Client(raise_request_exception=False)
+        if user is not None:
+            client.force_login(user)
+        return client
+
+    def request(self, client, method, path, data=None, expect=200):
+        """Make one request; return its latency, query count and success."""
+        started = time.perf_counter()
+        if self.base_url:
+            if method == "post":
+                status, headers = client.post(path, data)
+            else:
+                status, headers = client.get(path)
+            elapsed = time.perf_counter() - started
+            match = SERVER_TIMING_QUERIES.search(headers.get("Server-Timing", ""))
+            queries = int(match[1]) if match else None
+        else:
+            with CaptureQueriesContext(connection) as context:
+                if method == "post":
+                    response = client.post(path, data)
+                else:
+                    response = client.get(path)
+            elapsed = time.perf_counter() - started
+            status, queries = response.status_code, len(context)
+        return {"ms": elapsed * 1000, "queries": queries, "ok": status == expect}
+
+    def flow_list(self, client, index):
+        return self.request(client, "get", reverse("article_list"))
+
+    def flow_detail(self, client, index):
+        pk = self.articles[self.random.randrange(len(self.articles))]
+        return self.request(client, "get", reverse("article_detail", args=[pk]))
+
+    def flow_api_list(self, client, index):
+        return self.request(client, "get", reverse("api_article_list"))
+
+    def flow_api_detail(self, client, index):
+        pk = self.articles[self.random.randrange(len(self.articles))]
+        return self.request(client, "get", reverse("api_article_detail", args=[pk]))
+
+    def flow_create(self, client, index):
+        data = {"title": f"Bench article {index}", "body": "Benchmark body. " * 50}
+        return self.request(client, "post", reverse("article_create"), data, expect=302)
+
+    def flow_comment(self, client, index):
+        # One comment per article and reader: move on to a fresh article.
+        pk = next((pk for pk in self.articles if pk not in self.commented), None)
+        if pk is None:
+            return None
+        self.commented.add(pk)
+        path = reverse("article_detail", args=[pk])
+        return self.request(
+            client, "post", path, {"comment": f"Bench comment {index}"}, expect=302
+        )
+
+    def flow_login(self, client, index):
+        # Every login starts from a fresh, anonymous session.
+        client = self.client()
+        data = {"username": self.reader.username, "password": self.password}
+        return self.request(client, "post", reverse("login"), data, expect=302)
+
+    def summarize(self, samples):
+        latencies = sorted(sample["ms"] for sample in samples)
+        counts = [s["queries"] for s in samples if s["queries"] is not None]
+        summary = {
+            "requests": len(samples),
+            "errors": sum(not sample["ok"] for sample in samples),
+        }
+        for rank in PERCENTILES:
+            summary[f"p{rank}_ms"] = (
+                round(percentile(latencies, rank), 2) if latencies else None
+            )
+        summary["mean_ms"] = (
+            round(statistics.fmean(latencies), 2) if latencies else None
+        )
+        # Sequential requests per second through a single client.
+        summary["rps"] = (
+            round(1000 / statistics.fmean(latencies), 1) if latencies else None
+        )
+        summary["queries"] = round(statistics.fmean(counts), 2) if counts else None
+        summary["max_queries"] = max(counts) if counts else None
+        return summary
+
+    def show(self, results, baseline):
+        columns = [
+            "requests",
+            "errors",
+            "p50_ms",
+            "p95_ms",
+            "p99_ms",
+            "rps",
+            "queries",
+        ]
+        self.stdout.write(
+            f"{'flow':<12}" + "".join(f"{column:>10}" for column in columns)
+        )
+        for flow, summary in results.items():
+            self.stdout.write(
+                f"{flow:<12}"
+                + "".join(self.cell(summary.get(column)) for column in columns)
+            )
+            if baseline and flow in baseline:
+                self.stdout.write(
+                    f"{'  vs base':<12}{'':>20}"
+                    + "".join(
+                        self.change(summary[column], baseline[flow].get(column))
+                        for column in columns[2:]
+                    )
+                )
+
+    def cell(self, value):
+        if value is None:
+            return f"{'-':>10}"
+        return f"{value:>10}" if isinstance(value, int) else f"{value:>10.1f}"
+
+    def change(self, value, before):
+        if value is None or not before:
+            return f"{'-':>10}"
+        return f"{(value - before) / before:>+10.0%}"
@@ -0,0 +1,96 @@
+import statistics
+import time
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.test import Client, override_settings
+from django.urls import reverse
+
+from articles.models import Article
+from newspaper_project import compression
+
+# Levels CompressionMiddleware compresses with.
+MIDDLEWARE_LEVELS = {"gzip": compression.GZIP_LEVEL, "br": compression.BROTLI_QUALITY}
+
+# (encoding, level) pairs compared.
+SETTINGS = [
+    ("gzip", 1),
+    ("gzip", compression.GZIP_LEVEL),
+    ("gzip", 9),
+    ("br", 1),
+    ("br", compression.BROTLI_QUALITY),
+    ("br", 11),
+]
+
+
+class Command(BaseCommand):
+    help = (
+        "Measure the CPU cost and size reduction of compressing real pages "
+        "(article list, the most commented article and its comments JSON) "
+        "at several gzip and Brotli levels."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--path",
+            action="append",
+            dest="paths",
+            help="Path to compress; repeat for several. Default: see above.",
+        )
+        parser.add_argument(
+            "--repeat", type=int, default=50, help="Compressions timed per setting."
+        )
+
+    def handle(self, *args, repeat, **options):
+        bodies = self.fetch(options["paths"] or self.default_paths())
+        self.stdout.write(
+            f"{'path':<46} {'encoding':<8} {'bytes':>9} {'ratio':>6} "
+            f"{'ms':>7} {'MB/s':>7}"
+        )
+        for path, body in bodies.items():
+            for encoding, level in SETTINGS:
+                if encoding not in compression.COMPRESSORS:
+                    continue
+                timings = []
+                for _ in range(repeat):
+                    started = time.perf_counter()
+                    compressed = compression.compress(body, encoding, level)
+                    timings.append(time.perf_counter() - started)
+                median = statistics.median(timings)
+                marker = "*" if level == MIDDLEWARE_LEVELS[encoding] else ""
+                self.stdout.write(
+                    f"{path[-46:]:<46} {f'{encoding}-{level}{marker}':<8} "
+                    f"{len(compressed):>9} {len(body) / len(compressed):>6.1f} "
+                    f"{median * 1000:>7.2f} {len(body) / median / 1e6:>7.1f}"
+                )
+        self.stdout.write("* level used by CompressionMiddleware")
+
+    def default_paths(self):
+        article = Article.objects.order_by("-comment_count").only("pk").first()
+        if article is None:
+            raise CommandError("No articles to render; run seed_newspaper first.")
+        return [
+            reverse("article_list"),
+            article.get_absolute_url(),
+            reverse("article_comments", args=[article.pk]),
+        ]
+
+    def fetch(self, paths):
+        """Render ``paths`` uncompressed as a throwaway logged-in user."""
+        bodies = {}
+        hosts = [*settings.ALLOWED_HOSTS, "testserver"]
+        # The replicas never see the uncommitted throwaway user.
+        local = override_settings(ALLOWED_HOSTS=hosts, DATABASE_REPLICAS=[])
+        with local, transaction.atomic():
+            user = get_user_model().objects.create_user(username="bench_compression")
+            client = Client()
+            client.force_login(user)
+            for path in paths:
+                response = client.get(path)
+                if response.status_code != 200:
+                    raise CommandError(f"{path} returned {response.status_code}")
+                bodies[path] = response.content
+            transaction.set_rollback(True)
+        return bodies
@@ -0,0 +1,231 @@
+import asyncio
+import contextlib
+import importlib.util
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import time
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.test import Client
+
+from articles.models import Article
+from newspaper_project.metrics import percentile
+
+SERVERS = {
+    # module to check for, command line; {port}, {workers} and {threads} are
+    # filled in per run.
+    "wsgi": (
+        "gunicorn",
+        "gunicorn newspaper_project.wsgi:application --bind 127.0.0.1:{port} "
+        "--workers {workers} --worker-class gthread --threads {threads}",
+    ),
+    "asgi": (
+        "uvicorn",
+        "uvicorn newspaper_project.asgi:application --host 127.0.0.1 "
+        "--port {port} --workers {workers} --no-access-log",
+    ),
+}
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+class LoadGenerator:
+    """
+    Keep ``concurrency`` keep-alive connections busy with GET requests for
+    ``duration`` seconds and record every response's latency.
+    """
+
+    def __init__(self, port, paths, cookie, concurrency, duration):
+        self.port = port
+        self.paths = paths
+        self.cookie = cookie
+        self.concurrency = concurrency
+        self.duration = duration
+        self.latencies = []
+        self.errors = 0
+
+    def run(self):
+        return asyncio.run(self.main())
+
+    async def main(self):
+        deadline = time.monotonic() + self.duration
+        await asyncio.gather(
+            *(self.client(index, deadline) for index in range(self.concurrency))
+        )
+
+    async def client(self, index, deadline):
+        connection = None
+        count = index
+        while time.monotonic() < deadline:
+            path = self.paths[count % len(self.paths)]
+            count += 1
+            started = time.perf_counter()
+            try:
+                if connection is None:
+                    connection = await asyncio.open_connection("127.0.0.1", self.port)
+                status, keep_alive = await self.fetch(*connection, path)
+            except (OSError, asyncio.IncompleteReadError, ValueError):
+                status, keep_alive = None, False
+            if status == 200:
+                self.latencies.append(time.perf_counter() - started)
+            else:
+                self.errors += 1
+            if not keep_alive and connection is not None:
+                connection[1].close()
+                connection = None
+        if connection is not None:
+            connection[1].close()
+
+    async def fetch(self, reader, writer, path):
+        writer.write(
+            f"GET {path} HTTP/1.1\r\nHost: 127.0.0.1:{self.port}\r\n"
+            f"Cookie: {self.cookie}\r\nConnection: keep-alive\r\n\r\n".encode()
+        )
+        await writer.drain()
+        head = await reader.readuntil(b"\r\n\r\n")
+        status_line, *lines = head.decode("latin-1").split("\r\n")
+        headers = {}
+        for line in lines:
+            if line:
+                name, _, value = line.partition(":")
+                headers[name.strip().lower()] = value.strip().lower()
+        if headers.get("transfer-encoding") == "chunked":
+            while size := int((await reader.readline()).split(b";")[0], 16):
+                await reader.readexactly(size + 2)
+            await reader.readline()
+        else:
+            await reader.readexactly(int(headers.get("content-length", 0)))
+        return int(status_line.split()[1]), headers.get("connection") != "close"
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare requests per second of the article read path under WSGI "
+        "(gunicorn, sync views) and ASGI (uvicorn, async views) by starting "
+        "each server locally and loading it with concurrent keep-alive clients."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--servers",
+            nargs="+",
+            choices=list(SERVERS),
+            default=list(SERVERS),
+            help="Servers to benchmark (default: all).",
+        )
+        parser.add_argument(
+            "--path",
+            action="append",
+            dest="paths",
+            help="Path to request; repeat for several. Default: the article "
+            "list and the newest article.",
+        )
+        parser.add_argument("--concurrency", type=int, default=50)
+        parser.add_argument(
+            "--duration", type=float, default=10, help="Seconds per server."
+        )
+        parser.add_argument("--workers", type=int, default=1)
+        parser.add_argument(
+            "--threads", type=int, default=4, help="Threads per WSGI worker."
+        )
+        parser.add_argument(
+            "--username",
+            default="bench",
+            help="User the requests are logged in as; created if missing.",
+        )
+
+    def handle(self, *args, servers, concurrency, duration, **options):
+        for name in servers:
+            module = SERVERS[name][0]
+            if importlib.util.find_spec(module) is None:
+                raise CommandError(
+                    f"{module} is not installed; run pip install -r requirements.txt"
+                )
+        paths = options["paths"] or self.default_paths()
+        cookie = self.login(options["username"])
+
+        self.stdout.write(
+            f"{'server':<6} {'requests':>9} {'req/s':>9} {'p50 ms':>8} "
+            f"{'p99 ms':>8} {'errors':>7}"
+        )
+        for name in servers:
+            port = free_port()
+            with self.serve(name, port, options["workers"], options["threads"]):
+                # Warm up connections, caches and lazy imports first.
+                LoadGenerator(port, paths, cookie, concurrency, 1).run()
+                load = LoadGenerator(port, paths, cookie, concurrency, duration)
+                load.run()
+            self.report(name, load, duration)
+
+    def default_paths(self):
+        paths = ["/articles/"]
+        article = Article.objects.only("pk").first()
+        if article is not None:
+            paths.append(article.get_absolute_url())
+        return paths
+
+    def login(self, username):
+        user, created = get_user_model().objects.get_or_create(username=username)
+        if created:
+            user.set_unusable_password()
+            user.save()
+        client = Client()
+        client.force_login(user)
+        session = client.cookies[settings.SESSION_COOKIE_NAME]
+        return f"{settings.SESSION_COOKIE_NAME}={session.value}"
+
+    @contextlib.contextmanager
+    def serve(self, name, port, workers, threads):
+        command = SERVERS[name][1].format(port=port, workers=workers, threads=threads)
+        env = {
+            **os.environ,
+            "ASYNC_VIEWS": "true" if name == "asgi" else "false",
+            "ALLOWED_HOSTS": "127.0.0.1",
+        }
+        process = subprocess.Popen(
+            [sys.executable, "-m", *command.split()],
+            env=env,
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
+        )
+        try:
+            deadline = time.monotonic() + 30
+            while True:
+                if process.poll() is not None:
+                    raise CommandError(f"{name} exited with {process.returncode}")
+                try:
+                    socket.create_connection(("127.0.0.1", port), timeout=1).close()
+                    break
+                except OSError:
+                    if time.monotonic() > deadline:
+                        raise CommandError(f"{name} did not start listening")
+                    time.sleep(0.2)
+            yield process
+        finally:
+            process.terminate()
+            try:
+                process.wait(timeout=10)
+            except subprocess.TimeoutExpired:
+                process.kill()
+
+    def report(self, name, load, duration):
+        latencies = sorted(load.latencies)
+        if not latencies:
+            self.stdout.write(
+                f"{name:<6} no successful requests ({load.errors} errors)"
+            )
+            return
+        self.stdout.write(
+            f"{name:<6} {len(latencies):>9} {len(latencies) / duration:>9.1f} "
+            f"{statistics.median(latencies) * 1000:>8.1f} "
+            f"{percentile(latencies, 99) * 1000:>8.1f} {load.errors:>7}"
+        )
@@ -0,0 +1,421 @@
+import csv
+import gzip
+import io
+import itertools
+import json
+import os
+import time
+import uuid
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS, connections, transaction
+from django.db.backends.postgresql.psycopg_any import is_psycopg3
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from articles.forms import ArticleForm, CommentForm
+from articles.models import Article, Comment, update_comment_counts
+from articles.search import index_articles
+from articles.syndication import ALL, forget_documents
+
+# Rows without an id get one derived from their content, so importing the same
+# file twice (or resuming after a crash) never creates duplicates.
+IMPORT_NAMESPACE = uuid.UUID("5b0f7a4e-8f43-4a4c-9a53-3f0d2f6c1e27")
+
+# Columns written by COPY. Everything else keeps its database default.
+ARTICLE_COLUMNS = [
+    "article_id",
+    "title",
+    "body",
+    "author_id",
+    "created_at",
+    "updated_at",
+    "comment_count",
+    "snippet",
+    "reading_time",
+    "body_html",
+    "body_html_version",
+    "version",
+]
+COMMENT_COLUMNS = ["comment_id", "article_id", "comment", "author_id", "created_at"]
+
+
+class RejectedRow(Exception):
+    def __init__(self, errors, data=None):
+        super().__init__(errors)
+        self.errors = errors
+        self.data = data
+
+
+def form_errors(form):
+    return {
+        field: [error["message"] for error in errors]
+        for field, errors in form.errors.get_json_data().items()
+    }
+
+
+class Command(BaseCommand):
+    help = (
+        "Bulk import articles and comments from NDJSON (as written by "
+        "export_newspaper; user records are ignored) or CSV. Rows are "
+        "validated with the article and comment forms; rejected rows go to a "
+        "side file. Progress is checkpointed after every batch so an "
+        "interrupted run can resume."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("path", help="File to import, optionally gzipped.")
+        parser.add_argument(
+            "--format",
+            choices=["ndjson", "csv"],
+            help="Input format (default: guessed from the file name).",
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=1000,
+            help="Rows inserted per transaction (default: 1000).",
+        )
+        parser.add_argument(
+            "--rejects",
+            help="Where to write rejected rows (default: PATH.rejects.ndjson).",
+        )
+        parser.add_argument(
+            "--checkpoint",
+            help="Progress file used to resume (default: PATH.checkpoint).",
+        )
+        parser.add_argument(
+            "--restart",
+            action="store_true",
+            help="Ignore an existing checkpoint and start from the first row.",
+        )
+        parser.add_argument(
+            "--no-copy",
+            action="store_true",
+            help="Insert with bulk_create even when PostgreSQL COPY is available.",
+        )
+
+    def handle(self, *args, path, batch_size, restart, **options):
+        if not os.path.exists(path):
+            raise CommandError(f"{path} does not exist.")
+        name = path.removesuffix(".gz")
+        fmt = options["format"] or ("csv" if name.endswith(".csv") else "ndjson")
+        rejects_path = options["rejects"] or f"{path}.rejects.ndjson"
+        checkpoint = options["checkpoint"] or f"{path}.checkpoint"
+
+        self.connection = connections[DEFAULT_DB_ALIAS]
+        self.use_copy = (
+            self.connection.vendor == "postgresql" and not options["no_copy"]
+        )
+        self.authors = {}
+        self.totals = dict.fromkeys(["articles", "comments", "present", "rejected"], 0)
+
+        position = resumed = 0 if restart else self.read_checkpoint(checkpoint)
+        if position:
+            self.stderr.write(f"Resuming after row {position}.")
+        started = time.monotonic()
+        with self.open(path) as source, open(
+            rejects_path, "a" if position else "w", encoding="utf-8"
+        ) as rejects:
+            rows = enumerate(self.read(source, fmt), start=1)
+            rows = itertools.islice(rows, position, None)
+            while batch := list(itertools.islice(rows, batch_size)):
+                rejected = self.import_batch(batch)
+                # Only record progress once the batch is committed.
+                for row in rejected:
+                    rejects.write(json.dumps(row) + "\n")
+                rejects.flush()
+                position = batch[-1][0]
+                self.write_checkpoint(checkpoint, position)
+        if os.path.exists(checkpoint):
+            os.remove(checkpoint)
+        # Bulk inserts send no signals to drop the cached feeds and sitemaps.
+        forget_documents([ALL])
+
+        elapsed = time.monotonic() - started
+        # Only the rows read by this run, not those skipped by a resume.
+        processed = position - resumed
+        rate = processed / elapsed if elapsed else processed
+        totals = self.totals
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Imported {totals['articles']} articles and {totals['comments']} "
+                f"comments in {elapsed:.2f}s ({rate:.0f} rows/s). "
+                f"Skipped {totals['present']} already present."
+            )
+        )
+        if totals["rejected"]:
+            self.stderr.write(f"Rejected {totals['rejected']} rows: see {rejects_path}")
+
+    def read_checkpoint(self, checkpoint):
+        try:
+            with open(checkpoint, encoding="utf-8") as stream:
+                return int(stream.read().strip() or 0)
+        except FileNotFoundError:
+            return 0
+        except ValueError:
+            raise CommandError(f"{checkpoint} is corrupt; rerun with --restart.")
+
+    def write_checkpoint(self, checkpoint, position):
+        # Replace atomically so a crash never leaves a half-written file.
+        with open(f"{checkpoint}.tmp", "w", encoding="utf-8") as stream:
+            stream.write(str(position))
+        os.replace(f"{checkpoint}.tmp", checkpoint)
+
+    def open(self, path):
+        if path.endswith(".gz"):
+            return gzip.open(path, "rt", encoding="utf-8", newline="")
+        return open(path, encoding="utf-8", newline="")
+
+    def read(self, source, fmt):
+        """
+        Yield one record per CSV row or NDJSON line (None for blank lines, so
+        rows are numbered by line), or a RejectedRow for malformed ones.
+        """
+        if fmt == "csv":
+            for row in csv.DictReader(source):
+                # DictReader files surplus values under the key None.
+                if None in row:
+                    extra = row.pop(None)
+                    yield RejectedRow(
+                        {"__all__": [f"{len(extra)} values more than columns."]},
+                        {**row, "extra": extra},
+                    )
+                else:
+                    yield row
+            return
+        for line in source:
+            if not line.strip():
+                yield None
+                continue
+            try:
+                record = json.loads(line)
+            except ValueError as error:
+                yield RejectedRow({"__all__": [f"Invalid JSON: {error}"]}, line)
+                continue
+            if isinstance(record, dict):
+                yield record
+            else:
+                yield RejectedRow({"__all__": ["Expected a JSON object."]}, record)
+
+    def kind(self, record):
+        """Tell articles from comments; CSV rows have no model column."""
+        model = record.get("model")
+        if model is None:
+            return "comment" if "comment" in record else "article"
+        return {"articles.article": "article", "articles.comment": "comment"}.get(model)
+
+    def resolve_authors(self, usernames):
+        missing = set(usernames) - self.authors.keys()
+        if missing:
+            # Remember unknown names too so they are only looked up once.
+            self.authors.update(dict.fromkeys(missing))
+            self.authors.update(
+                get_user_model()
+                .objects.filter(username__in=missing)
+                .values_list("username", "pk")
+            )
+
+    def import_batch(self, batch):
+        """Validate and insert one batch; return the rejected rows."""
+        rejected = [
+            {"row": number, "errors": record.errors, "data": record.data}
+            for number, record in batch
+            if isinstance(record, RejectedRow)
+        ]
+        batch = [(number, record) for number, record in batch if type(record) is dict]
+        self.resolve_authors(record.get("author") or "" for _, record in batch)
+        articles, comments, sources = {}, {}, {}
+        for number, record in batch:
+            kind = self.kind(record)
+            if kind is None:
+                continue
+            try:
+                if kind == "article":
+                    article = self.build_article(record)
+                    articles.setdefault(article.pk, article)
+                else:
+                    comment = self.build_comment(record)
+                    comments.setdefault(comment.pk, comment)
+                    sources.setdefault(comment.pk, (number, record))
+            except RejectedRow as error:
+                rejected.append({"row": number, "errors": error.errors, "data": record})
+
+        with transaction.atomic(using=self.connection.alias):
+            articles = self.missing(Article, articles)
+            self.insert_articles(articles)
+            known = {article.pk for article in articles} | set(
+                Article.objects.filter(
+                    pk__in={comment.article_id for comment in comments.values()}
+                ).values_list("pk", flat=True)
+            )
+            comments = self.missing(Comment, comments)
+            # Comments are unique per article and author; reject repeats up
+            # front rather than failing the whole batch on the constraint.
+            taken = set(
+                Comment.objects.filter(
+                    article_id__in={comment.article_id for comment in comments},
+                    author_id__in={comment.author_id for comment in comments},
+                ).values_list("article_id", "author_id")
+            )
+            accepted = []
+            for comment in comments:
+                pair = (comment.article_id, comment.author_id)
+                if comment.article_id not in known:
+                    errors = {"article_id": ["Unknown article."]}
+                elif pair in taken:
+                    errors = {"author": ["Already commented on this article."]}
+                else:
+                    taken.add(pair)
+                    accepted.append(comment)
+                    continue
+                number, record = sources[comment.pk]
+                rejected.append({"row": number, "errors": errors, "data": record})
+            comments = accepted
+            self.insert_comments(comments)
+
+        self.totals["articles"] += len(articles)
+        self.totals["comments"] += len(comments)
+        self.totals["rejected"] += len(rejected)
+        rejected.sort(key=lambda row: row["row"])
+        return rejected
+
+    def missing(self, model, objs):
+        """Drop the objects already in the database, e.g. after a resume."""
+        present = set(
+            model.objects.filter(pk__in=objs.keys()).values_list("pk", flat=True)
+        )
+        self.totals["present"] += len(present)
+        return [obj for pk, obj in objs.items() if pk not in present]
+
+    def build_article(self, record):
+        form = ArticleForm(data=record)
+        errors = {} if form.is_valid() else form_errors(form)
+        author_id = self.author(record, errors)
+        created_at = self.timestamp(record, "created_at", errors)
+        updated_at = self.timestamp(record, "updated_at", errors) or created_at
+        pk = self.primary_key(record, "article_id", errors)
+        if errors:
+            raise RejectedRow(errors)
+        article = form.instance
+        article.pk = pk
+        article.author_id = author_id
+        article.created_at = created_at
+        article.updated_at = max(updated_at, created_at)
+        article.summarize()
+        return article
+
+    def build_comment(self, record):
+        form = CommentForm(data=record)
+        errors = {} if form.is_valid() else form_errors(form)
+        author_id = self.author(record, errors)
+        article_id = self.uuid(record.get("article_id"), "article_id", errors)
+        if article_id is None and "article_id" not in errors:
+            errors["article_id"] = ["This field is required."]
+        created_at = self.timestamp(record, "created_at", errors)
+        pk = self.primary_key(record, "comment_id", errors)
+        if errors:
+            raise RejectedRow(errors)
+        comment = form.instance
+        comment.pk = pk
+        comment.created_at = created_at
+        comment.author_id = author_id
+        comment.article_id = article_id
+        return comment
+
+    def author(self, record, errors):
+        username = record.get("author") or ""
+        if self.authors.get(username) is None:
+            errors["author"] = [f"Unknown user {username!r}."]
+        return self.authors.get(username)
+
+    def timestamp(self, record, field, errors):
+        value = record.get(field)
+        if not value:
+            return timezone.now() if field == "created_at" else None
+        try:
+            stamp = parse_datetime(value)
+        except ValueError:
+            stamp = None
+        if stamp is None:
+            errors[field] = ["Enter a valid ISO 8601 date/time."]
+            return None
+        if timezone.is_naive(stamp):
+            stamp = timezone.make_aware(stamp)
+        return stamp
+
+    def uuid(self, value, field, errors):
+        if not value:
+            return None
+        try:
+            return uuid.UUID(str(value))
+        except ValueError:
+            errors[field] = ["Enter a valid UUID."]
+            return None
+
+    def primary_key(self, record, field, errors):
+        pk = self.uuid(record.get(field), field, errors)
+        if pk is None:
+            content = json.dumps(record, sort_keys=True, default=str)
+            pk = uuid.uuid5(IMPORT_NAMESPACE, content)
+        return pk
+
+    def insert_articles(self, articles):
+        if not articles:
+            return
+        if self.use_copy:
+            self.copy(Article, articles, ARTICLE_COLUMNS)
+            return
+        # bulk_create() stamps created_at/updated_at with the current time;
+        # put the imported ones back afterwards.
+        stamps = [(article.created_at, article.updated_at) for article in articles]
+        Article.objects.bulk_create(articles)
+        for article, (created_at, updated_at) in zip(articles, stamps):
+            article.created_at, article.updated_at = created_at, updated_at
+        Article.objects.bulk_update(articles, ["created_at", "updated_at"])
+        # Signals are not sent for bulk inserts.
+        index_articles(articles, self.connection.alias)
+
+    def insert_comments(self, comments):
+        if not comments:
+            return
+        if self.use_copy:
+            self.copy(Comment, comments, COMMENT_COLUMNS)
+            update_comment_counts(
+                [comment.article_id for comment in comments], 1, self.connection.alias
+            )
+            return
+        # Comment.objects.bulk_create() also bumps the articles' counters;
+        # restore the imported timestamps as for articles.
+        stamps = [comment.created_at for comment in comments]
+        Comment.objects.bulk_create(comments)
+        for comment, created_at in zip(comments, stamps):
+            comment.created_at = created_at
+        Comment.objects.bulk_update(comments, ["created_at"])
+
+    def copy(self, model, objs, columns):
+        """Stream ``objs`` into ``model``'s table with PostgreSQL COPY."""
+        fields = [model._meta.get_field(column) for column in columns]
+        quote_name = self.connection.ops.quote_name
+        sql = "COPY %s (%s) FROM STDIN" % (
+            quote_name(model._meta.db_table),
+            ", ".join(quote_name(field.column) for field in fields),
+        )
+        rows = (
+            [
+                field.get_db_prep_save(getattr(obj, field.attname), self.connection)
+                for field in fields
+            ]
+            for obj in objs
+        )
+        with self.connection.cursor() as cursor:
+            if is_psycopg3:
+                with cursor.copy(sql) as copy:
+                    for row in rows:
+                        copy.write_row(row)
+            else:
+                buffer = io.StringIO()
+                csv.writer(buffer, quoting=csv.QUOTE_ALL).writerows(rows)
+                buffer.seek(0)
+                cursor.copy_expert(f"{sql} WITH (FORMAT csv)", buffer)
@@ -0,0 +1,34 @@
+from django.core.management.base import BaseCommand
+
+from articles.models import Article, recount_comments
+from newspaper_project.admin import in_batches
+
+
+class Command(BaseCommand):
+    help = "Repair drift in Article.comment_count by recounting comments in batches."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=1000,
+            help="Number of articles checked per transaction (default: 1000).",
+        )
+        parser.add_argument(
+            "--dry-run",
+            action="store_true",
+            help="Report drifted articles without fixing them.",
+        )
+
+    def handle(self, *args, batch_size, dry_run, **options):
+        checked = drifted = 0
+        for pks in in_batches(Article.objects.all(), batch_size):
+            checked += len(pks)
+            drifted += len(recount_comments(pks, dry_run))
+
+        verb = "Found" if dry_run else "Repaired"
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Checked {checked} articles. {verb} {drifted} with drifted counts."
+            )
+        )
@@ -0,0 +1,33 @@
+from django.core.management.base import BaseCommand
+
+from articles.models import BODY_RENDERER_VERSION, Article, rerender_bodies
+from newspaper_project.admin import in_batches
+
+
+class Command(BaseCommand):
+    help = (
+        "Re-render the stored body HTML of articles rendered by an older "
+        "renderer version, in batches."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=500,
+            help="Number of articles re-rendered per transaction (default: 500).",
+        )
+
+    def handle(self, *args, batch_size, **options):
+        stale = Article.objects.exclude(body_html_version=BODY_RENDERER_VERSION)
+        rendered = 0
+        for pks in in_batches(stale, batch_size):
+            rendered += rerender_bodies(pks)
+            self.stdout.write(f"Re-rendered {rendered} articles...")
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Re-rendered {rendered} articles "
+                f"(renderer version {BODY_RENDERER_VERSION})."
+            )
+        )
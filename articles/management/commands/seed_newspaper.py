@@ -0,0 +1,212 @@
+import datetime
+import math
+import random
+import time
+import uuid
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.utils import timezone
+
+from articles.models import Article, Comment
+from articles.search import index_articles
+from articles.syndication import ALL, forget_documents
+
+WORDS = (
+    "lorem ipsum dolor sit amet consectetur adipiscing elit sed do eiusmod "
+    "tempor incididunt ut labore et dolore magna aliqua enim ad minim veniam "
+    "quis nostrud exercitation ullamco laboris nisi aliquip ex ea commodo "
+    "consequat duis aute irure in reprehenderit voluptate velit esse cillum "
+    "fugiat nulla pariatur excepteur sint occaecat cupidatat non proident sunt "
+    "culpa qui officia deserunt mollit anim id est laborum council election "
+    "market weather report city school budget minister court river season "
+    "match festival hospital station harbour police research village"
+).split()
+
+
+class Command(BaseCommand):
+    help = (
+        "Fill the database with synthetic users, articles and comments for "
+        "local load testing. The same --seed always produces the same data."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--users", type=int, default=1000)
+        parser.add_argument("--articles", type=int, default=5000)
+        parser.add_argument(
+            "--comments",
+            type=int,
+            default=50000,
+            help="Total comments. Most go to a few popular articles "
+            "(Pareto-distributed), as in production.",
+        )
+        parser.add_argument("--seed", type=int, default=42)
+        parser.add_argument(
+            "--days",
+            type=int,
+            default=365,
+            help="Spread article dates over this many past days.",
+        )
+        parser.add_argument("--batch-size", type=int, default=1000)
+        parser.add_argument(
+            "--password",
+            default="seedpassword",
+            help="Password of every generated user (default: seedpassword).",
+        )
+        parser.add_argument(
+            "--prefix",
+            default="seed",
+            help="Username prefix of the generated users (default: seed).",
+        )
+        parser.add_argument(
+            "--replace",
+            action="store_true",
+            help="Delete users with the prefix, and their content, first.",
+        )
+
+    def handle(self, *args, prefix, batch_size, **options):
+        self.random = random.Random(options["seed"])
+        self.batch_size = batch_size
+        self.now = timezone.now()
+        User = get_user_model()
+
+        existing = User.objects.filter(username__startswith=f"{prefix}_")
+        if existing.exists():
+            if not options["replace"]:
+                raise CommandError(
+                    f"Users named {prefix}_* already exist; pass --replace or "
+                    "choose another --prefix."
+                )
+            existing.delete()
+
+        started = time.monotonic()
+        with transaction.atomic():
+            users = self.create_users(prefix, options["users"], options["password"])
+            articles = self.create_articles(users, options["articles"], options["days"])
+            comments = self.create_comments(users, articles, options["comments"])
+        # bulk_create() sends no signals to drop the cached feeds and sitemaps.
+        forget_documents([ALL])
+        elapsed = time.monotonic() - started
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Seeded {len(users)} users, {len(articles)} articles and "
+                f"{comments} comments in {elapsed:.1f}s."
+            )
+        )
+
+    def uuid(self):
+        return uuid.UUID(int=self.random.getrandbits(128), version=4)
+
+    def words(self, count):
+        return " ".join(self.random.choices(WORDS, k=count))
+
+    def create_users(self, prefix, count, password):
+        User = get_user_model()
+        # Hash once: every user shares the password.
+        hashed = make_password(password)
+        users = [
+            User(
+                user_id=self.uuid(),
+                username=f"{prefix}_{index:06}",
+                email=f"{prefix}_{index:06}@example.com",
+                first_name=self.random.choice(WORDS).title(),
+                last_name=self.random.choice(WORDS).title(),
+                password=hashed,
+                date_of_birth=datetime.date(1950, 1, 1)
+                + datetime.timedelta(days=self.random.randrange(50 * 365)),
+            )
+            for index in range(count)
+        ]
+        for user in users:
+            user.set_birthday_fields()  # save() is skipped by bulk_create().
+        User.objects.bulk_create(users, batch_size=self.batch_size)
+        self.stdout.write(f"Created {count} users.")
+        return users
+
+    def body(self):
+        # News stories: a log-normal length around 600 words, in paragraphs.
+        words = max(50, int(self.random.lognormvariate(math.log(600), 0.5)))
+        paragraphs = []
+        while words > 0:
+            size = min(words, self.random.randint(40, 120))
+            paragraphs.append(self.words(size).capitalize() + ".")
+            words -= size
+        return "\n\n".join(paragraphs)
+
+    def create_articles(self, users, count, days):
+        articles = []
+        for start in range(0, count, self.batch_size):
+            batch = []
+            for _ in range(min(self.batch_size, count - start)):
+                created_at = self.now - datetime.timedelta(
+                    seconds=self.random.randrange(days * 24 * 3600)
+                )
+                article = Article(
+                    article_id=self.uuid(),
+                    title=self.words(self.random.randint(4, 10)).capitalize(),
+                    body=self.body(),
+                    author=self.random.choice(users),
+                )
+                article.summarize()
+                batch.append((article, created_at))
+            self.insert_articles(batch)
+            articles.extend(article for article, _ in batch)
+            self.stdout.write(f"Created {len(articles)}/{count} articles.")
+        return articles
+
+    def insert_articles(self, batch):
+        Article.objects.bulk_create([article for article, _ in batch])
+        # bulk_create() stamps created_at/updated_at with the current time.
+        for article, created_at in batch:
+            article.created_at = article.updated_at = created_at
+        Article.objects.bulk_update(
+            [article for article, _ in batch], ["created_at", "updated_at"]
+        )
+        index_articles([article for article, _ in batch], Article.objects.db)
+
+    def create_comments(self, users, articles, count):
+        if not articles or len(users) < 2:
+            return 0
+        # Heavy-tailed popularity: a few articles draw most of the comments.
+        weights = [self.random.paretovariate(1.2) for _ in articles]
+        per_article = [0] * len(articles)
+        for index in self.random.choices(range(len(articles)), weights, k=count):
+            per_article[index] += 1
+
+        created = 0
+        batch = []
+        for article, wanted in zip(articles, per_article):
+            # One comment per reader per article, never by the author.
+            readers = self.random.sample(users, min(wanted + 1, len(users)))
+            readers = [user for user in readers if user.pk != article.author_id]
+            for reader in readers[:wanted]:
+                age = (self.now - article.created_at).total_seconds()
+                batch.append(
+                    Comment(
+                        comment_id=self.uuid(),
+                        article=article,
+                        author=reader,
+                        comment=self.words(self.random.randint(3, 30)).capitalize(),
+                        created_at=article.created_at
+                        + datetime.timedelta(seconds=self.random.random() * age),
+                    )
+                )
+                if len(batch) >= self.batch_size:
+                    created += self.insert_comments(batch)
+                    batch = []
+        created += self.insert_comments(batch)
+        self.stdout.write(f"Created {created} comments.")
+        return created
+
+    def insert_comments(self, batch):
+        if not batch:
+            return 0
+        stamps = [comment.created_at for comment in batch]
+        # Comment.objects.bulk_create() also bumps the articles' counters.
+        Comment.objects.bulk_create(batch)
+        for comment, created_at in zip(batch, stamps):
+            comment.created_at = created_at
+        Comment.objects.bulk_update(batch, ["created_at"])
+        return len(batch)
@@ -0,0 +1,25 @@
+# Generated by Django 5.2.7 on 2026-10-18 01:06
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("articles", "0002_alter_article_options_comment"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AlterModelOptions(
+            name="article",
+            options={"ordering": ("-created_at", "-article_id")},
+        ),
+        migrations.AddIndex(
+            model_name="article",
+            index=models.Index(
+                fields=["-created_at", "-article_id"], name="article_created_id_idx"
+            ),
+        ),
+    ]
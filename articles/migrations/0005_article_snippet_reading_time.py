@@ -0,0 +1,27 @@
+# Generated by Django 5.2.7 on 2026-10-18 01:11
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("articles", "0004_article_comment_count"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="article",
+            name="reading_time",
+            field=models.PositiveSmallIntegerField(
+                default=1,
+                editable=False,
+                help_text="Estimated reading time in minutes.",
+            ),
+        ),
+        migrations.AddField(
+            model_name="article",
+            name="snippet",
+            field=models.CharField(default="", editable=False, max_length=255),
+        ),
+    ]
@@ -0,0 +1,45 @@
+import math
+
+from django.db import migrations, transaction
+
+BATCH_SIZE = 500
+
+
+def summarize(article):
+    # Frozen copy of Article.summarize() as it stood when this migration
+    # was written.
+    snippet = " ".join(article.body.split(maxsplit=5)[:5])
+    article.snippet = snippet[:252] + "..."
+    article.reading_time = max(1, math.ceil(len(article.body.split()) / 200))
+
+
+def backfill_snippets(apps, schema_editor):
+    Article = apps.get_model("articles", "Article")
+    articles = Article.objects.using(schema_editor.connection.alias)
+    last_pk = None
+    while True:
+        batch = articles.only("pk", "body").order_by("pk")
+        if last_pk is not None:
+            batch = batch.filter(pk__gt=last_pk)
+        batch = list(batch[:BATCH_SIZE])
+        if not batch:
+            break
+        last_pk = batch[-1].pk
+        for article in batch:
+            summarize(article)
+        with transaction.atomic(using=schema_editor.connection.alias):
+            articles.bulk_update(batch, ["snippet", "reading_time"])
+
+
+class Migration(migrations.Migration):
+    # Each batch commits on its own so large tables are not held in one
+    # long-running transaction.
+    atomic = False
+
+    dependencies = [
+        ("articles", "0005_article_snippet_reading_time"),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_snippets, migrations.RunPython.noop),
+    ]
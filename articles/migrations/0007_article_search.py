@@ -0,0 +1,59 @@
+from django.db import migrations
+
+POSTGRESQL_FORWARD = [
+    """
+    ALTER TABLE "articles_article" ADD COLUMN "search_vector" tsvector
+    GENERATED ALWAYS AS (
+        setweight(to_tsvector('english', coalesce("title", '')), 'A')
+        || setweight(to_tsvector('english', coalesce("body", '')), 'B')
+    ) STORED
+    """,
+    """
+    CREATE INDEX "article_search_vector_idx"
+    ON "articles_article" USING gin ("search_vector")
+    """,
+]
+POSTGRESQL_BACKWARD = [
+    'ALTER TABLE "articles_article" DROP COLUMN "search_vector"',
+]
+
+SQLITE_FORWARD = [
+    """
+    CREATE VIRTUAL TABLE "articles_article_fts" USING fts5(
+        "article_id" UNINDEXED, "title", "body", tokenize = 'porter unicode61'
+    )
+    """,
+    """
+    INSERT INTO "articles_article_fts" ("article_id", "title", "body")
+    SELECT "article_id", "title", "body" FROM "articles_article"
+    """,
+]
+SQLITE_BACKWARD = [
+    'DROP TABLE "articles_article_fts"',
+]
+
+
+def run(statements):
+    def operation(apps, schema_editor):
+        for sql in statements.get(schema_editor.connection.vendor, []):
+            schema_editor.execute(sql)
+
+    return operation
+
+
+class Migration(migrations.Migration):
+    """
+    Create the search index outside of the model state: a generated tsvector
+    column with a GIN index on PostgreSQL, an FTS5 table on SQLite.
+    """
+
+    dependencies = [
+        ("articles", "0006_backfill_article_snippet"),
+    ]
+
+    operations = [
+        migrations.RunPython(
+            run({"postgresql": POSTGRESQL_FORWARD, "sqlite": SQLITE_FORWARD}),
+            run({"postgresql": POSTGRESQL_BACKWARD, "sqlite": SQLITE_BACKWARD}),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.7 on 2026-10-18 01:14
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("articles", "0007_article_search"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="article",
+            name="comments_updated_at",
+            field=models.DateTimeField(editable=False, null=True),
+        ),
+    ]
@@ -0,0 +1,54 @@
+# Generated by Django 5.2.7 on 2026-10-18 01:24
+
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def remove_duplicate_comments(apps, schema_editor):
+    """Keep one comment per author per article so the constraint can be added."""
+    Article = apps.get_model("articles", "Article")
+    Comment = apps.get_model("articles", "Comment")
+    duplicates = (
+        Comment.objects.order_by()
+        .values("article", "author")
+        .annotate(total=Count("pk"))
+        .filter(total__gt=1)
+    )
+    articles = set()
+    for pair in duplicates.iterator():
+        pks = Comment.objects.filter(
+            article=pair["article"], author=pair["author"]
+        ).values_list("pk", flat=True)
+        Comment.objects.filter(pk__in=list(pks.order_by("pk")[1:])).delete()
+        articles.add(pair["article"])
+    if articles:
+        counts = (
+            Comment.objects.filter(article=OuterRef("pk"))
+            .order_by()
+            .values("article")
+            .annotate(total=Count("pk"))
+            .values("total")
+        )
+        Article.objects.filter(pk__in=articles).update(
+            comment_count=Coalesce(Subquery(counts), 0)
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("articles", "0008_article_comments_updated_at"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RunPython(remove_duplicate_comments, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name="comment",
+            constraint=models.UniqueConstraint(
+                fields=("article", "author"), name="comment_one_per_author"
+            ),
+        ),
+    ]
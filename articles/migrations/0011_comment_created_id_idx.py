@@ -0,0 +1,21 @@
+# Generated by Django 5.2.7 on 2026-10-18 01:49
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("articles", "0010_comment_created_at"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="comment",
+            index=models.Index(
+                fields=["-created_at", "-comment_id"], name="comment_created_id_idx"
+            ),
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.2.7 on 2026-10-18 02:06
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("articles", "0011_comment_created_id_idx"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="article",
+            name="body_html",
+            field=models.TextField(default="", editable=False),
+        ),
+        migrations.AddField(
+            model_name="article",
+            name="body_html_version",
+            field=models.PositiveSmallIntegerField(default=0, editable=False),
+        ),
+    ]
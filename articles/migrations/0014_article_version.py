@@ -0,0 +1,18 @@
+# Generated by Django 5.2.7 on 2026-10-18 02:19
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("articles", "0013_article_author_created_idx"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="article",
+            name="version",
+            field=models.PositiveIntegerField(default=1, editable=False),
+        ),
+    ]
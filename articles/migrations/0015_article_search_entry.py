@@ -0,0 +1,37 @@
+# Generated by Django 5.2.7 on 2026-10-18 02:36
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("articles", "0014_article_version"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="ArticleSearchEntry",
+            fields=[
+                (
+                    "article",
+                    models.OneToOneField(
+                        db_column="article_id",
+                        db_constraint=False,
+                        on_delete=django.db.models.deletion.DO_NOTHING,
+                        primary_key=True,
+                        related_name="search_entry",
+                        serialize=False,
+                        to="articles.article",
+                    ),
+                ),
+                ("title", models.TextField()),
+                ("body", models.TextField()),
+            ],
+            options={
+                "db_table": "articles_article_fts",
+                "managed": False,
+            },
+        ),
+    ]
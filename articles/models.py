@@ -1,12 +1,48 @@
+import math
 import uuid
+from collections import Counter, defaultdict
 
-from django.db import models
+from django.db import models, router, transaction
+from django.db.models import Count, F, OuterRef, Subquery
+from django.db.models.functions import Coalesce, Greatest
 from django.conf import settings
 from django.urls import reverse
+from django.utils import timezone
+from django.utils.html import linebreaks
+from django.utils.safestring import mark_safe
+
+
+SNIPPET_WORDS = 5
+WORDS_PER_MINUTE = 200
+# Bump whenever render_body() changes its output; render_articles then
+# re-renders the stored HTML, which is ignored until it has.
+BODY_RENDERER_VERSION = 1
+
+
+def build_snippet(body, words=SNIPPET_WORDS):
+    """Get the first few words of ``body`` with trailing ellipses."""
+    snippet = " ".join(body.split(maxsplit=words)[:words])
+    return snippet[: Article.SNIPPET_MAX_LENGTH - 3] + "..."
+
+
+def estimate_reading_time(body):
+    """Estimate how many minutes it takes to read ``body``."""
+    return max(1, math.ceil(len(body.split()) / WORDS_PER_MINUTE))
+
+
+def render_body(body):
+    """Render ``body`` as escaped HTML paragraphs, as shown on the detail page."""
+    return linebreaks(body, autoescape=True)
 
 
 # Create your models here.
 class Article(models.Model):
+    SNIPPET_MAX_LENGTH = 255
+    # Fields summarize() derives from the body.
+    DERIVED_FIELDS = ("snippet", "reading_time", "body_html", "body_html_version")
+    # Fields only written by update_comment_counts() and recount_comments().
+    COUNTER_FIELDS = ("comment_count", "comments_updated_at")
+
     article_id = models.UUIDField(
         primary_key=True, unique=True, default=uuid.uuid4, editable=False
     )
@@ -15,9 +51,35 @@ class Article(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     author = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE)
+    # Maintained by the Comment signal handlers; see recount_comments.
+    comment_count = models.PositiveIntegerField(default=0, editable=False)
+    comments_updated_at = models.DateTimeField(null=True, editable=False)
+    # Derived from body on save so list pages never need to load it.
+    snippet = models.CharField(
+        max_length=SNIPPET_MAX_LENGTH, default="", editable=False
+    )
+    reading_time = models.PositiveSmallIntegerField(
+        default=1, editable=False, help_text="Estimated reading time in minutes."
+    )
+    # Rendered from body on save so the detail page never renders it.
+    body_html = models.TextField(default="", editable=False)
+    body_html_version = models.PositiveSmallIntegerField(default=0, editable=False)
+    # Bumped whenever the title or body is saved; edit forms carry the version
+    # they started from so stale submissions can be refused.
+    version = models.PositiveIntegerField(default=1, editable=False)
 
     class Meta:
-        ordering = ("-created_at",)
+        ordering = ("-created_at", "-article_id")
+        indexes = [
+            # Backs the keyset pagination of the article list.
+            models.Index(
+                fields=["-created_at", "-article_id"], name="article_created_id_idx"
+            ),
+            # Backs the per-author feeds.
+            models.Index(
+                fields=["author", "-created_at"], name="article_author_created_idx"
+            ),
+        ]
 
     def __str__(self):
         return self.title.title()
@@ -26,11 +88,145 @@ class Article(models.Model):
         return reverse("article_detail", kwargs={"pk": self.pk})
 
     @property
-    def snippet(self):
-        """Get the first five words and display them with trailing eplipses"""
-        words = self.body.split()
-        snippet = " ".join(words[:5])
-        return snippet + "..."
+    def cache_version(self):
+        """Changes whenever the article is edited or gains or loses a comment."""
+        commented = self.comments_updated_at
+        return "%s-%s" % (
+            self.updated_at.timestamp(),
+            commented.timestamp() if commented else 0,
+        )
+
+    def save(self, *args, **kwargs):
+        if not self._state.adding and kwargs.get("update_fields") is None:
+            # The counters in memory may be older than the row's, which
+            # comments update in place; a full save must not roll them back.
+            deferred = self.get_deferred_fields()
+            kwargs["update_fields"] = [
+                field.name
+                for field in self._meta.concrete_fields
+                if not field.primary_key
+                and field.attname not in deferred
+                and field.name not in self.COUNTER_FIELDS
+            ]
+        update_fields = kwargs.get("update_fields")
+        if "body" not in self.get_deferred_fields():
+            self.summarize()
+            if update_fields is not None and "body" in update_fields:
+                update_fields = kwargs["update_fields"] = {
+                    *update_fields,
+                    *self.DERIVED_FIELDS,
+                }
+        if not self._state.adding and (
+            update_fields is None or {"title", "body"} & set(update_fields)
+        ):
+            self.version += 1
+            if update_fields is not None:
+                kwargs["update_fields"] = {*update_fields, "version"}
+        super().save(*args, **kwargs)
+
+    def summarize(self):
+        """Refresh the fields derived from the body. Called by save()."""
+        self.snippet = build_snippet(self.body)
+        self.reading_time = estimate_reading_time(self.body)
+        self.body_html = render_body(self.body)
+        self.body_html_version = BODY_RENDERER_VERSION
+
+    @property
+    def rendered_body(self):
+        """The body's HTML: stored if current, else rendered on the fly."""
+        if self.body_html_version == BODY_RENDERER_VERSION:
+            return mark_safe(self.body_html)
+        return render_body(self.body)
+
+
+def rerender_bodies(article_ids):
+    """
+    Re-render the stored body HTML of the articles in ``article_ids`` that
+    were rendered by another renderer version, and return how many were.
+    """
+    with transaction.atomic():
+        articles = list(
+            Article.objects.filter(pk__in=article_ids)
+            .exclude(body_html_version=BODY_RENDERER_VERSION)
+            .select_for_update()
+            .only("pk", "body")
+        )
+        for article in articles:
+            article.body_html = render_body(article.body)
+            article.body_html_version = BODY_RENDERER_VERSION
+        Article.objects.bulk_update(articles, ["body_html", "body_html_version"])
+    return len(articles)
+
+
+def update_comment_counts(article_ids, delta, using=None):
+    """
+    Add ``delta`` to the stored comment count of every article in
+    ``article_ids`` once per occurrence, using a single UPDATE per distinct
+    amount so the change is applied atomically by the database.
+    """
+    amounts = defaultdict(list)
+    for article_id, occurrences in Counter(article_ids).items():
+        amounts[occurrences * delta].append(article_id)
+    articles = Article.objects.db_manager(using)
+    now = timezone.now()
+    for amount, pks in amounts.items():
+        articles.filter(pk__in=pks).update(
+            comment_count=Greatest(F("comment_count") + amount, 0),
+            comments_updated_at=now,
+        )
+
+
+def recount_comments(article_ids, dry_run=False):
+    """
+    Fix the stored comment count of the articles in ``article_ids`` that
+    drifted from their actual number of comments, and return their pks.
+    """
+    counts = (
+        Comment.objects.filter(article=OuterRef("pk"))
+        .order_by()
+        .values("article")
+        .annotate(total=Count("pk"))
+        .values("total")
+    )
+    with transaction.atomic():
+        stale = list(
+            Article.objects.filter(pk__in=article_ids)
+            .annotate(actual=Count("comment"))
+            .exclude(comment_count=F("actual"))
+            .values_list("pk", flat=True)
+        )
+        if stale and not dry_run:
+            # Recount inside the UPDATE so comments written since the check
+            # above are not lost.
+            Article.objects.filter(pk__in=stale).update(
+                comment_count=Coalesce(Subquery(counts), 0)
+            )
+    return stale
+
+
+class CommentQuerySet(models.QuerySet):
+    def bulk_create(self, objs, *args, **kwargs):
+        """
+        Create the comments and bump their articles' counters in the same
+        transaction. The counters cannot be kept exact when conflicts are
+        ignored; run recount_comments after such imports.
+        """
+        with transaction.atomic(using=self.db):
+            objs = super().bulk_create(objs, *args, **kwargs)
+            update_comment_counts([obj.article_id for obj in objs], 1, self.db)
+        return objs
+
+    def delete(self):
+        """
+        Delete the comments and drop them from their articles' counters in
+        the same transaction. Comments have no delete signals, so Django
+        deletes them with a single query.
+        """
+        with transaction.atomic(using=self.db):
+            article_ids = list(self.values_list("article_id", flat=True))
+            deleted = super().delete()
+            update_comment_counts(article_ids, -1, self.db)
+        return deleted
 
 
 class Comment(models.Model):
@@ -43,9 +239,68 @@ class Comment(models.Model):
         settings.AUTH_USER_MODEL,
         on_delete=models.CASCADE,
     )
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    objects = CommentQuerySet.as_manager()
+
+    class Meta:
+        ordering = ("created_at", "comment_id")
+        indexes = [
+            # Backs the keyset pagination of an article's comments.
+            models.Index(
+                fields=["article", "created_at", "comment_id"],
+                name="comment_article_created_idx",
+            ),
+            # Newest first across all articles, as listed in the admin.
+            models.Index(
+                fields=["-created_at", "-comment_id"], name="comment_created_id_idx"
+            ),
+        ]
+        constraints = [
+            # One comment per reader per article, enforced by the database so
+            # concurrent submissions cannot both get through.
+            models.UniqueConstraint(
+                fields=["article", "author"], name="comment_one_per_author"
+            ),
+        ]
 
     def __str__(self):
         return self.comment
 
+    def save(self, *args, **kwargs):
+        # Keep the insert and the article's counter update in one transaction.
+        using = kwargs.get("using") or router.db_for_write(Comment, instance=self)
+        with transaction.atomic(using=using):
+            super().save(*args, **kwargs)
+
+    def delete(self, *args, **kwargs):
+        using = kwargs.get("using") or router.db_for_write(Comment, instance=self)
+        with transaction.atomic(using=using):
+            deleted = super().delete(*args, **kwargs)
+            update_comment_counts([self.article_id], -1, using)
+        return deleted
+
     def get_absolute_url(self):
         return reverse("comment_detail", kwargs={"pk": self.comment_id})
+
+
+class ArticleSearchEntry(models.Model):
+    """
+    An article's row in the SQLite FTS5 search table, so searches can join to
+    it. The table only exists on SQLite and is kept by articles.search.
+    """
+
+    article = models.OneToOneField(
+        Article,
+        primary_key=True,
+        on_delete=models.DO_NOTHING,
+        db_column="article_id",
+        db_constraint=False,
+        related_name="search_entry",
+    )
+    title = models.TextField()
+    body = models.TextField()
+
+    class Meta:
+        managed = False
+        db_table = "articles_article_fts"
@@ -0,0 +1,177 @@
+import base64
+import binascii
+import datetime
+import json
+
+from django.core.exceptions import ValidationError
+from django.core.paginator import InvalidPage
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import Q
+
+
+class InvalidCursor(InvalidPage):
+    pass
+
+
+class CursorEncoder(DjangoJSONEncoder):
+    """Like DjangoJSONEncoder, but keeps microseconds so cursors are exact."""
+
+    def default(self, o):
+        if isinstance(o, datetime.datetime):
+            return o.isoformat()
+        return super().default(o)
+
+
+class CursorPage:
+    """A single page of results produced by :class:`CursorPaginator`."""
+
+    def __init__(self, object_list, next_cursor=None, previous_cursor=None):
+        self.object_list = object_list
+        self.next_cursor = next_cursor
+        self.previous_cursor = previous_cursor
+
+    def __repr__(self):
+        return "<CursorPage of %d objects>" % len(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __getitem__(self, index):
+        return self.object_list[index]
+
+    def has_next(self):
+        return self.next_cursor is not None
+
+    def has_previous(self):
+        return self.previous_cursor is not None
+
+    def has_other_pages(self):
+        return self.has_next() or self.has_previous()
+
+
+class CursorPaginator:
+    """
+    Keyset pagination over a queryset with a total, indexed ordering.
+
+    Instead of ``OFFSET`` each page is located by the ordering values of the
+    row on its edge, so fetching page N costs the same as fetching page 1.
+    The last field in ``ordering`` must be unique (usually the primary key) to
+    break ties between rows sharing the leading values.
+    """
+
+    NEXT = "n"
+    PREVIOUS = "p"
+
+    def __init__(self, queryset, per_page, ordering):
+        self.queryset = queryset
+        self.per_page = int(per_page)
+        self.ordering = [
+            (field.lstrip("-"), field.startswith("-")) for field in ordering
+        ]
+
+    def encode_cursor(self, obj, direction):
+        # Rows from values() are dicts.
+        if isinstance(obj, dict):
+            values = [obj[name] for name, _ in self.ordering]
+        else:
+            values = [getattr(obj, name) for name, _ in self.ordering]
+        payload = json.dumps([direction, values], cls=CursorEncoder)
+        return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+    def decode_cursor(self, cursor):
+        try:
+            padded = cursor + "=" * (-len(cursor) % 4)
+            direction, values = json.loads(base64.urlsafe_b64decode(padded))
+        except (binascii.Error, UnicodeDecodeError, TypeError, ValueError):
+            raise InvalidCursor("That cursor is not valid")
+        if (
+            direction not in (self.NEXT, self.PREVIOUS)
+            or not isinstance(values, list)
+            or len(values) != len(self.ordering)
+            or None in values
+        ):
+            raise InvalidCursor("That cursor is not valid")
+        # A cursor of another page (the list's on the search page) or a forged
+        # one must not reach the query with values of the wrong types.
+        try:
+            values = [
+                self._output_field(name).to_python(value)
+                for (name, _), value in zip(self.ordering, values)
+            ]
+        except (ValidationError, TypeError, ValueError):
+            raise InvalidCursor("That cursor is not valid")
+        return direction, values
+
+    def _output_field(self, name):
+        annotation = self.queryset.query.annotations.get(name)
+        if annotation is not None:
+            return annotation.output_field
+        return self.queryset.model._meta.get_field(name)
+
+    def _order_by(self, reverse=False):
+        return [
+            ("-" if descending != reverse else "") + name
+            for name, descending in self.ordering
+        ]
+
+    def _seek(self, values, reverse=False):
+        """
+        Build the filter selecting rows strictly after ``values`` in the
+        pagination order (or strictly before them when ``reverse`` is set).
+
+        The leading field gets an inclusive range condition of its own so the
+        database can use it as an index bound rather than only a filter.
+        """
+        condition = Q()
+        for position, (name, descending) in enumerate(self.ordering):
+            lookup = "lt" if descending != reverse else "gt"
+            term = Q(**{f"{name}__{lookup}": values[position]})
+            for index, (previous, _) in enumerate(self.ordering[:position]):
+                term &= Q(**{previous: values[index]})
+            condition |= term
+        leading, descending = self.ordering[0]
+        lookup = "lte" if descending != reverse else "gte"
+        return Q(**{f"{leading}__{lookup}": values[0]}) & condition
+
+    def _query(self, cursor):
+        if not cursor:
+            return None, self.queryset.order_by(*self._order_by())
+        direction, values = self.decode_cursor(cursor)
+        reverse = direction == self.PREVIOUS
+        try:
+            queryset = self.queryset.filter(self._seek(values, reverse))
+        except ValidationError:
+            raise InvalidCursor("That cursor is not valid")
+        return direction, queryset.order_by(*self._order_by(reverse))
+
+    def _build_page(self, direction, rows):
+        has_more = len(rows) > self.per_page
+        rows = rows[: self.per_page]
+        if direction == self.PREVIOUS:
+            rows.reverse()
+            has_next, has_previous = True, has_more
+        else:
+            has_next, has_previous = has_more, direction is not None
+        if not rows:
+            return CursorPage(rows)
+        return CursorPage(
+            rows,
+            next_cursor=self.encode_cursor(rows[-1], self.NEXT) if has_next else None,
+            previous_cursor=(
+                self.encode_cursor(rows[0], self.PREVIOUS) if has_previous else None
+            ),
+        )
+
+    def page(self, cursor=None):
+        """Return the page located by ``cursor`` (the first page if empty)."""
+        direction, queryset = self._query(cursor)
+        return self._build_page(direction, list(queryset[: self.per_page + 1]))
+
+    async def apage(self, cursor=None):
+        """Async version of :meth:`page`."""
+        direction, queryset = self._query(cursor)
+        rows = [obj async for obj in queryset[: self.per_page + 1]]
+        return self._build_page(direction, rows)
@@ -0,0 +1,143 @@
+"""
+Full-text search over article titles and bodies.
+
+On PostgreSQL the ``articles_article.search_vector`` generated column holds a
+weighted ``tsvector`` backed by a GIN index, so the database keeps it current.
+On SQLite (local and CI runs) an FTS5 table mirrors each article's title and
+body and is updated by the signal handlers in ``articles.signals``; queries
+join it through the unmanaged ``ArticleSearchEntry`` model. Both are created
+by migration ``0007_article_search``.
+"""
+
+import re
+
+from django.db import connections
+from django.db.models import BooleanField, FloatField, TextField, Value
+from django.db.models.expressions import RawSQL
+from django.utils.html import escape
+from django.utils.safestring import mark_safe
+
+FTS_TABLE = "articles_article_fts"
+
+# Sentinels wrapped around matched terms by the database. The surrounding text
+# is escaped before they are turned into <mark> tags.
+HIGHLIGHT_START = "\x02"
+HIGHLIGHT_STOP = "\x03"
+
+
+def search_articles(queryset, query):
+    """
+    Filter an Article queryset down to the matches for ``query``, annotated
+    with ``rank`` (higher is better) and ``headline`` (a fragment of the body
+    with the matched terms wrapped in the highlight sentinels).
+    """
+    if not query.strip():
+        return _no_matches(queryset)
+    vendor = connections[queryset.db].vendor
+    if vendor == "postgresql":
+        return _search_postgresql(queryset, query)
+    if vendor == "sqlite":
+        return _search_sqlite(queryset, query)
+    raise NotImplementedError(f"Article search does not support {vendor}.")
+
+
+def _search_postgresql(queryset, query):
+    tsquery = "websearch_to_tsquery('english', %s)"
+    options = (
+        f'StartSel="{HIGHLIGHT_START}", StopSel="{HIGHLIGHT_STOP}", '
+        "MaxWords=35, MinWords=15"
+    )
+    return queryset.filter(
+        RawSQL(
+            f'"articles_article"."search_vector" @@ {tsquery}',
+            (query,),
+            output_field=BooleanField(),
+        )
+    ).annotate(
+        # ts_rank_cd() returns a real. The cursor stores the rank as a Python
+        # float (a double), which only compares equal to a double, so rows
+        # tying with the edge of a page would be skipped or repeated.
+        rank=RawSQL(
+            f'ts_rank_cd("articles_article"."search_vector", {tsquery})'
+            "::double precision",
+            (query,),
+            output_field=FloatField(),
+        ),
+        headline=RawSQL(
+            f"""ts_headline('english', "articles_article"."body", {tsquery}, %s)""",
+            (query, options),
+            output_field=TextField(),
+        ),
+    )
+
+
+def _search_sqlite(queryset, query):
+    # Quote every word so user input can never be read as FTS5 syntax.
+    terms = " ".join(f'"{word}"' for word in re.findall(r"\w+", query))
+    if not terms:
+        return _no_matches(queryset)
+    # Joining the FTS table (rather than a subquery per row) lets bm25() and
+    # snippet() read the MATCH of the same query.
+    return (
+        queryset.filter(search_entry__isnull=False)
+        .filter(
+            RawSQL(f'"{FTS_TABLE}" MATCH %s', (terms,), output_field=BooleanField())
+        )
+        .annotate(
+            # bm25() scores better matches lower; weigh titles over bodies.
+            rank=RawSQL(
+                f'-bm25("{FTS_TABLE}", 0.0, 10.0, 1.0)', (), output_field=FloatField()
+            ),
+            headline=RawSQL(
+                f"""snippet("{FTS_TABLE}", 2, %s, %s, '…', 24)""",
+                (HIGHLIGHT_START, HIGHLIGHT_STOP),
+                output_field=TextField(),
+            ),
+        )
+    )
+
+
+def _no_matches(queryset):
+    return queryset.none().annotate(
+        rank=Value(0.0, output_field=FloatField()),
+        headline=Value("", output_field=TextField()),
+    )
+
+
+def highlight(headline):
+    """Escape a search headline and mark up its matched terms."""
+    return mark_safe(
+        escape(headline)
+        .replace(HIGHLIGHT_START, "<mark>")
+        .replace(HIGHLIGHT_STOP, "</mark>")
+    )
+
+
+def index_articles(articles, using):
+    """Add or refresh the SQLite search entries of ``articles``."""
+    connection = connections[using]
+    if connection.vendor != "sqlite":
+        return
+    rows = [(article.pk.hex, article.title, article.body) for article in articles]
+    with connection.cursor() as cursor:
+        cursor.executemany(
+            f'DELETE FROM "{FTS_TABLE}" WHERE "article_id" = %s',
+            [(pk,) for pk, _, _ in rows],
+        )
+        cursor.executemany(
+            f'INSERT INTO "{FTS_TABLE}" ("article_id", "title", "body") '
+            "VALUES (%s, %s, %s)",
+            rows,
+        )
+
+
+def unindex_articles(pks, using):
+    """Drop the SQLite search entries of the articles with the given pks."""
+    connection = connections[using]
+    if connection.vendor != "sqlite":
+        return
+    with connection.cursor() as cursor:
+        cursor.executemany(
+            f'DELETE FROM "{FTS_TABLE}" WHERE "article_id" = %s',
+            [(pk.hex,) for pk in pks],
+        )
@@ -0,0 +1,56 @@
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save, pre_delete
+from django.dispatch import receiver
+
+from .models import Article, Comment, update_comment_counts
+from .search import index_articles, unindex_articles
+from .syndication import article_scopes, forget_documents
+
+# Fields shown in the feeds and sitemaps.
+ARCHIVE_FIELDS = {"title", "body", "snippet", "author", "created_at", "updated_at"}
+
+
+@receiver(post_save, sender=Comment)
+def increment_comment_count(sender, instance, created, raw, using, **kwargs):
+    if created and not raw:
+        update_comment_counts([instance.article_id], 1, using)
+
+
+# Comment deliberately has no delete receivers: they would make Django load
+# and signal every comment of a deleted article or user. Comment.delete() and
+# CommentQuerySet.delete() update the counters of direct deletes; cascades
+# from an article need nothing and cascades from a user are handled below.
+
+
+@receiver(pre_delete, sender=get_user_model())
+def uncount_authored_comments(sender, instance, using, **kwargs):
+    # Runs inside the deletion's transaction, before the cascade deletes the
+    # user's comments.
+    article_ids = (
+        Comment.objects.using(using)
+        .filter(author=instance)
+        .values_list("article_id", flat=True)
+    )
+    update_comment_counts(list(article_ids), -1, using)
+
+
+@receiver(post_save, sender=Article)
+def index_article(sender, instance, using, update_fields, **kwargs):
+    if update_fields is None or {"title", "body"} & set(update_fields):
+        index_articles([instance], using)
+
+
+@receiver(post_delete, sender=Article)
+def unindex_article(sender, instance, using, **kwargs):
+    unindex_articles([instance.pk], using)
+
+
+@receiver(post_save, sender=Article)
+@receiver(post_delete, sender=Article)
+def forget_archive_documents(sender, instance, using, update_fields=None, **kwargs):
+    # After commit, so a document rebuilt meanwhile cannot cache the old rows
+    # under the new version.
+    if update_fields is None or ARCHIVE_FIELDS & set(update_fields):
+        scopes = article_scopes(instance)
+        transaction.on_commit(lambda: forget_documents(scopes), using=using)
@@ -0,0 +1,288 @@
+"""
+Atom/RSS feeds and a sitemap sharded by month, for aggregators and crawlers.
+
+Each document is built from a values() query, cached whole and served with
+an ETag and Last-Modified, so a repeat poll costs a cache lookup and usually
+ends in a 304. Cache keys include a version per scope (the latest articles,
+one author, the sitemap index, one month of the sitemap), which
+articles.signals drops when an article in that scope is saved or deleted.
+Only a cache shared by every server process sees those drops; with a cache
+per process, ARCHIVE_CACHE_TIMEOUT defaults to a minute instead.
+
+Like the article pages they link to, and the JSON API, the documents are for
+signed-in readers only: anonymous requests get a 401.
+"""
+
+import datetime
+import hashlib
+import math
+import uuid
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.contrib.syndication.views import Feed
+from django.core.cache import cache
+from django.db.models import Count, Max
+from django.db.models.functions import TruncMonth
+from django.http import Http404, HttpResponse
+from django.shortcuts import render
+from django.urls import reverse, reverse_lazy
+from django.utils import timezone
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.feedgenerator import Atom1Feed
+from django.utils.html import escape
+from django.utils.http import http_date, parse_http_date_safe, quote_etag
+from django.views import View
+
+from .models import Article
+
+FEED_ITEMS = 50
+# Most URLs a sitemap may list (sitemaps.org protocol).
+SITEMAP_LIMIT = 50000
+ITEM_COLUMNS = ["article_id", "title", "snippet", "created_at", "updated_at"]
+
+# Drops every cached document, e.g. after a bulk import that sent no signals.
+ALL = "all"
+
+
+def version_key(scope):
+    return f"articles.archive.version.{scope}"
+
+
+def article_scopes(article):
+    """The scopes whose documents list ``article``."""
+    created = timezone.localtime(article.created_at)
+    return [
+        "latest",
+        f"author.{article.author_id}",
+        "sitemap",
+        f"sitemap.{created:%Y-%m}",
+    ]
+
+
+def forget_documents(scopes):
+    """Make the cached documents of ``scopes`` stale."""
+    cache.delete_many([version_key(scope) for scope in scopes])
+
+
+def document_versions(scope):
+    keys = [version_key(ALL), version_key(scope)]
+    versions = cache.get_many(keys)
+    missing = {key: uuid.uuid4().hex for key in keys if key not in versions}
+    if missing:
+        cache.set_many(missing, None)
+        versions.update(missing)
+    return [versions[key] for key in keys]
+
+
+def serve_document(request, scope, name, build):
+    """
+    Serve the response ``build()`` returns from the cache, keyed by ``name``,
+    the scope's versions and the host (documents hold absolute URLs).
+    """
+    if not request.user.is_authenticated:
+        return HttpResponse(
+            "Authentication required.", status=401, content_type="text/plain"
+        )
+    key = "articles.archive.%s.%s.%s.%s" % (
+        scope,
+        ".".join(document_versions(scope)),
+        hashlib.md5(request.build_absolute_uri("/").encode()).hexdigest(),
+        name,
+    )
+    document = cache.get(key)
+    if document is None:
+        response = build()
+        content = response.content
+        document = {
+            "content": content,
+            "content_type": response["Content-Type"],
+            "etag": quote_etag(hashlib.sha256(content).hexdigest()),
+            "last_modified": parse_http_date_safe(response.get("Last-Modified", "")),
+        }
+        cache.set(key, document, settings.ARCHIVE_CACHE_TIMEOUT)
+
+    response = get_conditional_response(
+        request, etag=document["etag"], last_modified=document["last_modified"]
+    )
+    if response is None:
+        response = HttpResponse(
+            document["content"], content_type=document["content_type"]
+        )
+    response.headers["ETag"] = document["etag"]
+    if document["last_modified"] is not None:
+        response.headers["Last-Modified"] = http_date(document["last_modified"])
+    # Only for signed-in readers, so only their browsers may keep a copy,
+    # revalidated on each poll.
+    patch_cache_control(response, private=True, no_cache=True)
+    return response
+
+
+class LatestArticlesFeed(Feed):
+    title = "Newspaper: latest articles"
+    link = reverse_lazy("article_list")
+    description = "The newest articles."
+
+    def __call__(self, request, *args, **kwargs):
+        return serve_document(
+            request,
+            self.get_scope(*args, **kwargs),
+            type(self).__name__,
+            lambda: super(LatestArticlesFeed, self).__call__(request, *args, **kwargs),
+        )
+
+    def get_scope(self, *args, **kwargs):
+        return "latest"
+
+    def items(self):
+        return Article.objects.values(*ITEM_COLUMNS, "author__username")[:FEED_ITEMS]
+
+    def item_title(self, item):
+        return escape(item["title"].title())
+
+    def item_description(self, item):
+        # The snippet is plain text cut from the body, like the title.
+        return escape(item["snippet"])
+
+    def item_link(self, item):
+        return reverse("article_detail", kwargs={"pk": item["article_id"]})
+
+    def item_guid(self, item):
+        return item["article_id"].urn
+
+    item_guid_is_permalink = False
+
+    def item_author_name(self, item):
+        return item["author__username"]
+
+    def item_pubdate(self, item):
+        return item["created_at"]
+
+    def item_updateddate(self, item):
+        return item["updated_at"]
+
+
+class LatestArticlesAtomFeed(LatestArticlesFeed):
+    feed_type = Atom1Feed
+    subtitle = LatestArticlesFeed.description
+
+
+class AuthorArticlesFeed(LatestArticlesFeed):
+    def get_object(self, request, pk):
+        return (
+            get_user_model()
+            .objects.values("pk", "username", "first_name", "last_name")
+            .get(pk=pk)
+        )
+
+    def get_scope(self, pk):
+        return f"author.{pk}"
+
+    def title(self, author):
+        name = f"{author['first_name']} {author['last_name']}".strip()
+        return f"Newspaper: articles by {name or author['username']}"
+
+    def description(self, author):
+        return f"The newest articles by {author['username']}."
+
+    def items(self, author):
+        return Article.objects.filter(author_id=author["pk"]).values(
+            *ITEM_COLUMNS, "author__username"
+        )[:FEED_ITEMS]
+
+
+class AuthorArticlesAtomFeed(AuthorArticlesFeed):
+    feed_type = Atom1Feed
+
+    def subtitle(self, author):
+        return self.description(author)
+
+
+def article_urls(request):
+    """Build absolute article URLs without resolving each one."""
+    placeholder = uuid.UUID(int=0)
+    url = request.build_absolute_uri(
+        reverse("article_detail", kwargs={"pk": placeholder})
+    )
+    prefix, suffix = url.split(str(placeholder))
+    return lambda pk: f"{prefix}{pk}{suffix}"
+
+
+class SitemapIndexView(View):
+    """The sitemap index: one sitemap per month with articles."""
+
+    def get(self, request):
+        return serve_document(request, "sitemap", "index", lambda: self.build())
+
+    def build(self):
+        months = (
+            Article.objects.annotate(month=TruncMonth("created_at"))
+            .values("month")
+            .annotate(count=Count("pk"), last_mod=Max("updated_at"))
+            .order_by("-month")
+        )
+        sitemaps = []
+        for month in months:
+            url = self.request.build_absolute_uri(
+                reverse(
+                    "article_sitemap",
+                    kwargs={
+                        "year": f"{month['month']:%Y}",
+                        "month": f"{month['month']:%m}",
+                    },
+                )
+            )
+            for page in range(1, math.ceil(month["count"] / SITEMAP_LIMIT) + 1):
+                location = url if page == 1 else f"{url}?p={page}"
+                sitemaps.append({"location": location, "last_mod": month["last_mod"]})
+        response = render(
+            self.request,
+            "sitemap_index.xml",
+            {"sitemaps": sitemaps},
+            content_type="application/xml",
+        )
+        if sitemaps:
+            last_mod = max(sitemap["last_mod"] for sitemap in sitemaps)
+            response.headers["Last-Modified"] = http_date(last_mod.timestamp())
+        return response
+
+
+class SitemapView(View):
+    """The articles created in one month, SITEMAP_LIMIT per page."""
+
+    def get(self, request, year, month):
+        year, month, page = int(year), int(month), request.GET.get("p", "1")
+        valid_page = page.isdigit() and int(page) >= 1
+        if not (1 <= month <= 12 and 1 <= year < 9999 and valid_page):
+            raise Http404("No such sitemap")
+        scope = f"sitemap.{year:04d}-{month:02d}"
+        return serve_document(
+            request, scope, f"page.{page}", lambda: self.build(year, month, int(page))
+        )
+
+    def build(self, year, month, page):
+        start = timezone.make_aware(datetime.datetime(year, month, 1))
+        end = timezone.make_aware(
+            datetime.datetime(year + month // 12, month % 12 + 1, 1)
+        )
+        offset = (page - 1) * SITEMAP_LIMIT
+        rows = list(
+            Article.objects.filter(created_at__gte=start, created_at__lt=end)
+            .order_by("created_at", "article_id")
+            .values_list("article_id", "updated_at")[offset : offset + SITEMAP_LIMIT]
+        )
+        if not rows:
+            raise Http404("No such sitemap")
+        article_url = article_urls(self.request)
+        urlset = [
+            {"location": article_url(pk), "lastmod": lastmod} for pk, lastmod in rows
+        ]
+        response = render(
+            self.request,
+            "sitemap.xml",
+            {"urlset": urlset},
+            content_type="application/xml",
+        )
+        last_mod = max(lastmod for _, lastmod in rows)
+        response.headers["Last-Modified"] = http_date(last_mod.timestamp())
+        return response
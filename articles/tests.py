@@ -1,13 +1,46 @@
+import base64
+import gzip
+import json
+import os
+import tempfile
+import threading
 import uuid
-from django.test import TestCase
+from io import StringIO
+from unittest.mock import patch
+from django.core.cache import cache
+from django.core.management import CommandError, call_command
+from django.db import IntegrityError, connection, models
+from django.test import (
+    TestCase,
+    TransactionTestCase,
+    override_settings,
+    skipUnlessDBFeature,
+)
+from django.test.utils import CaptureQueriesContext
 from django.contrib.auth import get_user_model
-from django.urls import reverse
+from django.urls import include, path, reverse
 from django.utils import timezone
 from django.core.exceptions import PermissionDenied
-from .models import Article
+from accounts.tests import cached_auth
+from newspaper_project.cache import stats as cache_stats
+from .management.commands.export_newspaper import Command as ExportCommand
+from .models import Article, Comment, render_body
+from .api import ArticleListApiView
+from .views import AsyncArticleDetailView, AsyncArticleListView
 
 User = get_user_model()
 
+# Serves the async read path, as with ASYNC_VIEWS on; see AsyncViewTests.
+urlpatterns = [
+    path("articles/", AsyncArticleListView.as_view(), name="article_list"),
+    path(
+        "articles/<uuid:pk>/",
+        AsyncArticleDetailView.as_view(),
+        name="article_detail",
+    ),
+    path("", include("newspaper_project.urls")),
+]
+
 
 class ArticleModelTests(TestCase):
     @classmethod
@@ -33,6 +66,50 @@ class ArticleModelTests(TestCase):
         self.assertTrue(self.article.snippet.endswith("..."))
         self.assertIn("Test Body", self.article.snippet)
 
+    def test_version_counts_content_changes(self):
+        """Saving the title or body bumps the version; other fields do not."""
+        self.assertEqual(self.article.version, 1)
+        self.article.body = "Changed"
+        self.article.save(update_fields=["body"])
+        self.article.save(update_fields=["comment_count"])
+        self.article.refresh_from_db()
+        self.assertEqual(self.article.version, 2)
+
+    def test_snippet_is_stored(self):
+        """Snippet and reading time are derived from the body on save."""
+        self.article.body = "one two three four five six " * 100
+        self.article.save(update_fields=["body"])
+        self.article.refresh_from_db()
+        self.assertEqual(self.article.snippet, "one two three four five...")
+        self.assertEqual(self.article.reading_time, 3)
+
+    def test_body_html_is_stored(self):
+        """The body is rendered to escaped HTML on save and when edited."""
+        self.assertEqual(self.article.body_html, "<p>Test Body</p>")
+        self.article.body = "<b>Bold</b>\n\nSecond"
+        self.article.save(update_fields=["body"])
+        self.article.refresh_from_db()
+        self.assertEqual(
+            self.article.body_html, "<p>&lt;b&gt;Bold&lt;/b&gt;</p>\n\n<p>Second</p>"
+        )
+        self.assertEqual(self.article.rendered_body, self.article.body_html)
+
+    def test_stale_body_html_is_not_served(self):
+        """HTML from another renderer version is replaced, then re-rendered."""
+        Article.objects.update(body_html="<p>old</p>", body_html_version=0)
+        self.article.refresh_from_db()
+        self.assertEqual(self.article.rendered_body, "<p>Test Body</p>")
+
+        out = StringIO()
+        call_command("render_articles", batch_size=1, stdout=out)
+        self.assertIn("Re-rendered 1 articles", out.getvalue())
+        self.article.refresh_from_db()
+        self.assertEqual(self.article.body_html, render_body("Test Body"))
+
+        out = StringIO()
+        call_command("render_articles", stdout=out)
+        self.assertIn("Re-rendered 0 articles", out.getvalue())
+
     def test_article_id_is_uuid(self):
         """Ensure UUID field is valid."""
         self.assertIsInstance(self.article.article_id, uuid.UUID)
@@ -136,12 +213,14 @@ class ArticleURLTests(TestCase):
             reverse("article_detail", kwargs={"pk": self.article.pk})
         )
         self.assertIn("articles", list_resp.context)
+        for article in list_resp.context["articles"]:
+            self.assertIn("body", article.get_deferred_fields())
         self.assertIn("article", detail_resp.context)
 
         # confirm updated list after adding another
         Article.objects.create(title="Another", body="Body", author=self.user)
         updated_resp = self.client.get(reverse("article_list"))
-        self.assertEqual(updated_resp.context["articles"].count(), 2)
+        self.assertEqual(len(updated_resp.context["articles"]), 2)
 
 
 class ArticleViewsTests(TestCase):
@@ -215,3 +294,1198 @@ class ArticleViewsTests(TestCase):
         )
         self.assertEqual(edit_resp.status_code, 200)
         self.assertEqual(delete_resp.status_code, 200)
+
+    def test_edit_renders_body_html(self):
+        """Editing re-renders the body the detail page serves."""
+        self.client.login(username="author", password="Test1234")
+        self.client.post(
+            reverse("article_edit", kwargs={"pk": self.article.pk}),
+            {"title": "Edited", "body": "First line\nsecond line", "version": 1},
+        )
+        response = self.client.get(self.article.get_absolute_url())
+        self.assertContains(response, "<p>First line<br>second line</p>", html=True)
+
+    def test_author_check_fetches_the_article_once(self):
+        self.client.login(username="author", password="Test1234")
+        url = reverse("article_delete", kwargs={"pk": self.article.pk})
+        self.client.get(url)  # Caches the session and user.
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get(url)
+        article_queries = [q for q in queries if "articles_article" in q["sql"]]
+        self.assertEqual(len(article_queries), 1)
+
+    def test_stale_edit_is_rejected(self):
+        """An edit made on an older version does not overwrite newer content."""
+        self.client.login(username="author", password="Test1234")
+        url = reverse("article_edit", kwargs={"pk": self.article.pk})
+        form = self.client.get(url).context["form"]
+        self.assertEqual(form["version"].value(), 1)
+
+        # Saved from another tab meanwhile.
+        self.article.body = "Newer body"
+        self.article.save()
+
+        stale = {"title": "Mine", "body": "Older edit", "version": 1}
+        response = self.client.post(url, stale)
+        self.assertEqual(response.status_code, 409)
+        self.assertContains(
+            response, "changed after you started editing", status_code=409
+        )
+        self.assertContains(response, "Older edit", status_code=409)
+        self.article.refresh_from_db()
+        self.assertEqual(self.article.body, "Newer body")
+
+        # Submitting again, now knowingly, replaces the newer content.
+        self.assertEqual(response.context["form"]["version"].value(), 2)
+        response = self.client.post(url, {**stale, "version": 2})
+        self.assertEqual(response.status_code, 302)
+        self.article.refresh_from_db()
+        self.assertEqual((self.article.body, self.article.version), ("Older edit", 3))
+
+
+class ArticlePaginationTests(TestCase):
+    """Ensure the article list is paginated by cursor."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(
+            username="testuser", email="testuser@test.com", password="Test1234"
+        )
+        # Share one timestamp so the article_id tie-breaker is exercised.
+        created_at = timezone.now()
+        for index in range(30):
+            article = Article.objects.create(
+                title=f"Article {index}", body="Body", author=cls.user
+            )
+            Article.objects.filter(pk=article.pk).update(created_at=created_at)
+        cls.expected = list(Article.objects.values_list("pk", flat=True))
+
+    def setUp(self):
+        self.client.login(username="testuser", password="Test1234")
+
+    def test_walk_forward_and_back(self):
+        """Following cursors visits every article once, in order."""
+        url = reverse("article_list")
+        seen, pages = [], []
+        response = self.client.get(url)
+        while True:
+            page = response.context["page_obj"]
+            pages.append(page)
+            seen.extend(article.pk for article in page)
+            if not page.has_next():
+                break
+            response = self.client.get(url, {"cursor": page.next_cursor})
+
+        self.assertEqual(seen, self.expected)
+        self.assertEqual([len(page) for page in pages], [12, 12, 6])
+        self.assertFalse(pages[0].has_previous())
+
+        previous = self.client.get(url, {"cursor": pages[-1].previous_cursor})
+        self.assertEqual(
+            [article.pk for article in previous.context["articles"]],
+            self.expected[12:24],
+        )
+        self.assertContains(previous, "?cursor=")
+
+    def test_invalid_cursor(self):
+        """A tampered cursor is a 404, not a server error."""
+        for cursor in ["garbage", "WyJuIiwgWyJub3QtYS1kYXRlIiwgIngiXV0"]:
+            response = self.client.get(reverse("article_list"), {"cursor": cursor})
+            self.assertEqual(response.status_code, 404)
+
+    def test_cursor_values_of_the_wrong_type(self):
+        def encode(payload):
+            return base64.urlsafe_b64encode(json.dumps(payload).encode()).decode()
+
+        forged = [
+            encode(["n", [123, "x"]]),
+            encode(["n", [None, None]]),
+            encode(["n", [[], {}]]),
+            encode(["n", ["2024-01-01T00:00:00+00:00"]]),
+        ]
+        for cursor in forged:
+            response = self.client.get(reverse("article_list"), {"cursor": cursor})
+            self.assertEqual(response.status_code, 404)
+            response = self.client.get(reverse("api_article_list"), {"cursor": cursor})
+            self.assertEqual(response.status_code, 400)
+
+        # A valid cursor of the article list, replayed on the search page.
+        page = self.client.get(reverse("article_list")).context["page_obj"]
+        response = self.client.get(
+            reverse("article_search"), {"q": "article", "cursor": page.next_cursor}
+        )
+        self.assertEqual(response.status_code, 404)
+
+
+class CommentCountTests(TestCase):
+    """Ensure the stored comment counter follows comment writes."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user(
+            username="author", email="author@test.com", password="Test1234"
+        )
+        cls.readers = [
+            User.objects.create_user(username=f"reader{index}", password="Test1234")
+            for index in range(3)
+        ]
+
+    def setUp(self):
+        self.article = Article.objects.create(
+            title="Counted", body="Body", author=self.author
+        )
+
+    def comment_count(self):
+        self.article.refresh_from_db(fields=["comment_count"])
+        return self.article.comment_count
+
+    def test_create_and_delete(self):
+        comment = Comment.objects.create(
+            article=self.article, author=self.readers[0], comment="First"
+        )
+        self.assertEqual(self.comment_count(), 1)
+        comment.delete()
+        self.assertEqual(self.comment_count(), 0)
+
+    def test_bulk_create_and_delete(self):
+        Comment.objects.bulk_create(
+            Comment(article=self.article, author=reader, comment="Hi")
+            for reader in self.readers
+        )
+        self.assertEqual(self.comment_count(), 3)
+        Comment.objects.filter(author__in=self.readers[:2]).delete()
+        self.assertEqual(self.comment_count(), 1)
+
+    def test_stale_save_keeps_the_count(self):
+        """Saving an article loaded before a comment keeps the comment."""
+        stale = Article.objects.get(pk=self.article.pk)
+        Comment.objects.create(
+            article=self.article, author=self.readers[0], comment="Hi"
+        )
+        stale.title = "Renamed"
+        stale.save()
+        self.assertEqual(self.comment_count(), 1)
+        self.article.refresh_from_db(fields=["title", "comments_updated_at"])
+        self.assertEqual(self.article.title, "Renamed")
+        self.assertIsNotNone(self.article.comments_updated_at)
+
+    def test_cascade_delete(self):
+        """Deleting a commenter removes their comments from the count."""
+        for reader in self.readers:
+            Comment.objects.create(article=self.article, author=reader, comment="Hi")
+        self.readers[0].delete()
+        self.assertEqual(self.comment_count(), 2)
+
+    def test_cascade_delete_queries_do_not_grow_with_comments(self):
+        """Cascades delete comments in one query, without loading them."""
+
+        def delete_queries(comments):
+            readers = [
+                User.objects.create_user(username=f"reader{comments}.{index}")
+                for index in range(comments)
+            ]
+            gone = Article.objects.create(title="Gone", body="Body", author=self.author)
+            kept = [
+                Article.objects.create(title="Kept", body="Body", author=self.author)
+                for _ in range(comments)
+            ]
+            Comment.objects.bulk_create(
+                [Comment(article=gone, author=r, comment="Hi") for r in readers]
+                + [Comment(article=k, author=readers[0], comment="Hi") for k in kept]
+            )
+            with CaptureQueriesContext(connection) as article_delete:
+                gone.delete()
+            with CaptureQueriesContext(connection) as user_delete:
+                readers[0].delete()
+            counts = Article.objects.filter(pk__in=[k.pk for k in kept])
+            self.assertEqual(set(counts.values_list("comment_count", flat=True)), {0})
+            counts.delete()
+            return len(article_delete), len(user_delete)
+
+        self.assertEqual(delete_queries(1), delete_queries(5))
+
+    def test_recount_comments_repairs_drift(self):
+        Comment.objects.create(
+            article=self.article, author=self.readers[0], comment="Hi"
+        )
+        Article.objects.filter(pk=self.article.pk).update(comment_count=7)
+
+        out = StringIO()
+        call_command("recount_comments", batch_size=1, stdout=out)
+
+        self.assertIn("Repaired 1", out.getvalue())
+        self.assertEqual(self.comment_count(), 1)
+
+    def test_templates_use_stored_count(self):
+        """Listing articles does not count comments per card."""
+        self.client.login(username="author", password="Test1234")
+        Article.objects.filter(pk=self.article.pk).update(comment_count=5)
+        response = self.client.get(reverse("article_list"))
+        self.assertContains(response, "5 comments")
+
+
+class CommentPaginationTests(TestCase):
+    """Ensure comments load a page at a time, oldest first."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user(username="author", password="Test1234")
+        cls.article = Article.objects.create(title="T", body="B", author=cls.author)
+        readers = User.objects.bulk_create(
+            User(username=f"reader{index:02}") for index in range(25)
+        )
+        start = timezone.now()
+        Comment.objects.bulk_create(
+            Comment(article=cls.article, author=reader, comment=f"Comment {index:02}")
+            for index, reader in enumerate(readers)
+        )
+        # bulk_create() stamps every row alike; spread them out in order.
+        for index, comment in enumerate(Comment.objects.order_by("comment")):
+            comment.created_at = start + timezone.timedelta(seconds=index)
+            comment.save(update_fields=["created_at"])
+
+    def setUp(self):
+        self.client.force_login(self.author)
+
+    def test_detail_renders_first_page(self):
+        response = self.client.get(self.article.get_absolute_url())
+        comments = [comment.comment for comment in response.context["comments"]]
+        self.assertEqual(comments, [f"Comment {index:02}" for index in range(20)])
+        self.assertContains(response, "Load more comments")
+
+    def test_json_endpoint_returns_later_pages(self):
+        response = self.client.get(self.article.get_absolute_url())
+        response = self.client.get(response.context["more_comments_url"])
+        page = response.json()
+        self.assertEqual(
+            [comment["comment"] for comment in page["comments"]],
+            [f"Comment {index:02}" for index in range(20, 25)],
+        )
+        self.assertEqual(page["comments"][0]["author"], "reader20")
+        self.assertIsNone(page["next"])
+
+    def test_invalid_cursor_is_not_found(self):
+        url = reverse("article_comments", kwargs={"pk": self.article.pk})
+        response = self.client.get(url, {"cursor": "garbage"})
+        self.assertEqual(response.status_code, 404)
+
+
+class CommentUniquenessTests(TestCase):
+    """Ensure a reader can comment on an article only once."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user(username="author", password="Test1234")
+        cls.reader = User.objects.create_user(username="reader", password="Test1234")
+        cls.article = Article.objects.create(title="T", body="B", author=cls.author)
+
+    def test_second_comment_is_refused_without_a_pre_check(self):
+        self.client.force_login(self.reader)
+        url = self.article.get_absolute_url()
+        self.client.post(url, {"comment": "First"})
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.post(url, {"comment": "Second"})
+        self.assertFalse(
+            [
+                query
+                for query in queries
+                if query["sql"].startswith('SELECT "articles_comment"')
+            ]
+        )
+        self.assertRedirects(response, url, fetch_redirect_response=False)
+        response = self.client.get(url)
+        self.assertContains(response, "You have already commented on this post.")
+        self.assertEqual(
+            list(self.article.comment_set.values_list("comment", flat=True)),
+            ["First"],
+        )
+        self.article.refresh_from_db()
+        self.assertEqual(self.article.comment_count, 1)
+
+    def test_other_integrity_errors_are_not_reported_as_duplicates(self):
+        self.client.force_login(self.reader)
+        error = IntegrityError("FOREIGN KEY constraint failed")
+        with patch.object(Comment, "save", side_effect=error):
+            with self.assertRaises(IntegrityError):
+                self.client.post(self.article.get_absolute_url(), {"comment": "Hi"})
+
+
+class ConcurrentCommentTests(TransactionTestCase):
+    """Double submits racing each other must still leave one comment."""
+
+    THREADS = 4
+
+    @skipUnlessDBFeature("test_db_allows_multiple_connections")
+    def test_concurrent_submits_create_one_comment(self):
+        author = User.objects.create_user(username="author", password="Test1234")
+        reader = User.objects.create_user(username="reader", password="Test1234")
+        article = Article.objects.create(title="T", body="B", author=author)
+        url = article.get_absolute_url()
+        barrier = threading.Barrier(self.THREADS)
+        statuses = []
+
+        def submit():
+            try:
+                client = self.client_class()
+                client.force_login(reader)
+                barrier.wait()
+                statuses.append(client.post(url, {"comment": "Hi"}).status_code)
+            finally:
+                connection.close()
+
+        threads = [threading.Thread(target=submit) for _ in range(self.THREADS)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(statuses, [302] * self.THREADS)
+        self.assertEqual(Comment.objects.filter(article=article).count(), 1)
+        article.refresh_from_db()
+        self.assertEqual(article.comment_count, 1)
+
+
+class ArticleSearchTests(TestCase):
+    """Ensure full-text search finds, ranks and highlights articles."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(
+            username="testuser", email="testuser@test.com", password="Test1234"
+        )
+        cls.in_title = Article.objects.create(
+            title="Volcano eruption", body="Lava everywhere.", author=cls.user
+        )
+        cls.in_body = Article.objects.create(
+            title="Island news",
+            body="Residents <b>watched</b> the volcano from the harbour.",
+            author=cls.user,
+        )
+        Article.objects.create(title="Other", body="Nothing here.", author=cls.user)
+
+    def setUp(self):
+        self.client.login(username="testuser", password="Test1234")
+
+    def search(self, query, **params):
+        return self.client.get(reverse("article_search"), {"q": query, **params})
+
+    def test_ranked_matches(self):
+        response = self.search("volcano")
+        self.assertEqual(
+            [article.pk for article in response.context["articles"]],
+            [self.in_title.pk, self.in_body.pk],
+        )
+
+    def test_highlighted_and_escaped_snippet(self):
+        response = self.search("watched")
+        self.assertContains(response, "<mark>watched</mark>")
+        self.assertContains(response, "&lt;b&gt;")
+
+    def test_index_follows_edits_and_deletes(self):
+        self.in_body.body = "A quiet day."
+        self.in_body.save()
+        self.in_title.delete()
+        self.assertEqual(len(self.search("volcano").context["articles"]), 0)
+        self.assertEqual(len(self.search("quiet").context["articles"]), 1)
+
+    def test_cursor_pagination(self):
+        for index in range(15):
+            Article.objects.create(
+                title=f"Harbour {index}", body="harbour " * index, author=self.user
+            )
+        first = self.search("harbour")
+        page = first.context["page_obj"]
+        second = self.search("harbour", cursor=page.next_cursor)
+        seen = [a.pk for a in page] + [a.pk for a in second.context["articles"]]
+        # Fifteen new articles plus the one mentioning the harbour.
+        self.assertEqual(len(seen), 16)
+        self.assertEqual(len(set(seen)), 16)
+
+    def test_cursor_pagination_through_tied_ranks(self):
+        tied = {
+            Article.objects.create(
+                title="Tide tables", body="The tide turns.", author=self.user
+            ).pk
+            for _ in range(30)
+        }
+        seen, cursor = [], None
+        while True:
+            page = self.search("tide", cursor=cursor or "").context["page_obj"]
+            seen += [article.pk for article in page]
+            if not page.has_next():
+                break
+            cursor = page.next_cursor
+        # Every article ranks the same, so the pages rest on the exact rank.
+        self.assertEqual(len(seen), len(tied))
+        self.assertEqual(set(seen), tied)
+        previous = self.search("tide", cursor=page.previous_cursor)
+        self.assertEqual(
+            [article.pk for article in previous.context["articles"]], seen[12:24]
+        )
+
+    def test_blank_and_symbol_queries(self):
+        self.assertEqual(len(self.search("").context["articles"]), 0)
+        self.assertEqual(len(self.search('"*(').context["articles"]), 0)
+
+
+class FragmentCacheTests(TestCase):
+    """Ensure rendered cards and bodies are cached per article version."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(
+            username="author", email="author@test.com", password="Test1234"
+        )
+        cls.reader = User.objects.create_user(username="reader", password="Test1234")
+
+    def setUp(self):
+        cache.clear()
+        cache_stats.reset()
+        self.article = Article.objects.create(
+            title="Cached", body="Cached body", author=self.user
+        )
+        self.client.login(username="author", password="Test1234")
+
+    def card_counts(self):
+        group = cache_stats.snapshot()["groups"]["template.cache.article_card"]
+        cache_stats.reset()
+        return group["hits"], group["misses"]
+
+    def test_card_is_reused_until_the_article_changes(self):
+        self.client.get(reverse("article_list"))
+        self.assertEqual(self.card_counts(), (0, 1))
+        self.client.get(reverse("article_list"))
+        self.assertEqual(self.card_counts(), (1, 0))
+
+        self.article.title = "Edited"
+        self.article.save()
+        response = self.client.get(reverse("article_list"))
+        self.assertEqual(self.card_counts(), (0, 1))
+        self.assertContains(response, "Edited")
+
+    def test_comments_change_the_version(self):
+        url = reverse("article_detail", kwargs={"pk": self.article.pk})
+        self.client.get(url)
+        version = self.article.cache_version
+
+        comment = Comment.objects.create(
+            article=self.article, author=self.reader, comment="Hi"
+        )
+        self.article.refresh_from_db()
+        self.assertNotEqual(self.article.cache_version, version)
+        version = self.article.cache_version
+
+        comment.delete()
+        self.article.refresh_from_db()
+        self.assertNotEqual(self.article.cache_version, version)
+
+    def test_stats_view_is_staff_only(self):
+        self.assertEqual(self.client.get(reverse("cache_stats")).status_code, 302)
+        self.user.is_staff = True
+        self.user.save()
+        self.client.force_login(self.user)
+        response = self.client.get(reverse("cache_stats"))
+        self.assertEqual(response.status_code, 200)
+        self.assertIn("hits", response.json())
+
+
+@cached_auth()
+class ConditionalGetTests(TestCase):
+    """Ensure unchanged list and detail pages are answered with a 304."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(
+            username="author", email="author@test.com", password="Test1234"
+        )
+        cls.reader = User.objects.create_user(username="reader", password="Test1234")
+
+    def setUp(self):
+        self.article = Article.objects.create(
+            title="Conditional", body="Body", author=self.user
+        )
+        self.client.login(username="author", password="Test1234")
+        self.urls = [
+            reverse("article_list"),
+            reverse("article_detail", kwargs={"pk": self.article.pk}),
+        ]
+
+    def revalidate(self, url, response):
+        return self.client.get(url, headers={"if-none-match": response["ETag"]})
+
+    def test_not_modified_without_rendering(self):
+        for url in self.urls:
+            with self.subTest(url=url):
+                first = self.client.get(url)
+                self.assertEqual(first.status_code, 200)
+                # The validator query only; session and user are cached.
+                with self.assertNumQueries(1):
+                    second = self.revalidate(url, first)
+                self.assertEqual(second.status_code, 304)
+                self.assertEqual(second["ETag"], first["ETag"])
+                self.assertFalse(second.templates)
+
+    def test_if_modified_since(self):
+        url = self.urls[1]
+        first = self.client.get(url)
+        response = self.client.get(
+            url, headers={"if-modified-since": first["Last-Modified"]}
+        )
+        self.assertEqual(response.status_code, 304)
+
+    def test_changes_invalidate(self):
+        responses = [self.client.get(url) for url in self.urls]
+        Comment.objects.create(article=self.article, author=self.reader, comment="Hi")
+        for url, response in zip(self.urls, responses):
+            self.assertEqual(self.revalidate(url, response).status_code, 200)
+
+        list_response = self.client.get(self.urls[0])
+        self.article.delete()
+        self.assertEqual(self.revalidate(self.urls[0], list_response).status_code, 200)
+
+    def test_varies_per_user(self):
+        responses = [self.client.get(url) for url in self.urls]
+        self.client.login(username="reader", password="Test1234")
+        for url, response in zip(self.urls, responses):
+            self.assertEqual(self.revalidate(url, response).status_code, 200)
+
+    def test_pending_messages_render_the_page(self):
+        url = self.urls[1]
+        first = self.client.get(url)
+        # Authors cannot comment on their own posts; this queues a message.
+        self.client.post(url, {"comment": "Mine"})
+        response = self.revalidate(url, first)
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, "You cannot comment on your own post.")
+
+
+class ExportNewspaperTests(TestCase):
+    """Ensure export_newspaper streams every record as NDJSON."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user(username="author", password="Test1234")
+        cls.reader = User.objects.create_user(username="reader", password="Test1234")
+        cls.article = Article.objects.create(
+            title="Exported", body="Body", author=cls.author
+        )
+        Comment.objects.create(article=cls.article, author=cls.reader, comment="Hi")
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.directory = directory.name
+
+    def export(self, name, *args):
+        path = os.path.join(self.directory, name)
+        err = StringIO()
+        call_command("export_newspaper", "--output", path, *args, stderr=err)
+        opener = gzip.open if name.endswith(".gz") else open
+        with opener(path, "rt", encoding="utf-8") as stream:
+            return [json.loads(line) for line in stream], err.getvalue()
+
+    def test_exports_every_model(self):
+        records, err = self.export("dump.ndjson")
+        self.assertEqual(
+            [record["model"] for record in records],
+            ["accounts.customuser"] * 2 + ["articles.article", "articles.comment"],
+        )
+        article = records[2]
+        self.assertEqual(article["article_id"], str(self.article.pk))
+        self.assertEqual(article["author"], "author")
+        self.assertNotIn("password", records[0])
+        self.assertIn("rows/s", err)
+
+    def test_gzip_and_model_selection(self):
+        records, _ = self.export("dump.ndjson.gz", "--models", "comments")
+        self.assertEqual(len(records), 1)
+        self.assertEqual(records[0]["author"], "reader")
+
+    def test_incremental_since_watermark(self):
+        _, err = self.export("full.ndjson")
+        watermark = err.strip().rsplit(" ", 1)[-1]
+        records, _ = self.export("none.ndjson", "--since", watermark)
+        self.assertEqual(records, [])
+
+        self.article.title = "Edited"
+        self.article.save()
+        records, _ = self.export("edit.ndjson", "--since", watermark)
+        self.assertEqual([record["title"] for record in records], ["Edited"])
+
+    def test_watermark_covers_rows_changed_during_the_export(self):
+        export = ExportCommand.export
+
+        def edit_before_comments(command, name, *args):
+            if name == "comments":
+                self.article.title = "Edited"
+                self.article.save()
+                Comment.objects.create(
+                    article=self.article, author=self.author, comment="Late"
+                )
+            export(command, name, *args)
+
+        with patch.object(ExportCommand, "export", edit_before_comments):
+            records, err = self.export("full.ndjson")
+        self.assertNotIn("Late", [record.get("comment") for record in records])
+        watermark = err.strip().rsplit(" ", 1)[-1]
+        records, _ = self.export("next.ndjson", "--since", watermark)
+        self.assertEqual(
+            [
+                (record["model"], record.get("title") or record.get("comment"))
+                for record in records
+            ],
+            [("articles.article", "Edited"), ("articles.comment", "Late")],
+        )
+
+
+class ImportArticlesTests(TestCase):
+    """Ensure import_articles loads, validates and resumes bulk imports."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user(username="author", password="Test1234")
+        cls.reader = User.objects.create_user(username="reader", password="Test1234")
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.directory = directory.name
+
+    def write(self, name, content):
+        path = os.path.join(self.directory, name)
+        with open(path, "w", encoding="utf-8") as stream:
+            stream.write(content)
+        return path
+
+    def load(self, path, *args):
+        call_command(
+            "import_articles", path, *args, stdout=StringIO(), stderr=StringIO()
+        )
+
+    def rejects(self, path):
+        with open(f"{path}.rejects.ndjson", encoding="utf-8") as stream:
+            return [json.loads(line) for line in stream]
+
+    def test_round_trip_from_export(self):
+        article = Article.objects.create(title="Old", body="Body", author=self.author)
+        Article.objects.filter(pk=article.pk).update(
+            created_at=timezone.now() - timezone.timedelta(days=30)
+        )
+        Comment.objects.create(article=article, author=self.reader, comment="Hi")
+        article.refresh_from_db()
+        path = os.path.join(self.directory, "dump.ndjson")
+        call_command("export_newspaper", "--output", path, stderr=StringIO())
+        Article.objects.all().delete()
+
+        self.load(path)
+        imported = Article.objects.get()
+        self.assertEqual(imported.pk, article.pk)
+        self.assertEqual(imported.created_at, article.created_at)
+        self.assertEqual(imported.snippet, article.snippet)
+        self.assertEqual(imported.comment_count, 1)
+        self.assertEqual(Comment.objects.get().author, self.reader)
+        self.assertEqual(self.rejects(path), [])
+
+    def test_csv_rows_are_validated(self):
+        path = self.write(
+            "articles.csv",
+            "title,body,author\n"
+            "Good,Fine body,author\n"
+            ",Missing title,author\n"
+            "Orphan,Body,nobody\n",
+        )
+        self.load(path)
+        self.assertEqual(
+            list(Article.objects.values_list("title", flat=True)), ["Good"]
+        )
+        rejects = self.rejects(path)
+        self.assertEqual([row["row"] for row in rejects], [2, 3])
+        self.assertIn("title", rejects[0]["errors"])
+        self.assertIn("author", rejects[1]["errors"])
+
+    def test_resumes_from_checkpoint_without_duplicates(self):
+        path = self.write(
+            "articles.csv",
+            "title,body,author\nFirst,Body,author\nSecond,Body,author\n",
+        )
+        self.load(path)
+        self.write("articles.csv.checkpoint", "1")
+        self.load(path)
+        self.assertEqual(Article.objects.count(), 2)
+        # Ids are derived from the rows, so a full rerun is a no-op too.
+        self.load(path, "--restart")
+        self.assertEqual(Article.objects.count(), 2)
+        self.assertFalse(os.path.exists(f"{path}.checkpoint"))
+
+    def test_rate_counts_only_rows_read_after_a_resume(self):
+        path = self.write(
+            "articles.csv",
+            "title,body,author\nOne,Body,author\nTwo,Body,author\n"
+            "Three,Body,author\n",
+        )
+        self.write("articles.csv.checkpoint", "2")
+        out = StringIO()
+        with patch(
+            "articles.management.commands.import_articles.time.monotonic",
+            side_effect=[0.0, 1.0],
+        ):
+            call_command("import_articles", path, stdout=out, stderr=StringIO())
+        self.assertIn("(1 rows/s)", out.getvalue())
+
+    def test_repeated_comments_are_rejected(self):
+        article = Article.objects.create(title="T", body="B", author=self.author)
+        path = self.write(
+            "comments.csv",
+            f"article_id,author,comment\n{article.pk},reader,One\n{article.pk},reader,Two\n",
+        )
+        self.load(path)
+        self.assertEqual(
+            list(article.comment_set.values_list("comment", flat=True)), ["One"]
+        )
+        self.assertEqual([row["row"] for row in self.rejects(path)], [2])
+
+    def test_malformed_records_are_rejected(self):
+        path = self.write(
+            "articles.ndjson",
+            '{"title": "First", "body": "Body", "author": "author"}\n'
+            "{not json\n"
+            "\n"
+            "[1, 2]\n"
+            '{"title": "Last", "body": "Body", "author": "author"}\n',
+        )
+        self.load(path)
+        self.assertEqual(Article.objects.count(), 2)
+        self.assertEqual([row["row"] for row in self.rejects(path)], [2, 4])
+        self.assertFalse(os.path.exists(f"{path}.checkpoint"))
+
+        path = self.write(
+            "articles.csv",
+            "title,body,author\nExtra,Body,author,surplus\nFine,Body,author\n",
+        )
+        self.load(path)
+        self.assertTrue(Article.objects.filter(title="Fine").exists())
+        rejects = self.rejects(path)
+        self.assertEqual([row["row"] for row in rejects], [1])
+        self.assertEqual(rejects[0]["data"]["extra"], ["surplus"])
+
+
+class ArticleAdminTests(TestCase):
+    """Ensure the article and comment admin pages stay cheap on big tables."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create_superuser(username="admin", password="pw")
+        cls.readers = [
+            User.objects.create_user(username=f"reader{index}") for index in range(25)
+        ]
+        cls.article = Article.objects.create(
+            title="Admin", body="Lorem ipsum dolor", author=cls.admin
+        )
+        Comment.objects.bulk_create(
+            Comment(article=cls.article, author=reader, comment=f"Comment {index}")
+            for index, reader in enumerate(cls.readers)
+        )
+
+    def setUp(self):
+        self.client.force_login(self.admin)
+
+    def changelist_queries(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse("admin:articles_article_changelist"))
+        self.assertEqual(response.status_code, 200)
+        return len(queries)
+
+    def test_changelist_queries_do_not_grow(self):
+        self.changelist_queries()  # caches the admin user
+        few = self.changelist_queries()
+        for reader in self.readers[:10]:
+            Article.objects.create(title="More", body="Body", author=reader)
+        self.assertEqual(self.changelist_queries(), few)
+
+    def test_comment_changelist_skips_article_bodies(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse("admin:articles_comment_changelist"))
+        self.assertContains(response, "Admin")
+        rows = [q["sql"] for q in queries if 'FROM "articles_comment"' in q["sql"]]
+        self.assertTrue(rows)
+        for sql in rows:
+            self.assertNotIn('"articles_article"."body"', sql)
+            self.assertNotIn('"articles_article"."body_html"', sql)
+
+    def test_search_uses_full_text_index(self):
+        Article.objects.create(title="Other", body="Nothing here", author=self.admin)
+        response = self.client.get(
+            reverse("admin:articles_article_changelist"), {"q": "ipsum"}
+        )
+        self.assertEqual(list(response.context["cl"].result_list), [self.article])
+
+    def test_change_page_shows_latest_comments_only(self):
+        response = self.client.get(
+            reverse("admin:articles_article_change", args=[self.article.pk])
+        )
+        formset = response.context["inline_admin_formsets"][0].formset
+        self.assertEqual(len(formset.forms), 20)
+        self.assertContains(response, f"?article__exact={self.article.pk}")
+        self.assertContains(response, "All 25 comments")
+
+        response = self.client.get(
+            reverse("admin:articles_comment_changelist"),
+            {"article__exact": self.article.pk},
+        )
+        self.assertEqual(response.context["cl"].result_count, 25)
+
+    def test_recount_action_runs_in_batches(self):
+        Article.objects.filter(pk=self.article.pk).update(comment_count=3)
+        self.client.post(
+            reverse("admin:articles_article_changelist"),
+            {
+                "action": "recount_selected_comments",
+                "_selected_action": [self.article.pk],
+            },
+        )
+        self.article.refresh_from_db()
+        self.assertEqual(self.article.comment_count, 25)
+
+
+class SeedAndBenchTests(TestCase):
+    """Ensure seed_newspaper generates consistent data and bench measures it."""
+
+    def seed(self, *args):
+        call_command(
+            "seed_newspaper",
+            "--users=10",
+            "--articles=20",
+            "--comments=60",
+            *args,
+            stdout=StringIO(),
+        )
+
+    def test_seed_is_reproducible_and_consistent(self):
+        self.seed()
+        first = sorted(Article.objects.values_list("pk", "comment_count"))
+        self.assertEqual(User.objects.count(), 10)
+        self.assertEqual(len(first), 20)
+        self.assertEqual(sum(count for _, count in first), Comment.objects.count())
+        self.assertFalse(
+            Comment.objects.filter(author=models.F("article__author")).exists()
+        )
+        self.assertFalse(
+            Comment.objects.filter(
+                created_at__lt=models.F("article__created_at")
+            ).exists()
+        )
+        with self.assertRaises(CommandError):
+            self.seed()
+        self.seed("--replace")
+        self.assertEqual(
+            sorted(Article.objects.values_list("pk", "comment_count")), first
+        )
+
+    def test_bench_reports_and_rolls_back(self):
+        self.seed()
+        articles = Article.objects.count()
+        path = os.path.join(tempfile.mkdtemp(), "bench.json")
+        self.addCleanup(os.remove, path)
+        call_command(
+            "bench",
+            "--requests=2",
+            "--warmup=0",
+            f"--output={path}",
+            stdout=StringIO(),
+        )
+        with open(path) as stream:
+            flows = json.load(stream)["flows"]
+        self.assertEqual(
+            set(flows),
+            {"list", "detail", "api_list", "api_detail", "create", "comment", "login"},
+        )
+        for summary in flows.values():
+            self.assertEqual(summary["requests"], 2)
+            self.assertEqual(summary["errors"], 0)
+        self.assertGreater(flows["list"]["queries"], 0)
+        self.assertEqual(Article.objects.count(), articles)
+        self.assertFalse(User.objects.filter(username__startswith="bench").exists())
+
+        out = StringIO()
+        call_command(
+            "bench",
+            "--requests=2",
+            "--warmup=0",
+            "--flows",
+            "list",
+            f"--compare={path}",
+            stdout=out,
+        )
+        self.assertIn("vs base", out.getvalue())
+
+    def test_bench_compression(self):
+        self.seed()
+        out = StringIO()
+        call_command("bench_compression", "--repeat=1", stdout=out)
+        self.assertIn("gzip-6*", out.getvalue())
+        self.assertIn(reverse("article_list"), out.getvalue())
+        self.assertFalse(User.objects.filter(username__startswith="bench").exists())
+
+
+@override_settings(ROOT_URLCONF=__name__)
+class AsyncViewTests(TestCase):
+    """Ensure the async list and detail views match their sync versions."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user(username="author", password="Test1234")
+        cls.reader = User.objects.create_user(username="reader", password="Test1234")
+        cls.article = Article.objects.create(
+            title="Async", body="Served without blocking", author=cls.author
+        )
+        Comment.objects.create(article=cls.article, author=cls.author, comment="Hi")
+
+    async def test_list(self):
+        await self.async_client.aforce_login(self.reader)
+        response = await self.async_client.get(reverse("article_list"))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(list(response.context["articles"]), [self.article])
+        self.assertContains(response, "Async")
+        response = await self.async_client.get(
+            reverse("article_list"), headers={"if-none-match": response["ETag"]}
+        )
+        self.assertEqual(response.status_code, 304)
+
+    async def test_detail(self):
+        await self.async_client.aforce_login(self.reader)
+        url = self.article.get_absolute_url()
+        response = await self.async_client.get(url)
+        self.assertContains(response, "Served without blocking")
+        self.assertEqual(
+            [comment.comment for comment in response.context["comments"]], ["Hi"]
+        )
+        self.assertIn("ETag", response)
+
+    async def test_comment_posts_through_the_async_view(self):
+        await self.async_client.aforce_login(self.reader)
+        url = self.article.get_absolute_url()
+        response = await self.async_client.post(url, {"comment": "Async comment"})
+        self.assertRedirects(response, url, fetch_redirect_response=False)
+        self.assertTrue(
+            await Comment.objects.filter(
+                article=self.article, author=self.reader
+            ).aexists()
+        )
+
+    async def test_login_required(self):
+        response = await self.async_client.get(reverse("article_list"))
+        self.assertEqual(response.status_code, 302)
+        self.assertIn(reverse("login"), response["Location"])
+
+    async def test_invalid_cursor_is_not_found(self):
+        await self.async_client.aforce_login(self.reader)
+        response = await self.async_client.get(
+            reverse("article_list"), {"cursor": "garbage"}
+        )
+        self.assertEqual(response.status_code, 404)
+
+
+class ArticleApiTests(TestCase):
+    """Ensure the JSON API pages, trims fields and honours ETags."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user(
+            username="writer", first_name="Ada", last_name="Lovelace"
+        )
+        cls.reader = User.objects.create_user(username="reader")
+        cls.articles = [
+            Article.objects.create(
+                title=f"Article {index}", body=f"Body {index}", author=cls.author
+            )
+            for index in range(3)
+        ]
+        cls.article = cls.articles[-1]
+        Comment.objects.create(article=cls.article, author=cls.reader, comment="Hi")
+
+    def setUp(self):
+        self.client.force_login(self.reader)
+
+    def test_login_required(self):
+        self.client.logout()
+        response = self.client.get(reverse("api_article_list"))
+        self.assertEqual(response.status_code, 401)
+        self.assertEqual(response.json(), {"error": "Authentication required."})
+
+    def test_list_pages_with_cursor(self):
+        with patch.object(ArticleListApiView, "per_page", 2):
+            first = self.client.get(reverse("api_article_list")).json()
+            self.assertEqual(
+                [article["title"] for article in first["results"]],
+                ["Article 2", "Article 1"],
+            )
+            self.assertIsNone(first["previous"])
+            second = self.client.get(first["next"]).json()
+        self.assertEqual(
+            [article["title"] for article in second["results"]], ["Article 0"]
+        )
+        self.assertIsNone(second["next"])
+        self.assertNotIn("body", first["results"][0])
+        self.assertEqual(
+            first["results"][0]["author"],
+            {"username": "writer", "name": "Ada Lovelace"},
+        )
+
+    def test_fields_limit_the_columns(self):
+        url = reverse("api_article_list")
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url, {"fields": "id,title"})
+        self.assertEqual(
+            response.json()["results"][0],
+            {"id": str(self.article.pk), "title": "Article 2"},
+        )
+        self.assertNotIn("snippet", queries[-1]["sql"])
+        self.assertNotIn("username", queries[-1]["sql"])
+
+        response = self.client.get(url, {"fields": "title,password"})
+        self.assertEqual(response.status_code, 400)
+        self.assertIn("password", response.json()["error"])
+
+    def test_detail(self):
+        url = reverse("api_article_detail", args=[self.article.pk])
+        article = self.client.get(url).json()
+        self.assertEqual(article["body"], "Body 2")
+        self.assertEqual(article["body_html"], "<p>Body 2</p>")
+        self.assertEqual(article["comment_count"], 1)
+
+        # Rows awaiting render_articles are rendered on the fly.
+        Article.objects.update(body_html="", body_html_version=0)
+        article = self.client.get(url, {"fields": "body_html"}).json()
+        self.assertEqual(article, {"body_html": "<p>Body 2</p>"})
+
+        missing = reverse("api_article_detail", args=[uuid.uuid4()])
+        self.assertEqual(self.client.get(missing).status_code, 404)
+
+    def test_comments(self):
+        url = reverse("api_article_comments", args=[self.article.pk])
+        comments = self.client.get(url).json()["results"]
+        self.assertEqual(
+            [
+                (comment["comment"], comment["author"]["username"])
+                for comment in comments
+            ],
+            [("Hi", "reader")],
+        )
+        quiet = reverse("api_article_comments", args=[self.articles[0].pk])
+        self.assertEqual(self.client.get(quiet).json()["results"], [])
+        missing = reverse("api_article_comments", args=[uuid.uuid4()])
+        self.assertEqual(self.client.get(missing).status_code, 404)
+        response = self.client.get(url, {"cursor": "garbage"})
+        self.assertEqual(response.status_code, 400)
+
+    def test_etag(self):
+        url = reverse("api_article_detail", args=[self.article.pk])
+        etag = self.client.get(url)["ETag"]
+        response = self.client.get(url, headers={"if-none-match": etag})
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response.content, b"")
+
+        User.objects.filter(pk=self.author.pk).update(first_name="Augusta")
+        response = self.client.get(url, headers={"if-none-match": etag})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()["author"]["name"], "Augusta Lovelace")
+
+
+@cached_auth()
+class SyndicationTests(TestCase):
+    """Ensure feeds and sitemaps are cached, invalidated and conditional."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user(username="writer", first_name="Ada")
+        cls.other = User.objects.create_user(username="other")
+        cls.article = Article.objects.create(
+            title="<script>News</script>", body="<b>Feed</b> body", author=cls.author
+        )
+        cls.other_article = Article.objects.create(
+            title="Elsewhere", body="Other body", author=cls.other
+        )
+
+    def setUp(self):
+        cache.clear()
+        self.client.force_login(self.other)
+
+    def test_anonymous_readers_are_refused(self):
+        self.client.get(reverse("article_feed"))
+        self.client.logout()
+        for url in [
+            reverse("article_feed"),
+            reverse("author_feed_atom", kwargs={"pk": self.author.pk}),
+            reverse("article_sitemap_index"),
+        ]:
+            with self.subTest(url=url):
+                self.assertEqual(self.client.get(url).status_code, 401)
+        self.assertNotContains(self.client.get(reverse("home")), "atom+xml")
+
+    def test_feeds_list_articles(self):
+        rss = self.client.get(reverse("article_feed"))
+        self.assertEqual(rss["Content-Type"], "application/rss+xml; charset=utf-8")
+        self.assertContains(rss, "&amp;lt;Script&amp;gt;News&amp;lt;/Script&amp;gt;")
+        self.assertContains(rss, "&amp;lt;b&amp;gt;Feed&amp;lt;/b&amp;gt; body")
+        self.assertContains(rss, "Elsewhere")
+        self.assertContains(rss, self.article.get_absolute_url())
+
+        atom = self.client.get(
+            reverse("author_feed_atom", kwargs={"pk": self.author.pk})
+        )
+        self.assertContains(atom, "articles by Ada")
+        self.assertContains(atom, self.article.get_absolute_url())
+        self.assertNotContains(atom, "Elsewhere")
+
+        missing = reverse("author_feed", kwargs={"pk": uuid.uuid4()})
+        self.assertEqual(self.client.get(missing).status_code, 404)
+
+    def test_repeat_polls_are_cached_and_conditional(self):
+        url = reverse("article_feed_atom")
+        response = self.client.get(url)
+        self.assertIn("Last-Modified", response)
+        self.assertIn("private", response["Cache-Control"])
+        with self.assertNumQueries(0):
+            cached = self.client.get(url)
+            not_modified = self.client.get(
+                url, headers={"if-none-match": response["ETag"]}
+            )
+        self.assertEqual(cached.content, response.content)
+        self.assertEqual(not_modified.status_code, 304)
+
+    def test_saving_an_article_drops_its_documents(self):
+        feed = reverse("article_feed")
+        other_feed = reverse("author_feed", kwargs={"pk": self.other.pk})
+        self.client.get(feed)
+        self.client.get(other_feed)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.article.title = "Edited"
+            self.article.save()
+        with self.assertNumQueries(0):
+            self.client.get(other_feed)
+        self.assertContains(self.client.get(feed), "Edited")
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.article.delete()
+        self.assertNotContains(self.client.get(feed), "Edited")
+
+    def test_sitemaps(self):
+        index = self.client.get(reverse("article_sitemap_index"))
+        self.assertEqual(index["Content-Type"], "application/xml")
+        created = timezone.localtime(self.article.created_at)
+        month_url = reverse(
+            "article_sitemap",
+            kwargs={"year": f"{created:%Y}", "month": f"{created:%m}"},
+        )
+        self.assertContains(index, f"http://testserver{month_url}</loc>")
+
+        sitemap = self.client.get(month_url)
+        self.assertContains(sitemap, self.article.get_absolute_url())
+        self.assertContains(sitemap, self.other_article.get_absolute_url())
+        self.assertEqual(self.client.get(month_url, {"p": 2}).status_code, 404)
+        self.assertEqual(self.client.get(month_url, {"p": 0}).status_code, 404)
+        empty = reverse("article_sitemap", kwargs={"year": "1999", "month": "01"})
+        self.assertEqual(self.client.get(empty).status_code, 404)
+        invalid = reverse("article_sitemap", kwargs={"year": "2024", "month": "13"})
+        self.assertEqual(self.client.get(invalid).status_code, 404)
@@ -1,16 +1,58 @@
-from django.urls import path
+from django.conf import settings
+from django.urls import path, re_path
+from .syndication import (
+    AuthorArticlesAtomFeed,
+    AuthorArticlesFeed,
+    LatestArticlesAtomFeed,
+    LatestArticlesFeed,
+    SitemapIndexView,
+    SitemapView,
+)
+from .api import ArticleCommentsApiView, ArticleDetailApiView, ArticleListApiView
 from .views import (
     ArticleListView,
     ArticleDetailView,
     ArticleEditView,
     ArticleDeleteView,
     ArticleCreateView,
+    ArticleSearchView,
+    ArticleCommentsView,
+    AsyncArticleListView,
+    AsyncArticleDetailView,
 )
 
+if settings.ASYNC_VIEWS:
+    list_view, detail_view = AsyncArticleListView, AsyncArticleDetailView
+else:
+    list_view, detail_view = ArticleListView, ArticleDetailView
+
 urlpatterns = [
-    path("", ArticleListView.as_view(), name="article_list"),
-    path("<uuid:pk>/", ArticleDetailView.as_view(), name="article_detail"),
+    path("", list_view.as_view(), name="article_list"),
+    path("<uuid:pk>/", detail_view.as_view(), name="article_detail"),
+    path("<uuid:pk>/comments/", ArticleCommentsView.as_view(), name="article_comments"),
     path("<uuid:pk>/edit/", ArticleEditView.as_view(), name="article_edit"),
     path("<uuid:pk>/delete/", ArticleDeleteView.as_view(), name="article_delete"),
     path("new/", ArticleCreateView.as_view(), name="article_create"),
+    path("search/", ArticleSearchView.as_view(), name="article_search"),
+    path("api/", ArticleListApiView.as_view(), name="api_article_list"),
+    path("api/<uuid:pk>/", ArticleDetailApiView.as_view(), name="api_article_detail"),
+    path(
+        "api/<uuid:pk>/comments/",
+        ArticleCommentsApiView.as_view(),
+        name="api_article_comments",
+    ),
+    path("feeds/rss/", LatestArticlesFeed(), name="article_feed"),
+    path("feeds/atom/", LatestArticlesAtomFeed(), name="article_feed_atom"),
+    path("feeds/authors/<uuid:pk>/rss/", AuthorArticlesFeed(), name="author_feed"),
+    path(
+        "feeds/authors/<uuid:pk>/atom/",
+        AuthorArticlesAtomFeed(),
+        name="author_feed_atom",
+    ),
+    path("sitemap.xml", SitemapIndexView.as_view(), name="article_sitemap_index"),
+    re_path(
+        r"^sitemap-(?P<year>[0-9]{4})-(?P<month>[0-9]{2})\.xml$",
+        SitemapView.as_view(),
+        name="article_sitemap",
+    ),
 ]
@@ -1,53 +1,241 @@
+import hashlib
+
+from asgiref.sync import sync_to_async
 from django.urls import reverse_lazy, reverse
+from django.http import Http404, JsonResponse
+from django.middleware.csrf import get_token
 from django.shortcuts import redirect
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import http_date, quote_etag, urlencode
 from django.views import View
 from django.contrib import messages
+from django.db import IntegrityError, transaction
 from django.views.generic.detail import SingleObjectMixin
 from django.views.generic import ListView, DetailView, FormView
 from django.views.generic.edit import CreateView, UpdateView, DeleteView
-from django.contrib.auth.mixins import LoginRequiredMixin, UserPassesTestMixin
+from django.contrib.auth.mixins import (
+    AccessMixin,
+    LoginRequiredMixin,
+    UserPassesTestMixin,
+)
 
 from .models import Article, Comment
-from .forms import CommentForm
+from .forms import ArticleEditForm, ArticleForm, CommentForm
+from .pagination import CursorPaginator, InvalidCursor
+from .search import highlight, search_articles
+
+
+class CursorPaginationMixin:
+    """Paginate a ListView by keyset on its ordering instead of OFFSET."""
+
+    def paginate_queryset(self, queryset, page_size):
+        paginator = CursorPaginator(queryset, page_size, self.get_ordering())
+        try:
+            page = paginator.page(self.request.GET.get("cursor"))
+        except InvalidCursor as e:
+            raise Http404(str(e))
+        return (paginator, page, page.object_list, page.has_other_pages())
+
+
+class ConditionalGetMixin:
+    """
+    Answer If-None-Match / If-Modified-Since with a 304 before any of the
+    page is loaded or rendered.
+
+    Subclasses implement get_validator_state() with a cheap query returning
+    the values the page depends on and when it last changed (or None). The
+    user and their CSRF cookie are part of the ETag too, since pages show
+    per-user controls and embed a CSRF token. Requests with pending messages
+    always get a full page so the messages are shown.
+    """
+
+    def dispatch(self, request, *args, **kwargs):
+        if request.method not in ("GET", "HEAD"):
+            return super().dispatch(request, *args, **kwargs)
+        validators = self.get_validators()
+        response = self.get_not_modified_response(validators)
+        if response is None:
+            response = super().dispatch(request, *args, **kwargs)
+        return self.add_validator_headers(response, validators)
+
+    def get_not_modified_response(self, validators):
+        if validators is None:
+            return None
+        etag, last_modified = validators
+        return get_conditional_response(
+            self.request, etag=etag, last_modified=last_modified
+        )
+
+    def add_validator_headers(self, response, validators):
+        if validators is not None and response.status_code in (200, 304):
+            etag, last_modified = validators
+            response.headers["ETag"] = etag
+            if last_modified is not None:
+                response.headers["Last-Modified"] = http_date(last_modified)
+            patch_cache_control(response, private=True, no_cache=True)
+        return response
+
+    def get_validators(self):
+        if not self.request.user.is_authenticated:
+            return None
+        if len(messages.get_messages(self.request)):
+            return None
+        return self.make_validators(self.get_validator_state())
+
+    def make_validators(self, state):
+        if state is None:
+            return None
+        values, last_modified = state
+        get_token(self.request)  # Settles the secret the page's tokens use.
+        key = repr(
+            (
+                self.request.user.pk,
+                self.request.META["CSRF_COOKIE"],
+                values,
+            )
+        )
+        etag = quote_etag(hashlib.sha256(key.encode()).hexdigest())
+        if last_modified is not None:
+            last_modified = int(last_modified.timestamp())
+        return etag, last_modified
+
+    def get_validator_state(self):
+        raise NotImplementedError
 
 
 # Create your views here.
-class ArticleListView(LoginRequiredMixin, ListView):
+class ArticleListView(
+    LoginRequiredMixin, ConditionalGetMixin, CursorPaginationMixin, ListView
+):
     model = Article
     template_name = "articles/article_list.html"
     context_object_name = "articles"
+    paginate_by = 12
+    ordering = ("-created_at", "-article_id")
+
+    def get_queryset(self):
+        # Cards only show the stored snippet, so never transfer the body.
+        return (
+            super().get_queryset().select_related("author").defer("body", "body_html")
+        )
+
+    def get_validator_state(self):
+        """
+        The keys and timestamps of the rows on the requested page. No
+        Last-Modified is sent: deleting an article changes the page without
+        making anything on it newer.
+        """
+        try:
+            page = self.get_validator_paginator().page(self.request.GET.get("cursor"))
+        except InvalidCursor:
+            return None
+        return self.page_state(page)
+
+    def get_validator_paginator(self):
+        queryset = Article.objects.only(
+            "article_id", "created_at", "updated_at", "comments_updated_at"
+        )
+        return CursorPaginator(
+            queryset, self.get_paginate_by(queryset), self.get_ordering()
+        )
+
+    def page_state(self, page):
+        values = [
+            (article.pk, article.updated_at, article.comments_updated_at)
+            for article in page
+        ]
+        return (values, page.has_next(), page.has_previous()), None
+
+
+class ArticleSearchView(LoginRequiredMixin, CursorPaginationMixin, ListView):
+    template_name = "articles/article_search.html"
+    context_object_name = "articles"
+    paginate_by = 12
+    ordering = ("-rank", "-article_id")
+
+    def get_queryset(self):
+        self.query = self.request.GET.get("q", "").strip()
+        articles = Article.objects.select_related("author").defer("body", "body_html")
+        return search_articles(articles, self.query)
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        context["query"] = self.query
+        for article in context["articles"]:
+            article.highlight = highlight(article.headline)
+        return context
+
+
+class AuthorRequiredMixin(UserPassesTestMixin):
+    """
+    Let only the article's author through. The article is fetched once and
+    shared by the check and the view's own get_object() calls.
+    """
 
+    def get_object(self, queryset=None):
+        if queryset is not None:
+            return super().get_object(queryset)
+        if not hasattr(self, "_article"):
+            self._article = super().get_object()
+        return self._article
 
-class ArticleEditView(LoginRequiredMixin, UserPassesTestMixin, UpdateView):
+    def test_func(self):
+        return self.get_object().author_id == self.request.user.pk
+
+
+class ArticleEditView(LoginRequiredMixin, AuthorRequiredMixin, UpdateView):
     model = Article
     template_name = "articles/article_edit.html"
-    fields = ["title", "body"]
+    form_class = ArticleEditForm
     context_object_name = "article"
 
-    def test_func(self):
-        return self.get_object().author == self.request.user
+    def form_valid(self, form):
+        # Lock the row so a concurrent edit cannot slip in between the
+        # version check and the save.
+        with transaction.atomic():
+            current = (
+                Article.objects.select_for_update()
+                .values_list("version", flat=True)
+                .get(pk=self.object.pk)
+            )
+            if form.cleaned_data["version"] != current:
+                form.reject_stale(current)
+                response = self.form_invalid(form)
+                response.status_code = 409
+                return response
+            return super().form_valid(form)
 
 
-class ArticleDeleteView(LoginRequiredMixin, UserPassesTestMixin, DeleteView):
+class ArticleDeleteView(LoginRequiredMixin, AuthorRequiredMixin, DeleteView):
     model = Article
     template_name = "articles/article_delete.html"
     success_url = reverse_lazy("article_list")
 
-    def test_func(self):
-        return self.get_object().author == self.request.user
-
 
 class ArticleCreateView(LoginRequiredMixin, CreateView):
     model = Article
     template_name = "articles/article_create.html"
-    fields = ["title", "body"]
+    form_class = ArticleForm
 
     def form_valid(self, form):
         form.instance.author = self.request.user
         return super().form_valid(form)
 
 
-class ArticleDetailView(LoginRequiredMixin, View):
+class ArticleDetailView(LoginRequiredMixin, ConditionalGetMixin, View):
+    def get_validator_state(self):
+        return self.article_state(self.get_validator_queryset().first())
+
+    def get_validator_queryset(self):
+        return Article.objects.filter(pk=self.kwargs["pk"]).values_list(
+            "updated_at", "comments_updated_at", "body_html_version"
+        )
+
+    def article_state(self, state):
+        if state is None:
+            return None
+        return state, max(filter(None, state[:2]))
+
     def get(self, request, *args, **kwargs):
         view = CommentGet.as_view()
         return view(request, *args, **kwargs)
@@ -57,9 +245,68 @@ class ArticleDetailView(LoginRequiredMixin, View):
         return view(request, *args, **kwargs)
 
 
-class CommentGet(DetailView):
+class CommentPageMixin:
+    """
+    Load an article's comments a page at a time, oldest first. The detail
+    page renders the first page; ArticleCommentsView serves the rest.
+    """
+
+    comments_per_page = 20
+    comment_ordering = ("created_at", "comment_id")
+
+    def get_comment_paginator(self, article_id):
+        comments = Comment.objects.filter(article_id=article_id).select_related(
+            "author"
+        )
+        return CursorPaginator(comments, self.comments_per_page, self.comment_ordering)
+
+    def get_comment_page(self, article_id, cursor=None):
+        return self.get_comment_paginator(article_id).page(cursor)
+
+    def get_more_comments_url(self, article_id, page):
+        if not page.has_next():
+            return None
+        url = reverse("article_comments", kwargs={"pk": article_id})
+        return f"{url}?{urlencode({'cursor': page.next_cursor})}"
+
+    def get_context_data(self, **kwargs):
+        if "comments" not in kwargs:
+            kwargs["comments"] = self.get_comment_page(self.object.pk)
+        kwargs["more_comments_url"] = self.get_more_comments_url(
+            self.object.pk, kwargs["comments"]
+        )
+        return super().get_context_data(**kwargs)
+
+
+class ArticleCommentsView(LoginRequiredMixin, CommentPageMixin, View):
+    """Further pages of an article's comments, as JSON."""
+
+    def get(self, request, *args, **kwargs):
+        try:
+            page = self.get_comment_page(self.kwargs["pk"], request.GET.get("cursor"))
+        except InvalidCursor as e:
+            raise Http404(str(e))
+        return JsonResponse(
+            {
+                "comments": [
+                    {
+                        "comment_id": comment.pk,
+                        "author": comment.author.username,
+                        "comment": comment.comment,
+                        "created_at": comment.created_at,
+                    }
+                    for comment in page
+                ],
+                "next": self.get_more_comments_url(self.kwargs["pk"], page),
+            }
+        )
+
+
+class CommentGet(CommentPageMixin, DetailView):
     model = Article
     template_name = "articles/article_detail.html"
+    # The page shows the stored body HTML, never the raw body.
+    queryset = Article.objects.select_related("author").defer("body")
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
@@ -67,7 +314,7 @@ class CommentGet(DetailView):
         return context
 
 
-class CommentPost(SingleObjectMixin, FormView):
+class CommentPost(CommentPageMixin, SingleObjectMixin, FormView):
     model = Article
     form_class = CommentForm
     template_name = "articles/article_detail.html"
@@ -75,24 +322,128 @@ class CommentPost(SingleObjectMixin, FormView):
     def post(self, request, *args, **kwargs):
         self.object = self.get_object()
         # prevent users from commenting on their own posts.
-        if self.request.user == self.object.author:
+        if self.object.author_id == self.request.user.pk:
             messages.error(request, "You cannot comment on your own post.")
             return redirect("article_detail", pk=self.object.pk)
 
-        # prevent a user from making more than one comment.
-        if Comment.objects.filter(author=self.request.user, article=self.object):
-            messages.error(request, "You have already commented on this post.")
-            return redirect("article_detail", pk=self.object.pk)
-
         return super().post(request, *args, **kwargs)
 
     def form_valid(self, form):
         comment = form.save(commit=False)
         comment.article = self.object
         comment.author = self.request.user
-        comment.save()
+        # prevent a user from making more than one comment; the unique
+        # constraint catches double submits that a pre-check would race.
+        try:
+            comment.save()
+        except IntegrityError:
+            # Only comment_one_per_author means "already commented"; anything
+            # else (the article deleted meanwhile) is a real error.
+            if not Comment.objects.filter(
+                article=self.object, author=self.request.user
+            ).exists():
+                raise
+            messages.error(self.request, "You have already commented on this post.")
+            return redirect("article_detail", pk=self.object.pk)
         return super().form_valid(form)
 
     def get_success_url(self):
         article = self.object
         return reverse("article_detail", kwargs={"pk": article.pk})
+
+
+# Async versions of the read path, routed instead of the views above when
+# settings.ASYNC_VIEWS is on and served by an ASGI server. They reuse the
+# sync views' queries and templates, awaiting the database through the async
+# ORM so one worker can hold many slow requests open at once.
+
+
+class AsyncLoginRequiredMixin(AccessMixin):
+    """LoginRequiredMixin that loads the user without blocking."""
+
+    async def dispatch(self, request, *args, **kwargs):
+        # Resolve the lazy user now so templates never query from a thread.
+        request.user = await request.auser()
+        if not request.user.is_authenticated:
+            return self.handle_no_permission()
+        return await super().dispatch(request, *args, **kwargs)
+
+
+class AsyncConditionalGetMixin(ConditionalGetMixin):
+    """ConditionalGetMixin for async views; get_validator_state() is awaited."""
+
+    async def dispatch(self, request, *args, **kwargs):
+        # Call View.dispatch() directly: the sync parents' dispatch() methods
+        # would run their checks again, synchronously.
+        if request.method not in ("GET", "HEAD"):
+            return await View.dispatch(self, request, *args, **kwargs)
+        validators = await self.get_validators()
+        response = self.get_not_modified_response(validators)
+        if response is None:
+            response = await View.dispatch(self, request, *args, **kwargs)
+        return self.add_validator_headers(response, validators)
+
+    async def get_validators(self):
+        if not self.request.user.is_authenticated:
+            return None
+        # Messages may be stored in the session, which loads synchronously.
+        if await sync_to_async(len)(messages.get_messages(self.request)):
+            return None
+        return self.make_validators(await self.get_validator_state())
+
+
+class AsyncArticleListView(
+    AsyncLoginRequiredMixin, AsyncConditionalGetMixin, ArticleListView
+):
+    async def get_validator_state(self):
+        try:
+            page = await self.get_validator_paginator().apage(
+                self.request.GET.get("cursor")
+            )
+        except InvalidCursor:
+            return None
+        return self.page_state(page)
+
+    async def get(self, request, *args, **kwargs):
+        self.object_list = self.get_queryset()
+        paginator = CursorPaginator(
+            self.object_list,
+            self.get_paginate_by(self.object_list),
+            self.get_ordering(),
+        )
+        try:
+            page = await paginator.apage(request.GET.get("cursor"))
+        except InvalidCursor as e:
+            raise Http404(str(e))
+        self.page = (paginator, page, page.object_list, page.has_other_pages())
+        return self.render_to_response(self.get_context_data())
+
+    def paginate_queryset(self, queryset, page_size):
+        return self.page
+
+
+class AsyncCommentGet(CommentGet):
+    async def get(self, request, *args, **kwargs):
+        try:
+            self.object = await self.get_queryset().aget(pk=self.kwargs["pk"])
+        except Article.DoesNotExist:
+            raise Http404("No article found matching the query")
+        comments = await self.get_comment_paginator(self.object.pk).apage()
+        context = self.get_context_data(object=self.object, comments=comments)
+        return self.render_to_response(context)
+
+
+class AsyncArticleDetailView(
+    AsyncLoginRequiredMixin, AsyncConditionalGetMixin, ArticleDetailView
+):
+    async def get_validator_state(self):
+        return self.article_state(await self.get_validator_queryset().afirst())
+
+    async def get(self, request, *args, **kwargs):
+        view = AsyncCommentGet.as_view()
+        return await view(request, *args, **kwargs)
+
+    async def post(self, request, *args, **kwargs):
+        # Writes stay synchronous; they are not the hot path.
+        view = sync_to_async(CommentPost.as_view())
+        return await view(request, *args, **kwargs)
@@ -0,0 +1,76 @@
+"""
+Admin building blocks for tables too large to count or change in one go.
+"""
+
+from django.contrib import admin
+from django.core.paginator import Paginator
+from django.db import connections, transaction
+from django.utils.functional import cached_property
+
+# Rows handled per transaction by the batched admin actions.
+ADMIN_BATCH_SIZE = 1000
+
+
+def estimated_count(queryset):
+    """
+    The planner's row estimate for the queryset's table, or None where the
+    database keeps none (SQLite, or a PostgreSQL table never analyzed).
+    """
+    connection = connections[queryset.db]
+    if connection.vendor != "postgresql":
+        return None
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT reltuples::bigint FROM pg_class WHERE oid = %s::regclass",
+            [connection.ops.quote_name(queryset.model._meta.db_table)],
+        )
+        row = cursor.fetchone()
+    return row[0] if row and row[0] >= 0 else None
+
+
+class EstimatedCountPaginator(Paginator):
+    """
+    Count an unfiltered changelist from the table statistics instead of a
+    COUNT(*), which reads the whole table on PostgreSQL. Filtered lists and
+    small tables are counted exactly.
+    """
+
+    threshold = 10000
+
+    @cached_property
+    def count(self):
+        queryset = self.object_list
+        if not queryset.query.where and not queryset.query.distinct:
+            estimate = estimated_count(queryset)
+            if estimate is not None and estimate >= self.threshold:
+                return estimate
+        return super().count
+
+
+def in_batches(queryset, batch_size=ADMIN_BATCH_SIZE):
+    """Yield the primary keys of ``queryset`` in lists of ``batch_size``."""
+    queryset = queryset.order_by("pk")
+    last_pk = None
+    while True:
+        batch = queryset if last_pk is None else queryset.filter(pk__gt=last_pk)
+        pks = list(batch.values_list("pk", flat=True)[:batch_size])
+        if not pks:
+            return
+        yield pks
+        last_pk = pks[-1]
+
+
+class LargeTableAdminMixin:
+    """
+    ModelAdmin defaults for large tables: estimated counts, no second count
+    of the unfiltered table, and deletions committed in batches so a "select
+    all" never holds one huge transaction.
+    """
+
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+
+    def delete_queryset(self, request, queryset):
+        for pks in in_batches(queryset):
+            with transaction.atomic(using=queryset.db):
+                self.model._default_manager.filter(pk__in=pks).delete()
@@ -0,0 +1,66 @@
+"""
+Cache backends that count hits and misses.
+
+The counters live in the process that served the request, grouped by key with
+its last ``.``/``:`` separated segment dropped, so that e.g. every rendered
+article card is counted under ``template.cache.article_card``. Lookups are
+also added to the current request's metrics (see ``metrics``).
+"""
+
+import re
+import threading
+from collections import defaultdict
+
+from django.core.cache.backends.filebased import FileBasedCache as BaseFileBasedCache
+from django.core.cache.backends.locmem import LocMemCache as BaseLocMemCache
+
+from . import metrics
+
+_MISSING = object()
+
+
+def key_group(key):
+    return re.sub(r"[.:][^.:]*$", "", key)
+
+
+class CacheStats:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counts = defaultdict(lambda: {"hits": 0, "misses": 0})
+
+    def record(self, key, hit):
+        with self._lock:
+            self._counts[key_group(key)]["hits" if hit else "misses"] += 1
+        metrics.record_cache(hit)
+
+    def snapshot(self):
+        with self._lock:
+            groups = {group: dict(counts) for group, counts in self._counts.items()}
+        hits = sum(counts["hits"] for counts in groups.values())
+        misses = sum(counts["misses"] for counts in groups.values())
+        return {"hits": hits, "misses": misses, "groups": groups}
+
+    def reset(self):
+        with self._lock:
+            self._counts.clear()
+
+
+stats = CacheStats()
+
+
+class CacheStatsMixin:
+    def get(self, key, default=None, version=None):
+        value = super().get(key, _MISSING, version)
+        stats.record(key, hit=value is not _MISSING)
+        return default if value is _MISSING else value
+
+    # BaseCache.get_many() and get_or_set() look each key up through get(), so
+    # they are counted there; neither backend below overrides them.
+
+
+class LocMemCache(CacheStatsMixin, BaseLocMemCache):
+    pass
+
+
+class FileBasedCache(CacheStatsMixin, BaseFileBasedCache):
+    pass
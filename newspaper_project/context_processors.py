@@ -0,0 +1,6 @@
+from django.conf import settings
+
+
+def fragment_cache(request):
+    """Expose the timeout used by {% cache %} blocks in the templates."""
+    return {"fragment_cache_timeout": settings.FRAGMENT_CACHE_TIMEOUT}
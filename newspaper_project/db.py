@@ -0,0 +1,43 @@
+"""
+Connection reuse statistics for the database, in the process that serves the
+request. See DB_POOL_MODE in settings.
+"""
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections
+
+
+def pool_stats(using=DEFAULT_DB_ALIAS):
+    connection = connections[using]
+    stats = {"mode": settings.DB_POOL_MODE, "vendor": connection.vendor}
+    # Only the PostgreSQL backend has a pool, and only when it is configured.
+    pool = getattr(connection, "pool", None)
+    if pool is None:
+        stats.update(
+            conn_max_age=connection.settings_dict["CONN_MAX_AGE"],
+            health_checks=connection.settings_dict["CONN_HEALTH_CHECKS"],
+            # Whether this thread's connection outlived the previous request.
+            open=connection.connection is not None,
+        )
+        return stats
+
+    # psycopg_pool leaves counters that are still zero out of get_stats().
+    raw = pool.get_stats()
+    queued = raw.get("requests_queued", 0)
+    wait_ms = raw.get("requests_wait_ms", 0)
+    stats.update(
+        min_size=raw["pool_min"],
+        max_size=raw["pool_max"],
+        size=raw["pool_size"],
+        in_use=raw["pool_size"] - raw["pool_available"],
+        idle=raw["pool_available"],
+        waiting=raw.get("requests_waiting", 0),
+        requests=raw.get("requests_num", 0),
+        queued=queued,
+        wait_ms=wait_ms,
+        average_wait_ms=wait_ms / queued if queued else 0,
+        timeouts=raw.get("requests_errors", 0),
+        connections_opened=raw.get("connections_num", 0),
+        connections_lost=raw.get("connections_lost", 0),
+    )
+    return stats
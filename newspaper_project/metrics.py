@@ -0,0 +1,134 @@
+"""
+Per-request performance measurements, collected by
+``newspaper_project.middleware.PerformanceMiddleware``.
+
+While a request is served its ``RequestMetrics`` is reachable through the
+``current`` context variable, so the database wrapper and the cache backends
+can add to it without being handed the request. Finished requests are folded
+into ``routes``: rolling windows of recent samples per URL name, from which
+percentiles are computed on demand. Like the cache counters, everything lives
+in the process that served the requests.
+"""
+
+import threading
+import time
+from collections import defaultdict, deque
+from contextvars import ContextVar
+
+current = ContextVar("request_metrics", default=None)
+
+PERCENTILES = (50, 95, 99)
+
+
+class RequestMetrics:
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.total_time = 0.0
+        self.queries = 0
+        self.sql_time = 0.0
+        self.render_time = 0.0
+        self.cache_hits = 0
+        self.cache_misses = 0
+        # Body size before and after compression; streamed bodies are not
+        # counted.
+        self.response_bytes = None
+        self.sent_bytes = 0
+        self.compress_time = 0.0
+
+    def finish(self):
+        self.total_time = time.perf_counter() - self.started
+
+    def sample(self):
+        """The values aggregated per route, times in milliseconds."""
+        return {
+            "total_ms": self.total_time * 1000,
+            "sql_ms": self.sql_time * 1000,
+            "render_ms": self.render_time * 1000,
+            "queries": self.queries,
+            "cache_hits": self.cache_hits,
+            "cache_misses": self.cache_misses,
+            "response_bytes": self.response_bytes or self.sent_bytes,
+            "sent_bytes": self.sent_bytes,
+            "compress_ms": self.compress_time * 1000,
+        }
+
+    def server_timing(self):
+        return ", ".join(
+            [
+                f"total;dur={self.total_time * 1000:.1f}",
+                f'db;dur={self.sql_time * 1000:.1f};desc="{self.queries} queries"',
+                f"render;dur={self.render_time * 1000:.1f}",
+                f'cache;desc="{self.cache_hits} hits, {self.cache_misses} misses"',
+                f"compress;dur={self.compress_time * 1000:.1f};"
+                f'desc="{self.response_bytes or self.sent_bytes} to '
+                f'{self.sent_bytes} bytes"',
+            ]
+        )
+
+
+def time_query(execute, sql, params, many, context):
+    """Database execute wrapper adding each query to the current request."""
+    metrics = current.get()
+    if metrics is None:
+        return execute(sql, params, many, context)
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        metrics.queries += 1
+        metrics.sql_time += time.perf_counter() - started
+
+
+def record_cache(hit):
+    """Called by the cache backends for every key looked up."""
+    metrics = current.get()
+    if metrics is not None:
+        if hit:
+            metrics.cache_hits += 1
+        else:
+            metrics.cache_misses += 1
+
+
+def percentile(values, rank):
+    """Nearest-rank percentile of an already sorted list."""
+    index = max(0, -(-len(values) * rank // 100) - 1)
+    return values[index]
+
+
+class RouteMetrics:
+    """Rolling windows of the latest samples for each URL name."""
+
+    def __init__(self, window=1000):
+        self.window = window
+        self._lock = threading.Lock()
+        self._counts = defaultdict(int)
+        self._samples = defaultdict(lambda: deque(maxlen=self.window))
+
+    def record(self, route, sample):
+        with self._lock:
+            self._counts[route] += 1
+            self._samples[route].append(sample)
+
+    def snapshot(self):
+        with self._lock:
+            samples = {route: list(window) for route, window in self._samples.items()}
+            counts = dict(self._counts)
+        routes = {}
+        for route, window in sorted(samples.items()):
+            summary = {"requests": counts[route], "window": len(window)}
+            for name in window[0]:
+                values = sorted(sample[name] for sample in window)
+                summary[name] = {
+                    f"p{rank}": round(percentile(values, rank), 2)
+                    for rank in PERCENTILES
+                }
+            routes[route] = summary
+        return routes
+
+    def reset(self):
+        with self._lock:
+            self._counts.clear()
+            self._samples.clear()
+
+
+routes = RouteMetrics()
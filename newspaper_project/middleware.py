@@ -0,0 +1,290 @@
+import time
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+from django.db.backends.signals import connection_created
+from django.http import StreamingHttpResponse
+from django.utils.cache import patch_vary_headers
+from django.utils.deprecation import MiddlewareMixin
+from whitenoise.middleware import WhiteNoiseMiddleware
+
+from . import compression, metrics, routers
+
+
+def install_query_timer(sender, connection, **kwargs):
+    if metrics.time_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(metrics.time_query)
+
+
+class PerformanceMiddleware:
+    """
+    Measure each request: SQL queries and their time, template rendering,
+    cache hits and misses, and the total time spent below this middleware.
+    The figures are sent back in a Server-Timing header and aggregated per
+    URL name in ``metrics.routes`` (see the internal metrics view).
+
+    Place it first in MIDDLEWARE so the total covers the whole stack. When
+    PERFORMANCE_METRICS is off it removes itself from the stack at startup.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        if not settings.PERFORMANCE_METRICS:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+        # Time queries on every connection opened from now on, and on those
+        # this thread already has open.
+        connection_created.connect(install_query_timer)
+        for connection in connections.all(initialized_only=True):
+            install_query_timer(None, connection)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        request_metrics = metrics.RequestMetrics()
+        token = metrics.current.set(request_metrics)
+        try:
+            response = self.get_response(request)
+        finally:
+            metrics.current.reset(token)
+        return self.finish(request, response, request_metrics)
+
+    async def __acall__(self, request):
+        request_metrics = metrics.RequestMetrics()
+        token = metrics.current.set(request_metrics)
+        try:
+            response = await self.get_response(request)
+        finally:
+            metrics.current.reset(token)
+        return self.finish(request, response, request_metrics)
+
+    def process_template_response(self, request, response):
+        request_metrics = metrics.current.get()
+        render = response.render
+
+        def timed_render():
+            started = time.perf_counter()
+            try:
+                return render()
+            finally:
+                request_metrics.render_time += time.perf_counter() - started
+
+        response.render = timed_render
+        return response
+
+    def finish(self, request, response, request_metrics):
+        request_metrics.finish()
+        if not response.streaming:
+            request_metrics.sent_bytes = len(response.content)
+        response.headers["Server-Timing"] = request_metrics.server_timing()
+        match = request.resolver_match
+        route = match.view_name if match is not None else "<unresolved>"
+        metrics.routes.record(route, request_metrics.sample())
+        return response
+
+
+class StaticFilesMiddleware(WhiteNoiseMiddleware):
+    """
+    Serve the static files with WhiteNoise, under WSGI and ASGI alike.
+    WhiteNoiseMiddleware is sync only, so under an ASGI server Django would
+    run every request below it in a thread; this one is async capable and
+    only goes to a thread to open and read the static files themselves.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    chunk_size = 64 * 1024
+
+    def __init__(self, get_response):
+        super().__init__(get_response)
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        return super().__call__(request)
+
+    async def __acall__(self, request):
+        if self.autorefresh:
+            static_file = await sync_to_async(self.find_file)(request.path_info)
+        else:
+            static_file = self.files.get(request.path_info)
+        if static_file is None:
+            return await self.get_response(request)
+        response = await sync_to_async(
+            static_file.get_response, thread_sensitive=False
+        )(request.method, request.META)
+        http_response = StreamingHttpResponse(
+            self.read_chunks(response.file), status=int(response.status)
+        )
+        del http_response["Content-Type"]
+        for key, value in response.headers:
+            http_response[key] = value
+        return http_response
+
+    async def read_chunks(self, file):
+        if file is None:
+            return
+        read = sync_to_async(file.read, thread_sensitive=False)
+        try:
+            while chunk := await read(self.chunk_size):
+                yield chunk
+        finally:
+            file.close()
+
+
+class CompressionMiddleware(MiddlewareMixin):
+    """
+    Compress text responses with Brotli or gzip, as negotiated through
+    Accept-Encoding. Short bodies, bodies that are already encoded and media
+    types that do not compress (images, archives) are left alone. Streaming
+    responses are compressed chunk by chunk. Output is padded to a random
+    length against BREACH; see newspaper_project.compression.
+
+    Place it below StaticFilesMiddleware, whose files are precompressed, and
+    above anything that reads or changes the response body. When
+    RESPONSE_COMPRESSION is off it removes itself from the stack at startup.
+    """
+
+    # Below this size the headers cost more than compression saves.
+    min_length = 200
+
+    def __init__(self, get_response):
+        if not settings.RESPONSE_COMPRESSION:
+            raise MiddlewareNotUsed
+        super().__init__(get_response)
+
+    def process_response(self, request, response):
+        if not response.streaming and len(response.content) < self.min_length:
+            return response
+        if response.has_header("Content-Encoding"):
+            return response
+        if not compression.is_compressible(response.get("Content-Type", "")):
+            return response
+
+        patch_vary_headers(response, ("Accept-Encoding",))
+        accept = request.META.get("HTTP_ACCEPT_ENCODING", "")
+        encoding = compression.choose_encoding(accept)
+        if encoding is None:
+            return response
+
+        # Gzip pads its header; Brotli can only pad HTML, with a comment.
+        trailer = b""
+        if encoding == "br" and response.get("Content-Type", "").startswith(
+            "text/html"
+        ):
+            trailer = compression.html_padding()
+
+        if response.streaming:
+            if response.is_async:
+                response.streaming_content = compression.acompress_stream(
+                    response.streaming_content, encoding, True, trailer
+                )
+            else:
+                response.streaming_content = compression.compress_stream(
+                    response.streaming_content, encoding, True, trailer
+                )
+            # The compressed size is only known once the stream has been sent.
+            del response.headers["Content-Length"]
+        else:
+            started = time.perf_counter()
+            compressed = compression.compress(
+                response.content + trailer, encoding, padded=True
+            )
+            request_metrics = metrics.current.get()
+            if request_metrics is not None:
+                request_metrics.compress_time += time.perf_counter() - started
+                request_metrics.response_bytes = len(response.content)
+            if len(compressed) >= len(response.content):
+                return response
+            response.content = compressed
+            response.headers["Content-Length"] = str(len(compressed))
+
+        # The body now differs byte for byte, so a strong ETag must be made
+        # weak (RFC 9110 8.8.1); conditional requests still match it.
+        etag = response.get("ETag")
+        if etag and etag.startswith('"'):
+            response.headers["ETag"] = "W/" + etag
+        response.headers["Content-Encoding"] = encoding
+        return response
+
+
+class ReplicaMiddleware:
+    """
+    Send the reads of the article list, article detail and home pages (and
+    of the article list and detail API) to a read replica; see
+    ``newspaper_project.routers``. Any other request, and any request from a
+    client that has written within the last REPLICA_STICKY_SECONDS, reads
+    from the primary, so users always see their own changes despite
+    replication lag.
+
+    A write is any request with an unsafe method (POST, PUT, PATCH,
+    DELETE); its response sets a cookie that pins the client to the primary
+    until it expires. When DATABASE_REPLICAS is empty it removes itself from
+    the stack at startup.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    cookie_name = "primary_reads"
+    # URL names whose reads may lag behind the primary.
+    replica_routes = {
+        "home",
+        "article_list",
+        "article_detail",
+        "api_article_list",
+        "api_article_detail",
+    }
+
+    def __init__(self, get_response):
+        if not settings.DATABASE_REPLICAS:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        token = routers.read_alias.set(None)
+        try:
+            response = self.get_response(request)
+        finally:
+            routers.read_alias.reset(token)
+        return self.finish(request, response)
+
+    async def __acall__(self, request):
+        token = routers.read_alias.set(None)
+        try:
+            response = await self.get_response(request)
+        finally:
+            routers.read_alias.reset(token)
+        return self.finish(request, response)
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        if (
+            request.method in ("GET", "HEAD")
+            and request.resolver_match.url_name in self.replica_routes
+            and self.cookie_name not in request.COOKIES
+        ):
+            routers.read_alias.set(routers.choose_replica())
+
+    def finish(self, request, response):
+        if request.method not in ("GET", "HEAD", "OPTIONS", "TRACE"):
+            response.set_cookie(
+                self.cookie_name,
+                "1",
+                max_age=settings.REPLICA_STICKY_SECONDS,
+                httponly=True,
+                samesite="Lax",
+            )
+        return response
@@ -0,0 +1,45 @@
+"""
+Primary/replica database routing.
+
+Writes always go to the primary (``default``). Reads go to one of the
+DATABASE_REPLICAS only while ``ReplicaMiddleware`` has picked a replica for
+the current request: a GET or HEAD from a client that has not written in the
+last REPLICA_STICKY_SECONDS. Everything else (writes and the requests that
+make them, management commands, the shell) reads from the primary, so code
+outside requests never sees replication lag.
+"""
+
+import random
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS
+
+# Alias of the replica the current request reads from, or None.
+read_alias = ContextVar("read_alias", default=None)
+
+# Always read from the primary: sessions are written by the request before.
+PRIMARY_ONLY_APPS = {"sessions"}
+
+
+def choose_replica():
+    return random.choice(settings.DATABASE_REPLICAS)
+
+
+class PrimaryReplicaRouter:
+    def db_for_read(self, model, **hints):
+        alias = read_alias.get()
+        if alias is None or model._meta.app_label in PRIMARY_ONLY_APPS:
+            return DEFAULT_DB_ALIAS
+        return alias
+
+    def db_for_write(self, model, **hints):
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Replicas hold the same rows as the primary.
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # Replicas receive the schema through replication.
+        return db not in settings.DATABASE_REPLICAS
@@ -10,10 +10,12 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/5.2/ref/settings/
 """
 
+import copy
 import os
 from environ import Env
 from pathlib import Path
 from django.contrib.messages import constants as messages
+from django.core.exceptions import ImproperlyConfigured
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
@@ -30,7 +32,7 @@ SECRET_KEY = env("SECRET_KEY")
 # SECURITY WARNING: don't run with debug turned on in production!
 DEBUG = env("DEBUG")
 
-ALLOWED_HOSTS = []
+ALLOWED_HOSTS = env.list("ALLOWED_HOSTS", default=[])
 
 
 # Application definition
@@ -42,6 +44,7 @@ INSTALLED_APPS = [
     "django.contrib.sessions",
     "django.contrib.messages",
     "django.contrib.staticfiles",
+    "django.contrib.sitemaps",
     # 3rd party
     "crispy_forms",
     "crispy_bootstrap5",
@@ -57,8 +60,20 @@ TIME_ZONE = "Africa/Nairobi"
 
 AUTH_USER_MODEL = "accounts.CustomUser"
 
+# Time SQL, rendering and cache lookups per request, reported in a
+# Server-Timing header and per route at /internal/metrics/.
+PERFORMANCE_METRICS = env.bool("PERFORMANCE_METRICS", default=False)
+
+# Compress HTML and JSON responses with Brotli or gzip; see
+# newspaper_project.middleware.CompressionMiddleware.
+RESPONSE_COMPRESSION = env.bool("RESPONSE_COMPRESSION", default=True)
+
 MIDDLEWARE = [
+    "newspaper_project.middleware.PerformanceMiddleware",
     "django.middleware.security.SecurityMiddleware",
+    "newspaper_project.middleware.StaticFilesMiddleware",
+    "newspaper_project.middleware.CompressionMiddleware",
+    "newspaper_project.middleware.ReplicaMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
     "django.middleware.csrf.CsrfViewMiddleware",
@@ -79,6 +94,7 @@ TEMPLATES = [
                 "django.template.context_processors.request",
                 "django.contrib.auth.context_processors.auth",
                 "django.contrib.messages.context_processors.messages",
+                "newspaper_project.context_processors.fragment_cache",
             ],
         },
     },
@@ -86,6 +102,11 @@ TEMPLATES = [
 
 WSGI_APPLICATION = "newspaper_project.wsgi.application"
 
+# Route the article list and detail pages to their async views. Only worth it
+# under an ASGI server (see newspaper_project/asgi.py); under WSGI every async
+# view runs in its own event loop.
+ASYNC_VIEWS = env.bool("ASYNC_VIEWS", default=False)
+
 
 # Database
 # https://docs.djangoproject.com/en/5.2/ref/settings/#databases
@@ -101,6 +122,119 @@ DATABASES = {
     }
 }
 
+# How connections are reused between requests:
+#   none        a new connection per request (Django's default)
+#   persistent  one connection per worker thread, kept for DB_CONN_MAX_AGE
+#               seconds and health-checked before reuse
+#   pool        psycopg 3's connection pool, shared by a process's threads
+DB_POOL_MODE = env("DB_POOL_MODE", default="none")
+
+if DB_POOL_MODE == "persistent":
+    DATABASES["default"]["CONN_MAX_AGE"] = env.int("DB_CONN_MAX_AGE", default=60)
+    DATABASES["default"]["CONN_HEALTH_CHECKS"] = True
+elif DB_POOL_MODE == "pool":
+    DATABASES["default"]["OPTIONS"] = {
+        "pool": {
+            "min_size": env.int("DB_POOL_MIN_SIZE", default=2),
+            "max_size": env.int("DB_POOL_MAX_SIZE", default=10),
+            # Seconds a request waits for a free connection before failing.
+            "timeout": env.float("DB_POOL_TIMEOUT", default=10.0),
+            # Seconds before idle connections above min_size are closed.
+            "max_idle": env.float("DB_POOL_MAX_IDLE", default=600.0),
+            "max_lifetime": env.float("DB_POOL_MAX_LIFETIME", default=3600.0),
+        }
+    }
+elif DB_POOL_MODE != "none":
+    raise ImproperlyConfigured(
+        f"DB_POOL_MODE must be none, persistent or pool, not {DB_POOL_MODE!r}."
+    )
+
+# Read replicas of the default database, one per host in DB_REPLICA_HOSTS,
+# with the same name, credentials and pooling. ReplicaMiddleware sends the
+# reads of the list, detail and home pages to them; everything else, and
+# every read within REPLICA_STICKY_SECONDS of a client's last write, goes to
+# the primary. In tests they mirror the default database.
+DATABASE_REPLICAS = []
+for number, host in enumerate(env.list("DB_REPLICA_HOSTS", default=[])):
+    alias = f"replica{number}"
+    DATABASES[alias] = {
+        **copy.deepcopy(DATABASES["default"]),
+        "HOST": host,
+        "TEST": {"MIRROR": "default"},
+    }
+    DATABASE_REPLICAS.append(alias)
+
+DATABASE_ROUTERS = ["newspaper_project.routers.PrimaryReplicaRouter"]
+REPLICA_STICKY_SECONDS = env.int("REPLICA_STICKY_SECONDS", default=15)
+
+
+# Cache
+# https://docs.djangoproject.com/en/5.2/topics/cache/
+
+CACHE_BACKENDS = {
+    "locmem": "newspaper_project.cache.LocMemCache",
+    "file": "newspaper_project.cache.FileBasedCache",
+}
+CACHE_BACKEND = env("CACHE_BACKEND", default="locmem")
+# Backends every server process reads and writes alike. locmem is private to
+# each process, so a deletion there (logout, a password change) would not
+# reach the others; sessions and users are only cached in a shared backend.
+SHARED_CACHE_BACKENDS = {"file"}
+SHARED_CACHE = CACHE_BACKEND in SHARED_CACHE_BACKENDS
+
+CACHES = {
+    "default": {
+        "BACKEND": CACHE_BACKENDS[CACHE_BACKEND],
+        "LOCATION": env("CACHE_LOCATION", default="/var/tmp/newspaper_cache"),
+        "TIMEOUT": env.int("CACHE_TIMEOUT", default=300),
+    }
+}
+
+# db: sessions in the database only; cached_db: read through the cache, so
+# most requests never query the session table; cache: cache only, which loses
+# sessions on eviction. Both cached modes need a shared cache.
+SESSION_ENGINES = {
+    "db": "django.contrib.sessions.backends.db",
+    "cached_db": "django.contrib.sessions.backends.cached_db",
+    "cache": "django.contrib.sessions.backends.cache",
+}
+SESSION_MODE = env("SESSION_MODE", default="") or (
+    "cached_db" if SHARED_CACHE else "db"
+)
+if SESSION_MODE != "db" and not SHARED_CACHE:
+    raise ImproperlyConfigured(
+        f"SESSION_MODE={SESSION_MODE} needs a CACHE_BACKEND shared by all "
+        f"processes ({', '.join(sorted(SHARED_CACHE_BACKENDS))}), not "
+        f"{CACHE_BACKEND!r}."
+    )
+SESSION_ENGINE = SESSION_ENGINES[SESSION_MODE]
+
+# With a shared cache the logged-in user is cached for USER_CACHE_TIMEOUT
+# seconds; see accounts.backends. ModelBackend stays listed so sessions logged
+# in before the cached backend was switched on keep their user.
+AUTHENTICATION_BACKENDS = ["django.contrib.auth.backends.ModelBackend"]
+if SHARED_CACHE:
+    AUTHENTICATION_BACKENDS.insert(0, "accounts.backends.CachedModelBackend")
+USER_CACHE_TIMEOUT = env.int("USER_CACHE_TIMEOUT", default=300)
+
+# Rendered article cards and bodies are keyed by Article.cache_version, so
+# stale entries are never read and only need to age out.
+FRAGMENT_CACHE_TIMEOUT = env.int("FRAGMENT_CACHE_TIMEOUT", default=60 * 60 * 24)
+
+# Feeds and sitemaps are cached whole and dropped when their articles change;
+# see articles.syndication. Other processes only see the drop through a shared
+# cache, so with locmem edits and deletions show within a minute instead.
+ARCHIVE_CACHE_TIMEOUT = env.int(
+    "ARCHIVE_CACHE_TIMEOUT", default=60 * 60 * 24 if SHARED_CACHE else 60
+)
+
+# Today's birthdays on the home page are cached until midnight at most and
+# dropped when a listed user changes; see accounts.birthdays. As above, with
+# locmem the drop stays in one process, so the others rebuild every minute.
+BIRTHDAYS_CACHE_TIMEOUT = env.int(
+    "BIRTHDAYS_CACHE_TIMEOUT", default=60 * 60 * 24 if SHARED_CACHE else 60
+)
+
 
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
@@ -138,6 +272,14 @@ USE_TZ = True
 
 STATIC_URL = "static/"
 STATICFILES_DIRS = [BASE_DIR / "static"]
+STATIC_ROOT = BASE_DIR / "staticfiles"
+
+# collectstatic writes content-hashed copies of every file plus gzip and
+# Brotli versions; WhiteNoise serves the hashed ones as immutable.
+STORAGES = {
+    "default": {"BACKEND": "django.core.files.storage.FileSystemStorage"},
+    "staticfiles": {"BACKEND": "newspaper_project.storage.StaticFilesStorage"},
+}
 
 # Default primary key field type
 # https://docs.djangoproject.com/en/5.2/ref/settings/#default-auto-field
@@ -0,0 +1,18 @@
+"""
+Settings for the test suite: the project settings plus the database aliases
+the tests need. ``manage.py test`` uses them unless DJANGO_SETTINGS_MODULE
+says otherwise.
+"""
+
+import copy
+
+from .settings import *  # noqa: F401,F403
+from .settings import DATABASES
+
+# A read replica for ReplicaRoutingTests. It mirrors the default test
+# database, so it holds the same rows, and is only read from while a test
+# lists it in DATABASE_REPLICAS.
+DATABASES["replica"] = {
+    **copy.deepcopy(DATABASES["default"]),
+    "TEST": {"MIRROR": "default"},
+}
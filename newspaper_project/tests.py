@@ -0,0 +1,534 @@
+import gzip
+import os
+import tempfile
+from io import StringIO
+from unittest.mock import patch
+
+import brotli
+from asgiref.sync import async_to_sync, iscoroutinefunction
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection, connections
+from django.http import HttpResponse, StreamingHttpResponse
+from django.templatetags.static import static
+from django.test import (
+    AsyncRequestFactory,
+    Client,
+    RequestFactory,
+    SimpleTestCase,
+    TestCase,
+    TransactionTestCase,
+    override_settings,
+)
+from django.test.utils import CaptureQueriesContext
+from django.urls import URLPattern, get_resolver, reverse
+from django.utils import timezone
+
+from accounts.tests import cached_auth
+from articles.models import Article, Comment
+
+from . import compression, metrics
+from .admin import EstimatedCountPaginator, in_batches
+from .cache import FileBasedCache, LocMemCache
+from .cache import stats as cache_stats
+from .middleware import CompressionMiddleware, ReplicaMiddleware, StaticFilesMiddleware
+
+User = get_user_model()
+
+# Highest number of SQL queries a GET of each named route may run for a
+# logged-in article author, whatever the number of rows in the database. The
+# session and user come from the cache (see accounts.backends), as they do
+# with a shared CACHE_BACKEND.
+# Every named route in the apps below must be listed here.
+QUERY_BUDGETS = {
+    # articles.urls
+    "article_list": 2,  # page validators, page of articles joined to authors
+    "article_detail": 3,  # validators, article + author, comments + authors
+    "article_comments": 1,  # page of comments joined to authors
+    "article_edit": 1,  # article, shared by the author check and the form
+    "article_delete": 1,  # article, shared by the author check and the view
+    "article_create": 0,
+    "article_search": 1,  # ranked page of matches + authors
+    "api_article_list": 1,  # page of articles joined to authors
+    "api_article_detail": 1,  # article joined to its author
+    "api_article_comments": 1,  # page of comments joined to authors
+    "article_feed": 1,  # latest articles joined to authors, then cached
+    "article_feed_atom": 1,
+    "author_feed": 2,  # author, their latest articles
+    "author_feed_atom": 2,
+    "article_sitemap_index": 1,  # articles grouped by month
+    "article_sitemap": 1,  # one month of articles
+    # accounts.urls
+    "register": 0,
+    # pages.urls
+    "home": 1,  # today's birthdays, cached for the rest of the day
+}
+
+URLCONFS = ["articles.urls", "accounts.urls", "pages.urls"]
+
+# URL arguments for routes that are not about the budgeted article.
+URL_KWARGS = {
+    "author_feed": lambda test: {"pk": test.author.pk},
+    "author_feed_atom": lambda test: {"pk": test.author.pk},
+    "article_sitemap": lambda test: {
+        "year": f"{timezone.localtime(test.article.created_at):%Y}",
+        "month": f"{timezone.localtime(test.article.created_at):%m}",
+    },
+}
+
+# Query strings needed for a route to do its real work.
+QUERY_STRINGS = {
+    "article_search": "?q=lorem",
+}
+
+
+@cached_auth()
+class QueryBudgetTests(TestCase):
+    """Walk every named route and hold it to a constant query budget."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user(
+            username="author", email="author@test.com", password="Test1234"
+        )
+        cls.article = Article.objects.create(
+            title="Budgeted", body="Body " * 200, author=cls.author
+        )
+        cls.readers = []
+        cls.seed(articles=3, readers=3)
+
+    @classmethod
+    def seed(cls, articles, readers):
+        """Add readers who comment on the budgeted article and new articles."""
+        start = len(cls.readers)
+        for index in range(start, start + readers):
+            reader = User.objects.create(
+                username=f"reader{index}", first_name="Reader", last_name=str(index)
+            )
+            cls.readers.append(reader)
+            Comment.objects.create(
+                article=cls.article, author=reader, comment=f"Comment {index}"
+            )
+        for index in range(articles):
+            author = cls.readers[index % len(cls.readers)]
+            article = Article.objects.create(
+                title=f"Article {index}", body="Lorem ipsum " * 100, author=author
+            )
+            Comment.objects.bulk_create(
+                Comment(article=article, author=reader, comment="Nice")
+                for reader in cls.readers
+                if reader != author
+            )
+
+    def named_routes(self):
+        for urlconf in URLCONFS:
+            for pattern in get_resolver(urlconf).url_patterns:
+                if isinstance(pattern, URLPattern) and pattern.name:
+                    yield pattern
+
+    def url_for(self, pattern):
+        kwargs = {}
+        if pattern.name in URL_KWARGS:
+            kwargs = URL_KWARGS[pattern.name](self)
+        elif "pk" in getattr(pattern.pattern, "converters", {}):
+            kwargs["pk"] = self.article.pk
+        return reverse(pattern.name, kwargs=kwargs) + QUERY_STRINGS.get(
+            pattern.name, ""
+        )
+
+    def count_queries(self):
+        counts = {}
+        for pattern in self.named_routes():
+            url = self.url_for(pattern)
+            # Measure the cold path, with no cached fragments to fall back on,
+            # but with the session and user cached as after any earlier page.
+            cache.clear()
+            self.client.get(reverse("home"))
+            with CaptureQueriesContext(connection) as queries:
+                response = self.client.get(url)
+            self.assertEqual(response.status_code, 200, msg=url)
+            counts[pattern.name] = len(queries)
+        return counts
+
+    def test_every_route_has_a_budget(self):
+        missing = {p.name for p in self.named_routes()} - QUERY_BUDGETS.keys()
+        self.assertFalse(missing, msg=f"Declare a query budget for {missing}")
+
+    def test_routes_stay_within_budget(self):
+        self.client.login(username="author", password="Test1234")
+        small = self.count_queries()
+        self.seed(articles=20, readers=15)
+        large = self.count_queries()
+
+        for name, budget in QUERY_BUDGETS.items():
+            with self.subTest(route=name):
+                self.assertLessEqual(small[name], budget)
+                self.assertEqual(
+                    small[name], large[name], msg="queries grow with the data"
+                )
+
+
+class DatabasePoolStatsTests(TestCase):
+    """Ensure the connection statistics endpoint is staff only."""
+
+    def test_stats_view_is_staff_only(self):
+        user = User.objects.create_user(username="staff", password="Test1234")
+        self.client.force_login(user)
+        self.assertEqual(self.client.get(reverse("db_pool_stats")).status_code, 302)
+        user.is_staff = True
+        user.save()
+        response = self.client.get(reverse("db_pool_stats"))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()["mode"], "none")
+        self.assertIn("conn_max_age", response.json())
+
+
+class CacheStatsTests(SimpleTestCase):
+    """Ensure every cache lookup is counted once."""
+
+    def test_get_many_counts_each_key_once(self):
+        with tempfile.TemporaryDirectory() as directory:
+            backends = [
+                LocMemCache("stats", {}),
+                FileBasedCache(directory, {}),
+            ]
+            for backend in backends:
+                with self.subTest(backend=type(backend).__name__):
+                    backend.set("present", 1)
+                    cache_stats.reset()
+                    self.assertEqual(
+                        backend.get_many(["present", "absent"]), {"present": 1}
+                    )
+                    snapshot = cache_stats.snapshot()
+                    self.assertEqual((snapshot["hits"], snapshot["misses"]), (1, 1))
+        cache_stats.reset()
+
+
+@override_settings(PERFORMANCE_METRICS=True)
+class PerformanceMiddlewareTests(TestCase):
+    """Ensure requests are timed, reported and aggregated per route."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username="timed", password="Test1234")
+        Article.objects.create(title="Timed", body="Body", author=cls.user)
+
+    def setUp(self):
+        metrics.routes.reset()
+        self.client.force_login(self.user)
+
+    def test_server_timing_header(self):
+        cache.clear()
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse("article_list"))
+        timing = response["Server-Timing"]
+        self.assertIn("total;dur=", timing)
+        self.assertIn(f'desc="{len(queries)} queries"', timing)
+        self.assertIn("render;dur=", timing)
+        self.assertIn("misses", timing)
+
+    def test_percentiles_per_route(self):
+        for _ in range(3):
+            self.client.get(reverse("article_list"))
+        self.client.get(reverse("home"))
+        routes = metrics.routes.snapshot()
+        self.assertEqual(routes["article_list"]["requests"], 3)
+        self.assertEqual(set(routes["article_list"]["total_ms"]), {"p50", "p95", "p99"})
+        self.assertEqual(routes["home"]["requests"], 1)
+
+    async def test_async_requests(self):
+        await self.async_client.aforce_login(self.user)
+        response = await self.async_client.get(reverse("home"))
+        self.assertIn("total;dur=", response["Server-Timing"])
+
+    def test_metrics_view_is_staff_only(self):
+        self.assertEqual(self.client.get(reverse("route_metrics")).status_code, 302)
+        self.user.is_staff = True
+        self.user.save()
+        self.assertIn("route_metrics", self.client.get(reverse("route_metrics")).json())
+
+    @override_settings(PERFORMANCE_METRICS=False)
+    def test_disabled(self):
+        response = self.client.get(reverse("home"))
+        self.assertNotIn("Server-Timing", response)
+
+
+class LargeTableAdminTests(TestCase):
+    """Ensure the shared admin helpers avoid full counts and big transactions."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user(username="author")
+        for index in range(5):
+            Article.objects.create(title=f"A{index}", body="Body", author=cls.author)
+
+    def test_estimate_replaces_unfiltered_count(self):
+        articles = Article.objects.all()
+        with patch("newspaper_project.admin.estimated_count", return_value=2_000_000):
+            with self.assertNumQueries(0):
+                self.assertEqual(
+                    EstimatedCountPaginator(articles, 100).count, 2_000_000
+                )
+            # Filtered lists cannot use the table estimate.
+            filtered = articles.filter(title="A1")
+            self.assertEqual(EstimatedCountPaginator(filtered, 100).count, 1)
+        with patch("newspaper_project.admin.estimated_count", return_value=50):
+            self.assertEqual(EstimatedCountPaginator(articles, 100).count, 5)
+        # SQLite keeps no estimate.
+        self.assertEqual(EstimatedCountPaginator(articles, 100).count, 5)
+
+    def test_in_batches(self):
+        batches = list(in_batches(Article.objects.all(), batch_size=2))
+        self.assertEqual([len(pks) for pks in batches], [2, 2, 1])
+        self.assertEqual(
+            sorted(pk for pks in batches for pk in pks),
+            sorted(Article.objects.values_list("pk", flat=True)),
+        )
+
+
+class StaticFilesTests(SimpleTestCase):
+    """Ensure pages use the vendored assets, served hashed and compressed."""
+
+    def test_pages_use_no_cdn(self):
+        response = self.client.get(reverse("home"))
+        self.assertContains(response, "/static/vendor/bootstrap-5.3.8/css/")
+        self.assertNotContains(response, "cdn.")
+
+    def test_collected_files_are_immutable_and_precompressed(self):
+        with tempfile.TemporaryDirectory() as root, override_settings(STATIC_ROOT=root):
+            call_command(
+                "collectstatic",
+                interactive=False,
+                ignore_patterns=["admin"],
+                verbosity=0,
+            )
+            url = static("css/icons.css")
+            self.assertRegex(url, r"^/static/css/icons\.[0-9a-f]{12}\.css$")
+            # References inside stylesheets point at hashed files too.
+            with open(os.path.join(root, url.removeprefix("/static/"))) as stream:
+                self.assertRegex(stream.read(), r"chat-dots-fill\.[0-9a-f]{12}\.svg")
+
+            response = Client().get(url, HTTP_ACCEPT_ENCODING="gzip, br")
+            self.assertEqual(response.status_code, 200)
+            self.assertIn("immutable", response["Cache-Control"])
+            self.assertEqual(response["Content-Encoding"], "br")
+            response = Client().get(url, HTTP_ACCEPT_ENCODING="gzip")
+            self.assertEqual(response["Content-Encoding"], "gzip")
+
+    def test_missing_references_fail_collectstatic(self):
+        with tempfile.TemporaryDirectory() as source, tempfile.TemporaryDirectory() as root:
+            with open(os.path.join(source, "broken.css"), "w") as stream:
+                stream.write("a { background: url(missing.png); }")
+            with override_settings(STATIC_ROOT=root, STATICFILES_DIRS=[source]):
+                with self.assertRaisesMessage(ValueError, "missing.png"):
+                    call_command(
+                        "collectstatic",
+                        interactive=False,
+                        ignore_patterns=["admin"],
+                        stderr=StringIO(),
+                        verbosity=0,
+                    )
+                # Outside collectstatic, unknown files keep their plain name.
+                self.assertEqual(static("missing.png"), "/static/missing.png")
+
+
+class StaticFilesMiddlewareTests(SimpleTestCase):
+    """Ensure static files are served without making the stack sync only."""
+
+    @override_settings(WHITENOISE_USE_FINDERS=True)
+    def test_serves_files_in_an_async_stack(self):
+        async def view(request):
+            return HttpResponse("page")
+
+        middleware = StaticFilesMiddleware(view)
+        self.assertTrue(iscoroutinefunction(middleware))
+
+        async def get(path):
+            response = await middleware(AsyncRequestFactory().get(path))
+            if response.streaming:
+                return response, b"".join(
+                    [chunk async for chunk in response.streaming_content]
+                )
+            return response, response.content
+
+        response, body = async_to_sync(get)(static("css/icons.css"))
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response["Content-Type"].startswith("text/css"))
+        with open(os.path.join("static", "css", "icons.css"), "rb") as stream:
+            self.assertEqual(body, stream.read())
+        self.assertEqual(async_to_sync(get)("/")[1], b"page")
+
+
+class CompressionMiddlewareTests(TestCase):
+    """Ensure responses are compressed as negotiated, streams included."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username="reader", password="Test1234")
+        cls.article = Article.objects.create(
+            title="Compressed",
+            body="Lorem ipsum dolor sit amet. " * 200,
+            author=cls.user,
+        )
+
+    def setUp(self):
+        self.client.force_login(self.user)
+        self.middleware = CompressionMiddleware(lambda request: None)
+
+    def process(self, response, accept="gzip, br"):
+        request = RequestFactory().get("/", HTTP_ACCEPT_ENCODING=accept)
+        return self.middleware.process_response(request, response)
+
+    def test_choose_encoding(self):
+        self.assertEqual(compression.choose_encoding("gzip, deflate, br"), "br")
+        self.assertEqual(compression.choose_encoding("br;q=0.5, gzip"), "gzip")
+        self.assertEqual(compression.choose_encoding("br;q=0, *"), "gzip")
+        self.assertIsNone(compression.choose_encoding("identity"))
+        self.assertIsNone(compression.choose_encoding(""))
+
+    def test_pages_are_compressed(self):
+        url = self.article.get_absolute_url()
+        plain = self.client.get(url)
+        self.assertNotIn("Content-Encoding", plain)
+        self.assertIn("Accept-Encoding", plain["Vary"])
+
+        # Pages differ only in their masked CSRF token, and Brotli pages in
+        # the padding comment at the end.
+        response = self.client.get(url, HTTP_ACCEPT_ENCODING="gzip, br")
+        self.assertEqual(response["Content-Encoding"], "br")
+        self.assertEqual(int(response["Content-Length"]), len(response.content))
+        self.assertLess(len(response.content), len(plain.content) / 2)
+        body = brotli.decompress(response.content)
+        self.assertTrue(body.endswith(b" -->"))
+        self.assertEqual(len(body[: body.rindex(b"<!-- ")]), len(plain.content))
+
+        response = self.client.get(url, HTTP_ACCEPT_ENCODING="gzip")
+        self.assertEqual(response["Content-Encoding"], "gzip")
+        self.assertEqual(len(gzip.decompress(response.content)), len(plain.content))
+
+    def test_output_is_padded_to_random_lengths(self):
+        html = b"<p>Same page</p>" * 50
+        lengths = {"gzip": set(), "br": set()}
+        for _ in range(10):
+            for encoding in lengths:
+                response = self.process(HttpResponse(html), encoding)
+                lengths[encoding].add(len(response.content))
+        # Gzip hides the padding in the file name field of its header.
+        gzipped = self.process(HttpResponse(html), "gzip").content
+        self.assertEqual(gzip.decompress(gzipped), html)
+        self.assertGreater(len(lengths["gzip"]), 1)
+        self.assertGreater(len(lengths["br"]), 1)
+
+        json = HttpResponse(b'{"a": 1}' * 50, content_type="application/json")
+        self.assertEqual(
+            brotli.decompress(self.process(json, "br").content), b'{"a": 1}' * 50
+        )
+
+    def test_weak_etag_still_matches(self):
+        url = self.article.get_absolute_url()
+        response = self.client.get(url, HTTP_ACCEPT_ENCODING="br")
+        self.assertTrue(response["ETag"].startswith('W/"'))
+        response = self.client.get(
+            url, HTTP_ACCEPT_ENCODING="br", HTTP_IF_NONE_MATCH=response["ETag"]
+        )
+        self.assertEqual(response.status_code, 304)
+
+    def test_skips_small_encoded_and_binary_responses(self):
+        small = self.process(HttpResponse("tiny"))
+        self.assertNotIn("Content-Encoding", small)
+        image = self.process(HttpResponse(b"\x89PNG" * 100, content_type="image/png"))
+        self.assertNotIn("Content-Encoding", image)
+        encoded = HttpResponse(b"x" * 500)
+        encoded["Content-Encoding"] = "gzip"
+        self.assertEqual(self.process(encoded).content, b"x" * 500)
+
+    def test_streams_are_compressed_chunk_by_chunk(self):
+        chunks = [f"line {index}\n".encode() * 20 for index in range(5)]
+        for encoding, decompress in [
+            ("gzip", gzip.decompress),
+            ("br", brotli.decompress),
+        ]:
+            response = self.process(
+                StreamingHttpResponse(iter(chunks), content_type="text/plain"),
+                encoding,
+            )
+            self.assertEqual(response["Content-Encoding"], encoding)
+            self.assertNotIn("Content-Length", response)
+            parts = list(response.streaming_content)
+            # Every input chunk was flushed as it arrived.
+            self.assertGreaterEqual(len(parts), len(chunks))
+            self.assertEqual(decompress(b"".join(parts)), b"".join(chunks))
+
+    @override_settings(PERFORMANCE_METRICS=True)
+    def test_byte_counts_are_recorded(self):
+        metrics.routes.reset()
+        response = self.client.get(
+            self.article.get_absolute_url(), HTTP_ACCEPT_ENCODING="br"
+        )
+        self.assertIn(f'to {len(response.content)} bytes"', response["Server-Timing"])
+        route = metrics.routes.snapshot()["article_detail"]
+        self.assertLess(route["sent_bytes"]["p50"], route["response_bytes"]["p50"])
+
+
+@override_settings(
+    DATABASE_ROUTERS=["newspaper_project.routers.PrimaryReplicaRouter"],
+    DATABASE_REPLICAS=["replica"],
+)
+class ReplicaRoutingTests(TransactionTestCase):
+    """
+    Ensure page reads go to the replica unless the client has just written.
+    The replica mirrors the default test database (see test_settings), so the
+    tests check which connection runs the queries, and commit their writes for
+    the replica's connection to see them.
+    """
+
+    databases = {"default", "replica"}
+
+    def setUp(self):
+        cache.clear()
+        self.writer = User.objects.create_user(username="writer", password="Test1234")
+        self.reader = User.objects.create_user(username="reader", password="Test1234")
+        self.reader_client = Client()
+        self.reader_client.force_login(self.reader)
+        self.client.force_login(self.writer)
+
+    def get_list(self, client):
+        """GET the article list; return the response and the replica queries."""
+        with CaptureQueriesContext(connections["replica"]) as replica_queries:
+            response = client.get(reverse("article_list"))
+        return response, len(replica_queries)
+
+    def test_reads_use_the_replica_unless_the_client_wrote(self):
+        with CaptureQueriesContext(connections["replica"]) as replica_queries:
+            response = self.client.post(
+                reverse("article_create"),
+                {"title": "Fresh News", "body": "Just written."},
+            )
+        self.assertEqual(response.status_code, 302)
+        self.assertEqual(len(replica_queries), 0)
+        self.assertIn(ReplicaMiddleware.cookie_name, response.cookies)
+
+        # The writer reads their own write from the primary...
+        response, replica_queries = self.get_list(self.client)
+        self.assertContains(response, "Fresh News")
+        self.assertEqual(replica_queries, 0)
+        # ...while other readers read the replica.
+        response, replica_queries = self.get_list(self.reader_client)
+        self.assertContains(response, "Fresh News")
+        self.assertGreater(replica_queries, 0)
+
+        # Once the sticky window is over the writer reads the replica too.
+        del self.client.cookies[ReplicaMiddleware.cookie_name]
+        self.assertGreater(self.get_list(self.client)[1], 0)
+
+    def test_other_pages_read_the_primary(self):
+        article = Article.objects.create(
+            title="Primary only", body="Not replicated.", author=self.writer
+        )
+        with CaptureQueriesContext(connections["replica"]) as replica_queries:
+            response = self.reader_client.get(
+                reverse("article_comments", args=[article.pk])
+            )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(replica_queries), 0)
@@ -19,8 +19,13 @@ from django.contrib import admin
 from django.urls import include, path
 from django.views.generic import TemplateView
 
+from . import views
+
 urlpatterns = [
     path("admin/", admin.site.urls),
+    path("internal/cache/", views.cache_stats, name="cache_stats"),
+    path("internal/db/", views.db_pool_stats, name="db_pool_stats"),
+    path("internal/metrics/", views.route_metrics, name="route_metrics"),
     path("accounts/", include("django.contrib.auth.urls")),
     path("accounts/", include("accounts.urls")),
     path("articles/", include("articles.urls")),
@@ -0,0 +1,22 @@
+from django.contrib.admin.views.decorators import staff_member_required
+from django.http import JsonResponse
+
+from . import cache, db, metrics
+
+
+@staff_member_required
+def cache_stats(request):
+    """Hit and miss counters of the cache in the process serving the request."""
+    return JsonResponse(cache.stats.snapshot())
+
+
+@staff_member_required
+def db_pool_stats(request):
+    """Connection reuse and pool usage in the process serving the request."""
+    return JsonResponse(db.pool_stats())
+
+
+@staff_member_required
+def route_metrics(request):
+    """Rolling p50/p95/p99 request timings per URL name in this process."""
+    return JsonResponse(metrics.routes.snapshot())
@@ -1,5 +1,13 @@
 from django.views.generic import TemplateView
 
+from accounts.birthdays import birthdays_today
+
 
 class HomePageView(TemplateView):
     template_name = "home.html"
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        if self.request.user.is_authenticated:
+            context["birthdays"] = birthdays_today()
+        return context